@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Synthetic Benchmark Fixtures
+
+Generates inputs shaped like the government files the pipelines consume, at
+a configurable multiple of the real WA size: a national SAL-like polygon
+layer (Voronoi tessellation with densified, irregular shared borders), the
+SAL -> SA2 correspondence CSV, WA police district polygons and a multi-sheet
+WA Police crime workbook. Everything is seeded, so a given scale always
+produces the same files.
+"""
+
+import datetime
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from openpyxl import Workbook
+
+logger = logging.getLogger(__name__)
+
+# Rough sizes of the real 2021 inputs at 1x
+WA_LOCALITIES = 1701
+NATIONAL_LOCALITIES = 15353
+WA_POLICE_DISTRICTS = 15
+CRIME_OFFENCES = 60
+CRIME_MONTHS = 216
+VERTICES_PER_LOCALITY = 150
+VERTICES_PER_DISTRICT = 4000
+
+# Excel's hard sheet limit is 1,048,576 rows; long data is split below that
+MAX_SHEET_ROWS = 1_000_000
+
+FIXTURE_VERSION = '1'
+
+WA_BOUNDS = (112.9, -35.2, 129.0, -13.7)
+PERTH = (115.86, -31.95)
+
+# (name, ASGS code, abbreviation, bounds) for the localities outside WA
+OTHER_STATES = [
+    ('New South Wales', '1', 'NSW', (141.0, -37.5, 153.6, -28.2)),
+    ('Victoria', '2', 'VIC', (141.0, -39.2, 149.9, -34.0)),
+    ('Queensland', '3', 'QLD', (138.0, -29.0, 153.5, -10.7)),
+    ('South Australia', '4', 'SA', (129.0, -38.1, 141.0, -26.0)),
+    ('Tasmania', '6', 'TAS', (144.6, -43.6, 148.5, -39.6)),
+    ('Northern Territory', '7', 'NT', (129.0, -26.0, 138.0, -10.9)),
+]
+# Share of the non-WA localities in each state, roughly as in the real SAL file
+OTHER_STATE_SHARES = [0.33, 0.22, 0.23, 0.13, 0.06, 0.03]
+
+SYLLABLES = [
+    'bal', 'ga', 'roo', 'mun', 'dar', 'ing', 'up', 'yal', 'wan', 'nee', 'ka', 'lin', 'mor', 'ton', 'bur',
+    'cul', 'jan', 'dak', 'ell', 'ora', 'wil', 'pin', 'jar', 'ra', 'hill', 'vale', 'ter', 'min', 'go', 'ri',
+]
+NAME_SUFFIXES = ['', '', '', ' Beach', ' Heights', ' Park', ' North', ' South', ' Downs', ' Valley']
+POLICE_DISTRICT_NAMES = [
+    'PERTH', 'ARMADALE', 'CANNINGTON', 'FREMANTLE', 'JOONDALUP', 'MANDURAH', 'MIDLAND', 'MIRRABOOKA',
+    'GOLDFIELDS-ESPERANCE', 'GREAT SOUTHERN', 'KIMBERLEY', 'MID WEST-GASCOYNE', 'PILBARA', 'SOUTH WEST', 'WHEATBELT',
+]
+
+
+def locality_names(count: int, rng: np.random.Generator) -> List[str]:
+    """Distinct place-like names ('Ballinup Heights')"""
+    names = []
+    seen = set()
+    while len(names) < count:
+        parts = rng.choice(SYLLABLES, size=rng.integers(2, 5))
+        name = ''.join(parts).capitalize() + NAME_SUFFIXES[rng.integers(len(NAME_SUFFIXES))]
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def seed_points(count: int, bounds: Tuple[float, float, float, float], rng: np.random.Generator,
+                cluster: Tuple[float, float] = None, cluster_share: float = 0.0) -> np.ndarray:
+    """Uniform points, optionally with a dense metro cluster like Perth"""
+    minx, miny, maxx, maxy = bounds
+    clustered = int(count * cluster_share) if cluster else 0
+    points = np.column_stack([rng.uniform(minx, maxx, count - clustered), rng.uniform(miny, maxy, count - clustered)])
+    if clustered:
+        metro = rng.normal(cluster, 0.35, size=(clustered, 2))
+        metro[:, 0] = np.clip(metro[:, 0], minx, maxx)
+        metro[:, 1] = np.clip(metro[:, 1], miny, maxy)
+        points = np.vstack([points, metro])
+    return points
+
+
+def tessellate(points: np.ndarray, bounds: Tuple[float, float, float, float], vertices_per_polygon: int) -> np.ndarray:
+    """Voronoi cells clipped to bounds, densified and wiggled like surveyed boundaries
+
+    Densifying with one global segment length splits every shared edge the same
+    way on both sides, and the wiggle is a function of position, so neighbours
+    keep sharing their borders exactly.
+    """
+    frame = shapely.box(*bounds)
+    cells = shapely.get_parts(shapely.voronoi_polygons(shapely.multipoints(points), extend_to=frame))
+    cells = shapely.intersection(cells, frame)
+
+    # Cells come back in arbitrary order; put them back in seed order
+    order = shapely.STRtree(cells).query(shapely.points(points), predicate='intersects')
+    cell_for_point = np.full(len(points), -1)
+    cell_for_point[order[0]] = order[1]
+    cells = cells[cell_for_point]
+
+    segment_length = float(np.mean(shapely.length(cells))) / vertices_per_polygon
+    cells = shapely.segmentize(cells, segment_length)
+    cells = shapely.set_precision(cells, 1e-7)
+
+    amplitude = segment_length * 0.1
+
+    def wiggle(coords):
+        x, y = coords[:, 0], coords[:, 1]
+        return coords + amplitude * np.column_stack([
+            np.sin(x * 917.0 + y * 131.0), np.cos(y * 853.0 - x * 71.0)
+        ])
+
+    return shapely.make_valid(shapely.transform(cells, wiggle))
+
+
+def make_sal_layer(path: Path, scale: float, rng: np.random.Generator,
+                   vertices_per_polygon: int = VERTICES_PER_LOCALITY) -> gpd.GeoDataFrame:
+    """National SAL-like shapefile (GDA2020, 2021 column names)"""
+    wa_count = max(int(WA_LOCALITIES * scale), 10)
+    other_count = max(int((NATIONAL_LOCALITIES - WA_LOCALITIES) * scale), len(OTHER_STATES))
+
+    frames = []
+    regions = [('Western Australia', '5', 'WA', WA_BOUNDS, wa_count, 0.45)]
+    for (name, code, abbreviation, bounds), share in zip(OTHER_STATES, OTHER_STATE_SHARES):
+        regions.append((name, code, abbreviation, bounds, max(int(other_count * share), 1), 0.0))
+
+    names = locality_names(wa_count + other_count + len(regions), rng)
+    offset = 0
+    for state_name, state_code, _, bounds, count, cluster_share in regions:
+        points = seed_points(count, bounds, rng, PERTH if state_code == '5' else None, cluster_share)
+        geometries = tessellate(points, bounds, vertices_per_polygon)
+        width = max(4, len(str(count)))
+        frames.append(gpd.GeoDataFrame({
+            'SAL_CODE21': [f"{state_code}{i + 1:0{width}d}" for i in range(count)],
+            'SAL_NAME21': names[offset:offset + count],
+            'STE_CODE21': state_code,
+            'STE_NAME21': state_name,
+            'AUS_CODE21': 'AUS',
+            'AUS_NAME21': 'Australia',
+        }, geometry=geometries, crs='EPSG:7844'))
+        offset += count
+
+    layer = pd.concat(frames, ignore_index=True)
+    layer['AREASQKM21'] = (layer.to_crs('EPSG:3577').area / 1_000_000).round(4)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    layer.to_file(path)
+    return layer
+
+
+def make_correspondence(path: Path, sal_layer: gpd.GeoDataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """SAL -> SA2 correspondence CSV with split localities, spelling variants and gaps"""
+    abbreviations = {'5': 'WA', **{code: abbreviation for _, code, abbreviation, _ in OTHER_STATES}}
+    rows = []
+    for i, (sal_code, name, state_code) in enumerate(
+        sal_layer[['SAL_CODE21', 'SAL_NAME21', 'STE_CODE21']].itertuples(index=False, name=None)
+    ):
+        roll = rng.random()
+        if roll < 0.01:
+            continue  # Locality missing from the correspondence
+        if roll < 0.03:
+            name = name[:-1] if len(name) > 5 else name + 'e'  # Spelling variant -> fuzzy path
+        elif roll < 0.05:
+            name = f"{name} ({abbreviations[state_code]})"
+
+        splits = rng.choice([1, 1, 1, 2, 3])
+        ratios = rng.dirichlet(np.ones(splits)) if splits > 1 else np.ones(1)
+        sa2_base = int(state_code) * 100_000_000 + (i // 3) * 10
+        for j, ratio in enumerate(ratios):
+            rows.append({
+                'LOCALITY_PID_2021': f"{abbreviations[state_code]}{sal_code[1:]}",
+                'LOCALITY_NAME_2021': name.upper(),
+                'SA2_CODE_2021': sa2_base + j,
+                'SA2_NAME_2021': f"{name} SA2 {j + 1}",
+                'RATIO_FROM_TO': round(float(ratio), 6),
+                'INDIV_TO_REGION_QLTY_INDICATOR': rng.choice(['Good', 'Good', 'Acceptable', 'Poor']),
+                'OVERALL_QUALITY_INDICATOR': rng.choice(['Good', 'Acceptable']),
+                'BMOS_NULL_FLAG': 0,
+            })
+
+    frame = pd.DataFrame(rows)
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def make_police_districts(path: Path, rng: np.random.Generator,
+                          vertices_per_polygon: int = VERTICES_PER_DISTRICT) -> gpd.GeoDataFrame:
+    """WA police district polygons covering the state"""
+    points = seed_points(WA_POLICE_DISTRICTS, WA_BOUNDS, rng, PERTH, 8 / WA_POLICE_DISTRICTS)
+    districts = gpd.GeoDataFrame({
+        'DISTRICT': [f"{name} DISTRICT" for name in POLICE_DISTRICT_NAMES[:WA_POLICE_DISTRICTS]],
+    }, geometry=tessellate(points, WA_BOUNDS, vertices_per_polygon), crs='EPSG:7844')
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    districts.to_file(path)
+    return districts
+
+
+def make_crime_workbook(path: Path, scale: float, rng: np.random.Generator, months: int = CRIME_MONTHS) -> int:
+    """Multi-sheet crime workbook: long monthly data, a wide yearly summary and a notes sheet
+
+    Scale multiplies the number of districts (each copy is a distinct district),
+    so the row count grows without inventing months.
+    """
+    district_count = max(int(WA_POLICE_DISTRICTS * scale), 1)
+    districts = [
+        f"{POLICE_DISTRICT_NAMES[i % WA_POLICE_DISTRICTS]} DISTRICT" + (f" {i // WA_POLICE_DISTRICTS + 1}" if i >= WA_POLICE_DISTRICTS else '')
+        for i in range(district_count)
+    ]
+    offences = [f"Offence {i + 1:02d}" for i in range(CRIME_OFFENCES)]
+    start = datetime.date(2007, 1, 1)
+    periods = [datetime.datetime(start.year + (start.month - 1 + m) // 12, (start.month - 1 + m) % 12 + 1, 1)
+               for m in range(months)]
+
+    workbook = Workbook(write_only=True)
+    header = ['Month and Year', 'Website Region', 'Police District', 'WAPOL_Hierarchy_Order', 'WAPOL_Hierarchy_Lvl1', 'Count']
+    sheet = None
+    sheet_rows = MAX_SHEET_ROWS
+    total_rows = 0
+    for period in periods:
+        counts = rng.poisson(12, size=(district_count, CRIME_OFFENCES))
+        for d, district in enumerate(districts):
+            for o, offence in enumerate(offences):
+                if sheet_rows >= MAX_SHEET_ROWS:
+                    sheet = workbook.create_sheet(f"Data {len(workbook.worksheets) + 1}")
+                    sheet.append(header)
+                    sheet_rows = 0
+                sheet.append([period, 'Metro' if d < 8 else 'Regional', district, o, offence, int(counts[d, o])])
+                sheet_rows += 1
+                total_rows += 1
+
+    summary = workbook.create_sheet('District Summary')
+    summary.append(['Period', 'District'] + offences[:10] + ['Notes'])
+    for year in sorted({period.year for period in periods}):
+        for district in districts:
+            summary.append([year, district] + rng.poisson(140, size=10).tolist() + ['synthetic'])
+            total_rows += 1
+
+    notes = workbook.create_sheet('Notes')
+    notes.append(['About'])
+    notes.append(['Synthetic benchmark data shaped like the WA Police crime time series'])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(path)
+    return total_rows
+
+
+def build_fixtures(root, scale: float, seed: int = 42, crime: bool = True, crime_months: int = CRIME_MONTHS) -> Dict:
+    """Generate (or reuse) the fixtures for one scale under root/<scale>x; returns the manifest"""
+    directory = Path(root) / f"{scale:g}x"
+    manifest_path = directory / 'manifest.json'
+    params = {'version': FIXTURE_VERSION, 'scale': scale, 'seed': seed, 'crime': crime, 'crime_months': crime_months}
+
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('params') == params:
+            logger.info(f"♻️ Reusing {scale:g}x fixtures in {directory}")
+            return manifest
+
+    rng = np.random.default_rng(seed)
+    geographic_dir = directory / 'geographic'
+    manifest = {'params': params, 'directory': str(directory)}
+
+    logger.info(f"🧪 Generating {scale:g}x fixtures in {directory}...")
+    sal_path = geographic_dir / 'SAL_2021_AUST_GDA2020' / 'SAL_2021_AUST_GDA2020.shp'
+    sal_layer = make_sal_layer(sal_path, scale, rng)
+    manifest['sal_shapefile'] = str(sal_path)
+    manifest['sal_localities'] = len(sal_layer)
+    manifest['wa_localities'] = int((sal_layer['STE_CODE21'] == '5').sum())
+    manifest['sal_vertices'] = int(shapely.get_num_coordinates(sal_layer.geometry.array).sum())
+
+    correspondence_path = geographic_dir / 'SAL_SA2_correspondence.csv'
+    manifest['correspondence_rows'] = len(make_correspondence(correspondence_path, sal_layer, rng))
+    manifest['correspondence_file'] = str(correspondence_path)
+
+    police_path = geographic_dir / 'WA_Police_District_Boundaries' / 'Police_Districts.shp'
+    manifest['police_districts'] = len(make_police_districts(police_path, rng))
+    manifest['police_shapefile'] = str(police_path)
+
+    if crime:
+        workbook_path = directory / 'wa_police_crime_timeseries.xlsx'
+        manifest['crime_rows'] = make_crime_workbook(workbook_path, scale, rng, crime_months)
+        manifest['crime_workbook'] = str(workbook_path)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
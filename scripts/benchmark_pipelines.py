@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmarks
+
+Times and memory-profiles each stage of the geographic and crime pipelines on
+synthetic fixtures at 1x/10x/100x the WA data size, writes the results as
+JSON and compares them against a stored baseline. Each (scale, pipeline) run
+happens in a fresh process so peak RSS isn't inherited from earlier runs.
+tracemalloc slows allocation-heavy stages several times over, so stage
+timings come from an untraced run and allocation peaks from a second, traced
+run of the same fixtures.
+
+    python benchmark_pipelines.py --scales 1 10 --baseline benchmark_baseline.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmark_fixtures import CRIME_MONTHS, build_fixtures
+from pipeline_metrics import measure_stage
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PIPELINES = ['geographic', 'crime']
+DEFAULT_SCALES = [1, 10, 100]
+# A stage counts as regressed when it is this much slower than the baseline...
+DEFAULT_THRESHOLD = 1.25
+# ...and the difference is above timer noise
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def benchmark_geographic(manifest: Dict, output_dir: str, trace_memory: bool = True) -> List[Dict]:
+    """Stage-by-stage run of WASuburbProcessorFinalFixed on one fixture set"""
+    from process_geographic_data_final_fixed import WASuburbProcessorFinalFixed
+
+    processor = WASuburbProcessorFinalFixed(str(Path(manifest['sal_shapefile']).parents[1]), use_cache=False, output_dir=output_dir)
+    stages: List[Dict] = []
+
+    with measure_stage('load', stages, trace_memory) as stage:
+        suburbs = processor.read_sal_suburbs(manifest['sal_shapefile'])
+        stage['rows_in'] = manifest['sal_localities']
+        stage['rows_out'] = len(suburbs)
+
+    with measure_stage('project', stages, trace_memory) as stage:
+        suburbs = processor.project_suburbs(suburbs)
+        stage['rows_in'] = stage['rows_out'] = len(suburbs)
+
+    with measure_stage('load_correspondence', stages, trace_memory) as stage:
+        correspondence = processor.load_locality_sa2_correspondence(manifest['correspondence_file'])
+        stage['rows_out'] = len(correspondence)
+
+    with measure_stage('load_police', stages, trace_memory) as stage:
+        police = processor.load_police_districts(manifest['police_shapefile'])
+        stage['rows_out'] = len(police)
+
+    with measure_stage('sjoin', stages, trace_memory) as stage:
+        suburbs = processor.spatial_intersection_suburbs_police(suburbs, police)
+        stage['rows_in'] = len(suburbs)
+        stage['rows_out'] = int((suburbs['police_district'].fillna('') != '').sum())
+
+    with measure_stage('sa2_mapping', stages, trace_memory) as stage:
+        mappings = processor.map_suburbs_to_sa2(suburbs['sal_name'], correspondence)
+        stage['rows_in'] = int(suburbs['sal_name'].nunique())
+        stage['rows_out'] = sum(1 for value in mappings.values() if value)
+
+    with measure_stage('record_build', stages, trace_memory) as stage:
+        frame = processor.build_suburb_frame(suburbs, correspondence, mappings)
+        stage['rows_in'] = len(suburbs)
+        stage['rows_out'] = len(frame)
+
+    with measure_stage('save', stages, trace_memory) as stage:
+        output_path = processor.save_processed_data(processor.iter_records(frame))
+        stage['rows_in'] = stage['rows_out'] = len(frame)
+        stage['bytes_out'] = os.path.getsize(output_path)
+
+    return stages
+
+
+def benchmark_crime(manifest: Dict, output_dir: str, trace_memory: bool = True) -> List[Dict]:
+    """Stage-by-stage run of WACrimeDataProcessor on one fixture set"""
+    from process_crime_data import WACrimeDataProcessor
+
+    processor = WACrimeDataProcessor(manifest['crime_workbook'], output_dir=output_dir)
+    stages: List[Dict] = []
+
+    with measure_stage('load', stages, trace_memory) as stage:
+        processor.load_and_explore_excel()
+        stage['rows_out'] = len(processor.sheet_names)
+
+    with measure_stage('parse', stages, trace_memory) as stage:
+        processed_data = processor.process_crime_data()
+        stage['rows_in'] = manifest['crime_rows']
+        stage['rows_out'] = sum(sheet['total_rows'] for sheet in processed_data.values())
+
+    with measure_stage('record_build', stages, trace_memory) as stage:
+        district_data = processor.extract_district_level_data(processed_data)
+        stage['rows_out'] = sum(len(records) for records in district_data.values())
+
+    with measure_stage('cube', stages, trace_memory) as stage:
+        cube = processor.build_crime_cube(processed_data)
+        if cube is not None:
+            cube.save(processor.output_dir)
+            stage['rows_out'] = int(cube.values.size)
+
+    with measure_stage('save', stages, trace_memory) as stage:
+        output_path = processor.save_processed_data(district_data)
+        stage['rows_in'] = stage['rows_out'] = sum(len(records) for records in district_data.values())
+        stage['bytes_out'] = os.path.getsize(output_path)
+
+    return stages
+
+
+def run_pipeline(pipeline: str, manifest: Dict, trace_memory: bool) -> Dict:
+    """Benchmark one pipeline on one fixture set (runs inside a worker process)"""
+    # Stage output goes to a scratch directory; only the metrics are kept
+    with tempfile.TemporaryDirectory(prefix=f"bench_{pipeline}_") as output_dir:
+        started = time.perf_counter()
+        if pipeline == 'geographic':
+            stages = benchmark_geographic(manifest, output_dir, trace_memory)
+        else:
+            stages = benchmark_crime(manifest, output_dir, trace_memory)
+
+    return {
+        'pipeline': pipeline,
+        'scale': manifest['params']['scale'],
+        'fixture': {key: value for key, value in manifest.items() if isinstance(value, int)},
+        'total_wall_s': round(time.perf_counter() - started, 4),
+        'stages': stages,
+    }
+
+
+def _run_isolated(pipeline: str, manifest: Dict, trace_memory: bool) -> Dict:
+    # Fresh process per run: clean RSS high-water mark and no warm caches
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_pipeline, pipeline, manifest, trace_memory).result()
+
+
+def run_benchmarks(scales: List[float], pipelines: List[str], fixtures_dir: str, repeat: int = 1,
+                   memory_pass: bool = True, crime_months: int = CRIME_MONTHS) -> Dict:
+    """Run every pipeline at every scale; stage timings come from untraced runs"""
+    runs = []
+    for scale in scales:
+        manifest = build_fixtures(fixtures_dir, scale, crime='crime' in pipelines, crime_months=crime_months)
+        for pipeline in pipelines:
+            traced = None
+            if memory_pass:
+                logger.info(f"🧠 {pipeline} @ {scale:g}x (allocation tracing run)")
+                traced = {stage['stage']: stage['traced_peak_mb'] for stage in _run_isolated(pipeline, manifest, True)['stages']}
+
+            for attempt in range(repeat):
+                logger.info(f"⏱️ {pipeline} @ {scale:g}x (run {attempt + 1}/{repeat})")
+                result = _run_isolated(pipeline, manifest, False)
+                result['run'] = attempt + 1
+                if traced:
+                    for stage in result['stages']:
+                        stage['traced_peak_mb'] = traced.get(stage['stage'])
+                runs.append(result)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'memory_pass': memory_pass,
+        'runs': runs,
+    }
+
+
+def _best_stage_times(results: Dict) -> Dict:
+    """(pipeline, scale, stage) -> fastest wall time across repeats"""
+    best = {}
+    for run in results['runs']:
+        for stage in run['stages']:
+            key = (run['pipeline'], float(run['scale']), stage['stage'])
+            best[key] = min(best.get(key, float('inf')), stage['wall_s'])
+    return best
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Per stage: baseline vs current wall time and whether it regressed"""
+    current = _best_stage_times(results)
+    previous = _best_stage_times(baseline)
+
+    comparisons = []
+    for key, wall_s in sorted(current.items()):
+        if key not in previous:
+            continue
+        pipeline, scale, stage = key
+        ratio = wall_s / previous[key] if previous[key] > 0 else float('inf')
+        comparisons.append({
+            'pipeline': pipeline,
+            'scale': scale,
+            'stage': stage,
+            'baseline_s': previous[key],
+            'current_s': wall_s,
+            'ratio': round(ratio, 3),
+            'regressed': ratio > threshold and wall_s - previous[key] > MIN_REGRESSION_SECONDS,
+        })
+    return comparisons
+
+
+def print_summary(results: Dict, comparisons: Optional[List[Dict]] = None):
+    print(f"\n{'pipeline':<11} {'scale':>6} {'stage':<20} {'wall s':>9} {'cpu s':>9} {'traced MB':>10} {'max RSS MB':>11}")
+    for run in results['runs']:
+        for stage in run['stages']:
+            print(f"{run['pipeline']:<11} {run['scale']:>5g}x {stage['stage']:<20} {stage['wall_s']:>9.3f} "
+                  f"{stage['cpu_s']:>9.3f} {stage.get('traced_peak_mb') or float('nan'):>10.1f} {stage['max_rss_mb']:>11.1f}")
+
+    if comparisons:
+        print(f"\n{'pipeline':<11} {'scale':>6} {'stage':<20} {'baseline s':>11} {'current s':>10} {'ratio':>7}")
+        for row in comparisons:
+            flag = '  <-- slower' if row['regressed'] else ''
+            print(f"{row['pipeline']:<11} {row['scale']:>5g}x {row['stage']:<20} {row['baseline_s']:>11.3f} "
+                  f"{row['current_s']:>10.3f} {row['ratio']:>7.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the geographic and crime pipelines on synthetic fixtures")
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES, help="Multiples of the WA data size")
+    parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=PIPELINES)
+    parser.add_argument('--fixtures-dir', default='./benchmark_fixtures', help="Where generated inputs are kept between runs")
+    parser.add_argument('--output', default='./benchmark_results.json', help="Results JSON")
+    parser.add_argument('--baseline', help="Baseline results JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Also write the results to --baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Slowdown ratio reported as a regression")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per scale and pipeline (fastest is compared)")
+    parser.add_argument('--crime-months', type=int, default=CRIME_MONTHS, help="Months of crime data per district")
+    parser.add_argument('--skip-memory-pass', action='store_true', help="Skip the traced run (RSS is still reported)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.pipelines, args.fixtures_dir, args.repeat,
+                             not args.skip_memory_pass, args.crime_months)
+
+    comparisons = None
+    if args.baseline and Path(args.baseline).exists() and not args.save_baseline:
+        with open(args.baseline) as f:
+            comparisons = compare_to_baseline(results, json.load(f), args.threshold)
+        results['baseline'] = {'path': args.baseline, 'threshold': args.threshold, 'stages': comparisons}
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"💾 Baseline saved to {args.baseline}")
+
+    print_summary(results, comparisons)
+    print(f"\nResults written to {args.output}")
+
+    if comparisons and any(row['regressed'] for row in comparisons):
+        sys.exit(1)
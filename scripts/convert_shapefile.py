@@ -7,40 +7,31 @@ import geopandas as gpd
 import json
 import os
 
-def convert_shapefile_to_geojson():
+import topojson_export
+import vector_tiles
+from sal_reader import find_column, read_sal_localities
+from stage_cache import StageCache, code_digest
+
+SAL_SHAPEFILE = "../scripts/data/geographic/SAL_2021_AUST_GDA2020/SAL_2021_AUST_GDA2020.shp"
+SCORES_FILE = "src/data/precomputed-suburb-scores.json"
+
+def convert_shapefile_to_geojson(state: str = 'WA'):
     """Convert the SAL shapefile to GeoJSON, filtering for WA suburbs only"""
 
     # Read the shapefile
-    shapefile_path = "../scripts/data/geographic/SAL_2021_AUST_GDA2020/SAL_2021_AUST_GDA2020.shp"
+    shapefile_path = SAL_SHAPEFILE
 
     print("Loading shapefile...")
-    gdf = gpd.read_file(shapefile_path)
+    # State filter and column projection happen inside the read, so other
+    # states' geometries are never loaded
+    wa_gdf = read_sal_localities(shapefile_path, state=state)
 
     # Print some info about the data
-    print(f"Total features: {len(gdf)}")
-    print(f"Columns: {list(gdf.columns)}")
+    print(f"Columns: {list(wa_gdf.columns)}")
 
-    # Filter for WA suburbs only
-    # Check column names first
     print("\nFirst few rows:")
-    print(gdf.head())
-
-    # Look for state/territory column
-    state_columns = [col for col in gdf.columns if 'STE' in col.upper() or 'STATE' in col.upper()]
-    print(f"State columns found: {state_columns}")
-
-    if state_columns:
-        state_col = state_columns[0]
-        unique_states = gdf[state_col].unique()
-        print(f"Unique values in {state_col}: {unique_states}")
-
-        # Filter for WA (might be '5' for WA or 'WA' depending on format)
-        wa_filter = gdf[state_col].isin(['5', 'WA', 'Western Australia'])
-        wa_gdf = gdf[wa_filter]
-        print(f"WA suburbs found: {len(wa_gdf)}")
-    else:
-        print("No state column found, keeping all data")
-        wa_gdf = gdf
+    print(wa_gdf.head())
+    print(f"WA suburbs found: {len(wa_gdf)}")
 
     # Convert to WGS84 (EPSG:4326) for web mapping
     print("Converting to WGS84...")
@@ -65,5 +56,101 @@ def convert_shapefile_to_geojson():
 
     return output_path
 
+def convert_shapefile_to_topojson(
+    state: str = 'WA',
+    tolerance: float = 0.001,
+    quantization: int = topojson_export.DEFAULT_QUANTIZATION
+):
+    """Convert the SAL shapefile to quantized shared-arc TopoJSON
+
+    Shared borders are simplified once, so neighbouring suburbs stay gap-free.
+    """
+    print("Loading shapefile...")
+    wa_gdf = read_sal_localities(SAL_SHAPEFILE, state=state)
+    print(f"{state} suburbs found: {len(wa_gdf)}")
+
+    print("Converting to WGS84...")
+    wa_gdf = wa_gdf.to_crs('EPSG:4326')
+
+    print("Building shared-arc topology...")
+    topology = topojson_export.build_topology(
+        wa_gdf, tolerance=tolerance, quantization=quantization,
+        id_column=find_column(wa_gdf.columns, 'SAL_CODE')
+    )
+
+    output_dir = "src/data/geographic"
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = f"{output_dir}/wa_suburbs.topojson"
+    topojson_export.write_topology(topology, output_path)
+
+    print(f"Successfully created {output_path} ({len(topology['arcs'])} arcs)")
+    print(f"File size: {os.path.getsize(output_path) / 1024 / 1024:.2f} MB")
+
+    return output_path
+
+def load_tile_attributes(suburbs: gpd.GeoDataFrame, scores_path: str = SCORES_FILE) -> dict:
+    """sal_code -> tile attributes: code, name and the precomputed scores where available"""
+    scores = {}
+    if os.path.exists(scores_path):
+        with open(scores_path) as f:
+            scores = json.load(f).get('suburbs', {})
+    else:
+        print(f"No scores file at {scores_path}, tiles will only carry codes and names")
+
+    code_col = find_column(suburbs.columns, 'SAL_CODE')
+    name_col = find_column(suburbs.columns, 'SAL_NAME')
+
+    attributes = {}
+    for sal_code, sal_name in zip(suburbs[code_col].astype(str), suburbs[name_col]):
+        suburb_attributes = {'sal_code': sal_code, 'sal_name': sal_name}
+        suburb_attributes.update(scores.get(sal_code, {}).get('scores', {}))
+        attributes[sal_code] = suburb_attributes
+    return attributes
+
+def convert_shapefile_to_tiles(
+    state: str = 'WA',
+    output_path: str = "src/data/geographic/wa_suburbs.mbtiles",
+    scores_path: str = SCORES_FILE,
+    min_zoom: int = vector_tiles.DEFAULT_MIN_ZOOM,
+    max_zoom: int = vector_tiles.DEFAULT_MAX_ZOOM,
+    workers: int = 1
+):
+    """Build zoom-dependent suburb vector tiles into an MBTiles archive"""
+    print("Loading shapefile...")
+    suburbs = read_sal_localities(SAL_SHAPEFILE, state=state)
+    suburbs['sal_code'] = suburbs[find_column(suburbs.columns, 'SAL_CODE')].astype(str)
+    print(f"{state} suburbs found: {len(suburbs)}")
+
+    attributes = load_tile_attributes(suburbs, scores_path)
+
+    # Geometry only changes with the shapefile or the tiling code; scores alone just re-encode tiles
+    digests = StageCache(os.path.join(os.path.dirname(os.path.dirname(SAL_SHAPEFILE)), ".stage_cache"))
+    geometry_key = f"{state}:{digests.file_digest(SAL_SHAPEFILE)}:{code_digest(vector_tiles)}"
+
+    archive = vector_tiles.VectorTileArchive(output_path, min_zoom, max_zoom, workers=workers)
+    summary = archive.build(suburbs, attributes, geometry_key)
+
+    print(f"Tiles {summary['mode']}: {summary['tiles']} written to {output_path}")
+    print(f"File size: {os.path.getsize(output_path) / 1024 / 1024:.2f} MB")
+
+    return output_path
+
 if __name__ == "__main__":
-    convert_shapefile_to_geojson()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert the SAL shapefile for the web map")
+    parser.add_argument('--state', default='WA', help="State name, abbreviation or ASGS code")
+    parser.add_argument('--tiles', action='store_true', help="Build MBTiles vector tiles instead of GeoJSON")
+    parser.add_argument('--topojson', action='store_true', help="Write shared-arc TopoJSON instead of GeoJSON")
+    parser.add_argument('--tolerance', type=float, default=0.001, help="TopoJSON simplification tolerance (degrees)")
+    parser.add_argument('--min-zoom', type=int, default=vector_tiles.DEFAULT_MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=vector_tiles.DEFAULT_MAX_ZOOM)
+    parser.add_argument('--workers', type=int, default=1, help="Process pool size for tile clipping")
+    args = parser.parse_args()
+
+    if args.tiles:
+        convert_shapefile_to_tiles(args.state, min_zoom=args.min_zoom, max_zoom=args.max_zoom, workers=args.workers)
+    elif args.topojson:
+        convert_shapefile_to_topojson(args.state, tolerance=args.tolerance)
+    else:
+        convert_shapefile_to_geojson(args.state)
\ No newline at end of file
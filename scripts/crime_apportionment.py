@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Suburb x District Crime Apportionment
+
+Sparse (suburb x police district) weight matrix that spreads district crime
+counts over the suburbs in each district, instead of every suburb inheriting
+its majority district's figures wholesale. Column d holds the fraction of
+district d's offences attributed to each suburb, so each column sums to 1 and
+district totals are preserved.
+
+A suburb's weight in a district is its estimated population times the share
+of its area that lies in the district. Populations come from the SA2
+correspondence: every SA2 is treated as one equal-population unit (ABS sizes
+them for roughly 10k people) and is split between its localities in
+proportion to their population ratios.
+
+The matrix is stored as CSR arrays in one compressed .npz plus a JSON label
+index. Per-suburb estimates for the whole crime cube are then a single sparse
+matrix product.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from crime_cube import CrimeCube
+from suburb_common import normalize_district_name
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+APPORTIONMENT_NAME = 'wa_suburb_district_weights'
+SUBURB_ESTIMATES_NAME = 'wa_suburb_crime_estimates'
+# Nominal SA2 population; it cancels out when columns are normalized, so only ratios matter
+SA2_POPULATION = 10000.0
+
+
+def estimate_suburb_populations(sa2_mappings: Sequence[List[Dict]], sa2_population: float = SA2_POPULATION) -> np.ndarray:
+    """Population estimate per suburb from its SA2 population ratios
+
+    Suburbs without any SA2 mapping get the median estimate.
+    """
+    rows, codes, weights = [], [], []
+    for row, mappings in enumerate(sa2_mappings):
+        for mapping in mappings if isinstance(mappings, list) else []:
+            weight = float(mapping.get('population_weight') or 0)
+            if mapping.get('sa2_code') and weight > 0:
+                rows.append(row)
+                codes.append(str(mapping['sa2_code']))
+                weights.append(weight)
+
+    populations = np.full(len(sa2_mappings), np.nan)
+    if rows:
+        pairs = pd.DataFrame({'row': rows, 'sa2_code': codes, 'weight': weights})
+        # Each SA2's population is divided between the localities that feed it
+        pairs['population'] = sa2_population * pairs['weight'] / pairs.groupby('sa2_code')['weight'].transform('sum')
+        estimated = pairs.groupby('row')['population'].sum()
+        populations[estimated.index.to_numpy()] = estimated.to_numpy()
+
+    missing = np.isnan(populations)
+    if missing.any():
+        populations[missing] = np.median(populations[~missing]) if (~missing).any() else sa2_population
+    return populations
+
+
+class ApportionmentMatrix:
+    """CSR (suburb x district) weights with labelled rows and columns"""
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        suburbs: Sequence[str],
+        districts: Sequence[str],
+        method: str = ''
+    ):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.suburbs = list(suburbs)
+        self.districts = list(districts)
+        self.method = method
+
+    @classmethod
+    def from_triplets(cls, rows, cols, values, suburbs: Sequence[str], districts: Sequence[str], method: str = '') -> 'ApportionmentMatrix':
+        """CSR from (row, col, value) entries; duplicates are summed"""
+        entries = pd.DataFrame({'row': rows, 'col': cols, 'value': values})
+        entries = entries.groupby(['row', 'col'], as_index=False, sort=True)['value'].sum()
+        entries = entries[entries['value'] > 0]
+        counts = np.bincount(entries['row'].to_numpy(dtype=np.int64), minlength=len(suburbs))
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(indptr, entries['col'].to_numpy(dtype=np.int32), entries['value'].to_numpy(dtype=np.float64),
+                   suburbs, districts, method)
+
+    @property
+    def shape(self):
+        return len(self.suburbs), len(self.districts)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def to_dense(self) -> np.ndarray:
+        dense = np.zeros(self.shape)
+        rows = np.repeat(np.arange(len(self.suburbs)), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """W @ values for district-major values of shape (districts, ...)"""
+        values = np.asarray(values)
+        flat = values.reshape(len(self.districts), -1)
+        if sparse is not None:
+            result = sparse.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape) @ flat
+        else:
+            # Weighted district rows, summed per suburb (rows without entries stay zero)
+            weighted = self.data[:, None] * flat[self.indices]
+            result = np.zeros((len(self.suburbs), flat.shape[1]), dtype=weighted.dtype)
+            filled = np.diff(self.indptr) > 0
+            if filled.any():
+                result[filled] = np.add.reduceat(weighted, self.indptr[:-1][filled], axis=0)
+        return np.asarray(result).reshape((len(self.suburbs),) + values.shape[1:])
+
+    def save(self, output_dir, name: str = APPORTIONMENT_NAME) -> Path:
+        """Write <name>.npz (CSR arrays) and the <name>.json label index"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        array_path = output_dir / f'{name}.npz'
+        np.savez_compressed(array_path, indptr=self.indptr, indices=self.indices, data=self.data)
+
+        index = {
+            'array_file': array_path.name,
+            'format': 'csr',
+            'shape': list(self.shape),
+            'nnz': self.nnz,
+            'dimensions': ['suburb', 'district'],
+            'method': self.method,
+            'suburbs': self.suburbs,
+            'districts': self.districts,
+        }
+        with open(output_dir / f'{name}.json', 'w') as f:
+            json.dump(index, f)
+
+        return array_path
+
+    @classmethod
+    def load(cls, output_dir, name: str = APPORTIONMENT_NAME) -> 'ApportionmentMatrix':
+        output_dir = Path(output_dir)
+        with open(output_dir / f'{name}.json') as f:
+            index = json.load(f)
+        with np.load(output_dir / index['array_file']) as arrays:
+            return cls(arrays['indptr'], arrays['indices'], arrays['data'],
+                       index['suburbs'], index['districts'], index.get('method', ''))
+
+
+def district_shares(
+    suburb_frame: pd.DataFrame,
+    districts: Optional[Sequence[str]] = None,
+    key: Optional[Callable[[str], str]] = None
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """(districts, suburb x district area shares, how each suburb was matched)
+
+    Rows hold the share of each suburb's area in each district: the overlay's
+    police_district_shares where present, otherwise the single assigned
+    district. Suburbs outside every district borrow the average district mix
+    of the suburbs sharing their main SA2. Match is 0 (none), 1 (SA2 mix) or
+    2 (direct). District names go through `key` and, when `districts` is
+    given, names outside it are dropped; otherwise every district seen is a column.
+    """
+    key = key or str
+    entries = []
+    for row, (shares, district) in enumerate(zip(suburb_frame['police_district_shares'], suburb_frame['police_district'])):
+        if not isinstance(shares, dict) or not shares:
+            shares = {district: 1.0} if district else {}
+        entries.extend((row, key(name), share) for name, share in shares.items())
+
+    districts = sorted({name for _, name, _ in entries}) if districts is None else list(districts)
+    district_index = {name: i for i, name in enumerate(districts)}
+    entries = [(row, district_index[name], share) for row, name, share in entries if name in district_index and share > 0]
+
+    area_shares = np.zeros((len(suburb_frame), len(districts)), dtype=np.float64)
+    if entries:
+        rows, cols, values = zip(*entries)
+        np.add.at(area_shares, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), np.array(values, dtype=np.float64))
+    totals = area_shares.sum(axis=1, keepdims=True)
+    np.divide(area_shares, totals, out=area_shares, where=totals > 0)
+    match = np.where(totals[:, 0] > 0, 2, 0)
+
+    unmatched = match == 0
+    if unmatched.any() and districts:
+        main_sa2 = np.array([
+            mappings[0].get('sa2_code') if isinstance(mappings, list) and mappings else None
+            for mappings in suburb_frame['sa2_mappings']
+        ], dtype=object)
+        matched_frame = pd.DataFrame(area_shares[~unmatched], index=main_sa2[~unmatched])
+        sa2_mix = matched_frame[matched_frame.index.notna()].groupby(level=0).mean()
+        borrowed = sa2_mix.reindex(main_sa2[unmatched]).to_numpy()
+        found = ~np.isnan(borrowed).any(axis=1)
+        fill_rows = np.flatnonzero(unmatched)[found]
+        area_shares[fill_rows] = borrowed[found]
+        match[fill_rows] = 1
+
+    return districts, area_shares, match
+
+
+def build_apportionment(suburb_frame: pd.DataFrame) -> ApportionmentMatrix:
+    """Weights from a suburb frame with police_district(_shares) and sa2_mappings columns
+
+    Area shares (and the SA2 fallback) come from district_shares, which the
+    scoring engine uses too.
+    """
+    districts, area_shares, match = district_shares(suburb_frame)
+    if (match < 2).any():
+        logger.info(f"🔗 {int((match == 1).sum())}/{int((match < 2).sum())} suburbs without a district borrowed their SA2's district mix")
+
+    # Estimated population of each suburb inside each district, normalized per district
+    weights = area_shares * estimate_suburb_populations(suburb_frame['sa2_mappings'].tolist())[:, None]
+    column_totals = weights.sum(axis=0, keepdims=True)
+    np.divide(weights, column_totals, out=weights, where=column_totals > 0)
+
+    rows, cols = np.nonzero(weights)
+    matrix = ApportionmentMatrix.from_triplets(
+        rows, cols, weights[rows, cols],
+        suburb_frame['sal_code'].astype(str).tolist(), districts,
+        method='sa2_population_x_area_share'
+    )
+    logger.info(f"🧮 Apportionment matrix: {matrix.shape[0]} suburbs x {matrix.shape[1]} districts, {matrix.nnz} non-zero weights")
+    return matrix
+
+
+def estimate_suburb_crime(cube: CrimeCube, matrix: ApportionmentMatrix) -> CrimeCube:
+    """Per-suburb, per-offense, per-month estimates for the whole cube as one sparse product"""
+    cube_index = {normalize_district_name(name): i for i, name in enumerate(cube.districts)}
+    positions = np.array([cube_index.get(normalize_district_name(name), -1) for name in matrix.districts], dtype=np.int64)
+    missing = [name for name, position in zip(matrix.districts, positions) if position < 0]
+    if missing:
+        logger.warning(f"⚠️ No crime data for districts {missing}; their suburbs get no estimate from them")
+
+    # District rows in the matrix's column order (zeros for districts the cube doesn't have)
+    values = np.asarray(cube.values, dtype=np.float32)
+    aligned = np.zeros((len(matrix.districts),) + values.shape[1:], dtype=np.float32)
+    aligned[positions >= 0] = values[positions[positions >= 0]]
+
+    estimates = matrix.apply(aligned).astype(np.float32)
+    return CrimeCube(estimates, matrix.suburbs, cube.offenses, cube.periods, source=cube.source,
+                     dimensions=['suburb', 'offense', 'month'])
+
+
+def load_apportionment(output_dir, name: str = APPORTIONMENT_NAME) -> Optional[ApportionmentMatrix]:
+    """Saved matrix, or None if the geographic pipeline hasn't written one"""
+    if not (Path(output_dir) / f'{name}.json').exists():
+        return None
+    return ApportionmentMatrix.load(output_dir, name)
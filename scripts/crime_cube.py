@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+WA Police Crime Cube
+
+Dense district x offence x month array built from the streamed crime workbook.
+Saved as a plain .npy file (opened memory-mapped, so queries only page in the
+slices they touch) plus a small JSON label index. Time series, date-range
+totals and yearly rollups become array slicing instead of JSON walks.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+CUBE_NAME = 'wa_police_crime_cube'
+DIMENSIONS = ['district', 'offense', 'month']
+
+
+def month_range(first: str, last: str) -> List[str]:
+    """Every 'YYYY-MM' label from first to last inclusive"""
+    return [period.strftime('%Y-%m') for period in pd.period_range(first, last, freq='M')]
+
+
+def merge_monthly_sheets(sheets: Sequence[Dict[str, Dict[str, Dict[str, float]]]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """One district -> month -> offense table from several sheets' counts, in priority order
+
+    Summary sheets repeat the same offences at coarser grain, so sheets are
+    merged per district-month rather than added: the first sheet to carry a
+    district-month wins it.
+    """
+    merged: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for district_counts in sheets:
+        for district, periods in district_counts.items():
+            target = merged.setdefault(district, {})
+            for period, offenses in periods.items():
+                if MONTH_PATTERN.match(period) and period not in target:
+                    target[period] = offenses
+    return merged
+
+
+class CrimeCube:
+    """Counts indexed by [district, offense, month]"""
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        districts: Sequence[str],
+        offenses: Sequence[str],
+        periods: Sequence[str],
+        source: str = '',
+        dimensions: Sequence[str] = DIMENSIONS
+    ):
+        self.values = values
+        # First axis labels; districts for the police cube, SAL codes for suburb estimates
+        self.districts = list(districts)
+        self.offenses = list(offenses)
+        self.periods = list(periods)
+        self.source = source
+        self.dimensions = list(dimensions)
+
+        self._district_index = {name: i for i, name in enumerate(self.districts)}
+        self._offense_index = {name: i for i, name in enumerate(self.offenses)}
+        self._period_index = {name: i for i, name in enumerate(self.periods)}
+
+    @classmethod
+    def from_district_counts(cls, district_counts: Dict[str, Dict[str, Dict[str, float]]], source: str = '') -> 'CrimeCube':
+        """Build from nested district -> period -> offense totals (month periods only)"""
+        months = sorted({
+            period
+            for periods in district_counts.values()
+            for period in periods
+            if MONTH_PATTERN.match(period)
+        })
+        districts = sorted(district_counts)
+        offenses = sorted({
+            offense
+            for periods in district_counts.values()
+            for period, offense_counts in periods.items()
+            if MONTH_PATTERN.match(period)
+            for offense in offense_counts
+        })
+
+        # Dense monthly axis so date ranges map straight to index ranges
+        periods = month_range(months[0], months[-1]) if months else []
+        cube = cls(np.zeros((len(districts), len(offenses), len(periods)), dtype=np.float32),
+                   districts, offenses, periods, source)
+
+        for district, district_periods in district_counts.items():
+            d = cube._district_index[district]
+            for period, offense_counts in district_periods.items():
+                m = cube._period_index.get(period)
+                if m is None:
+                    continue
+                for offense, count in offense_counts.items():
+                    cube.values[d, cube._offense_index[offense], m] += count
+
+        return cube
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def save(self, output_dir, name: str = CUBE_NAME) -> Path:
+        """Write <name>.npy and the <name>.json label index"""
+        output_dir = Path(output_dir)
+        array_path = output_dir / f'{name}.npy'
+        np.save(array_path, np.ascontiguousarray(self.values))
+
+        index = {
+            'array_file': array_path.name,
+            'dtype': str(self.values.dtype),
+            'shape': list(self.values.shape),
+            'dimensions': self.dimensions,
+            'districts': self.districts,
+            'offenses': self.offenses,
+            'periods': self.periods,
+            'source': self.source,
+        }
+        with open(output_dir / f'{name}.json', 'w') as f:
+            json.dump(index, f, indent=2)
+
+        return array_path
+
+    @classmethod
+    def load(cls, output_dir, name: str = CUBE_NAME, mmap: bool = True) -> 'CrimeCube':
+        """Open a saved cube; with mmap the array stays on disk until sliced"""
+        output_dir = Path(output_dir)
+        with open(output_dir / f'{name}.json') as f:
+            index = json.load(f)
+
+        values = np.load(output_dir / index['array_file'], mmap_mode='r' if mmap else None)
+        return cls(values, index['districts'], index['offenses'], index['periods'], index.get('source', ''),
+                   index.get('dimensions', DIMENSIONS))
+
+    def _selector(self, labels: Union[None, str, Sequence[str]], lookup: Dict[str, int]):
+        if labels is None:
+            return slice(None)
+        if isinstance(labels, str):
+            labels = [labels]
+        missing = [label for label in labels if label not in lookup]
+        if missing:
+            raise KeyError(f"Unknown labels: {missing}")
+        return [lookup[label] for label in labels]
+
+    def _period_slice(self, start: Optional[str], end: Optional[str]) -> slice:
+        # Periods are sorted 'YYYY-MM' strings, so bounds work with plain string comparison
+        first = 0 if start is None else int(np.searchsorted(self.periods, start, side='left'))
+        last = len(self.periods) if end is None else int(np.searchsorted(self.periods, end, side='right'))
+        return slice(first, last)
+
+    def select(
+        self,
+        districts: Union[None, str, Sequence[str]] = None,
+        offenses: Union[None, str, Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> np.ndarray:
+        """Sub-cube for the given districts/offenses and inclusive 'YYYY-MM' range"""
+        period_slice = self._period_slice(start, end)
+        # Month is the innermost axis: the slice is a view, and indexing it reads one
+        # contiguous run of months per (district, offense) row, strided across rows
+        window = self.values[:, :, period_slice]
+        window = window[self._selector(districts, self._district_index)]
+        return np.asarray(window[:, self._selector(offenses, self._offense_index)])
+
+    def total(self, district=None, offense=None, start: Optional[str] = None, end: Optional[str] = None) -> float:
+        """Total offences over a selection"""
+        return float(self.select(district, offense, start, end).sum(dtype=np.float64))
+
+    def time_series(self, district=None, offense=None, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, float]:
+        """Monthly totals for a selection, keyed by 'YYYY-MM'"""
+        series = self.select(district, offense, start, end).sum(axis=(0, 1), dtype=np.float64)
+        periods = self.periods[self._period_slice(start, end)]
+        return {period: float(value) for period, value in zip(periods, series)}
+
+    def yearly(self, district=None, offense=None, start: Optional[str] = None, end: Optional[str] = None) -> Dict[int, float]:
+        """Calendar-year rollup for a selection"""
+        series = self.select(district, offense, start, end).sum(axis=(0, 1), dtype=np.float64)
+        years = np.array([int(period[:4]) for period in self.periods[self._period_slice(start, end)]], dtype=np.int32)
+
+        rollup = {}
+        for year in np.unique(years):
+            rollup[int(year)] = float(series[years == year].sum())
+        return rollup
+
+    def by_offense(self, district=None, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, float]:
+        """Offence category totals for a selection"""
+        totals = self.select(district, None, start, end).sum(axis=(0, 2), dtype=np.float64)
+        return {offense: float(value) for offense, value in zip(self.offenses, totals)}
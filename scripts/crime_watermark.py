@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+WA Police Crime Watermarks
+
+Bookkeeping for incremental crime updates. After each run we store, per sheet,
+the last worksheet row ingested, the first row of every period, each
+district's latest period and a checksum of every (district, period) total.
+The next run only re-reads the most recent periods (to prove they haven't been
+revised) plus whatever rows were appended after them.
+
+That only works when rows are grouped by period (period-major), so new months
+land at the end of the sheet. Each sheet's row order is detected from the
+period row spans and recorded; sheets grouped by district get new months
+inserted mid-sheet and are re-read in full instead.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+WATERMARK_VERSION = 2
+
+# Sheet fields carried over between runs (everything except the counts themselves)
+SHEET_FIELDS = [
+    'sheet_name', 'layout', 'date_columns', 'location_columns', 'offense_columns',
+    'columns', 'header', 'period_first_row', 'period_last_row', 'last_row', 'total_rows',
+]
+
+
+def watermark_path(output_path) -> Path:
+    """wa_police_crime_data.json -> wa_police_crime_data.watermark.json"""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.watermark.json")
+
+
+def period_checksum(offense_counts: Dict[str, float]) -> str:
+    """Stable digest of one (district, period) offence breakdown"""
+    payload = json.dumps(sorted((offense, round(float(count), 6)) for offense, count in offense_counts.items()))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def sheet_checksums(district_counts: Dict[str, Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, str]]:
+    """district -> period -> checksum for a sheet's totals"""
+    return {
+        district: {period: period_checksum(offenses) for period, offenses in periods.items()}
+        for district, periods in district_counts.items()
+    }
+
+
+def sheet_row_order(sheet_data: Dict) -> str:
+    """'period' when each period's rows form one block, in period order of first row; else 'district'"""
+    first_rows = sheet_data['period_first_row']
+    last_rows = sheet_data['period_last_row']
+    ordered = sorted(first_rows, key=lambda period: first_rows[period])
+    for previous, period in zip(ordered, ordered[1:]):
+        if last_rows[previous] >= first_rows[period]:
+            return 'district'
+    return 'period'
+
+
+def build_watermark(processed_data: Dict[str, Dict], excel_file) -> Dict:
+    """Watermark describing everything ingested into processed_data"""
+    sheets = {}
+    for sheet_name, sheet_data in processed_data.items():
+        sheet_watermark = {field: sheet_data.get(field) for field in SHEET_FIELDS}
+        sheet_watermark['last_period'] = {
+            district: max(periods) for district, periods in sheet_data['district_counts'].items() if periods
+        }
+        sheet_watermark['checksums'] = sheet_checksums(sheet_data['district_counts'])
+        sheet_watermark['row_order'] = sheet_row_order(sheet_data)
+        sheets[sheet_name] = sheet_watermark
+
+    return {
+        'version': WATERMARK_VERSION,
+        'source_file': Path(excel_file).name,
+        'sheets': sheets,
+    }
+
+
+def load_watermark(path) -> Optional[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermark(watermark: Dict, path) -> Path:
+    path = Path(path)
+    with open(path, 'w') as f:
+        json.dump(watermark, f, indent=2)
+    return path
+
+
+def district_counts_from_output(output_path) -> Dict[str, Dict[str, Dict[str, Dict[str, float]]]]:
+    """Rebuild sheet -> district -> period -> offense totals from a saved crime output file (JSON or NDJSON)"""
+    sheets = {}
+    for district, record in _output_records(output_path):
+        periods = sheets.setdefault(record['data_source'], {}).setdefault(district, {})
+        periods[record['period']] = dict(record['offense_categories'])
+    return sheets
+
+
+def _output_records(output_path):
+    with open(output_path) as f:
+        if Path(output_path).suffix == '.ndjson':
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['police_district'], record
+            return
+
+        output = json.load(f)
+    for district, records in output.get('districts', {}).items():
+        for record in records:
+            yield district, record
+
+
+def verify_periods_for(sheet_watermark: Dict, count: int) -> List[str]:
+    """The `count` most recently started periods, which get re-read and checksummed (none for count <= 0)"""
+    if count <= 0:
+        return []
+    first_rows = sheet_watermark['period_first_row']
+    return sorted(first_rows, key=lambda period: first_rows[period])[-count:]
+
+
+def find_revision(sheet_watermark: Dict, tail: Optional[Dict], verified_periods: List[str]) -> Optional[str]:
+    """Compare a re-read tail against the watermark; returns why a full rebuild is needed, if it is"""
+    if tail is None:
+        return "rows were removed"
+    if tail['header'] != sheet_watermark['header']:
+        return "columns changed"
+    if tail['last_row'] < sheet_watermark['last_row']:
+        return "sheet got shorter"
+    if sheet_row_order(tail) != 'period':
+        return "rows are no longer grouped by period"
+
+    verified = set(verified_periods)
+    for period, first_row in tail['period_first_row'].items():
+        if period in sheet_watermark['period_first_row'] and period not in verified:
+            return f"new rows for already ingested period {period}"
+        if period in verified and first_row != sheet_watermark['period_first_row'][period]:
+            return f"rows for {period} moved"
+
+    old_checksums = sheet_watermark['checksums']
+    new_checksums = sheet_checksums(tail['district_counts'])
+    for district in set(old_checksums) | set(new_checksums):
+        for period in verified_periods:
+            old = old_checksums.get(district, {}).get(period)
+            new = new_checksums.get(district, {}).get(period)
+            if old != new:
+                return f"{district} {period} was revised"
+
+    return None
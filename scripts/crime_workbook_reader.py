@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+WA Police Crime Workbook Reader
+
+Streams the WA Police crime time series workbook sheet by sheet in openpyxl
+read-only mode. Rows come out in typed DataFrame batches and are reduced to
+district x month x offence counts as they arrive, so memory stays flat no
+matter how many monthly releases the workbook accumulates.
+
+Opening the workbook parses its shared-strings table, which costs as much as
+streaming a mid-sized sheet. Every helper therefore takes either a path or a
+workbook from open_workbook(), and callers keep one handle open per process.
+
+Handles both layouts seen in the published workbooks:
+- long:  one row per (period, district, offence) with a Count column
+- wide:  one row per (period, district) with a numeric column per offence
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+DEFAULT_BATCH_SIZE = 5000
+
+SHEET_KEYWORDS = ['data', 'district', 'region', 'metro', 'wa ']
+DATE_TERMS = ['date', 'period', 'year', 'month']
+LOCATION_TERMS = ['district', 'region', 'area', 'location']
+OFFENSE_LABEL_TERMS = ['offence', 'offense', 'hierarchy', 'crime type']
+COUNT_TERMS = ['count', 'number', 'total']
+
+
+def is_relevant_sheet(sheet_name: str) -> bool:
+    """Main data sheets usually contain "Data" or location names"""
+    sheet_lower = sheet_name.lower()
+    return any(keyword in sheet_lower for keyword in SHEET_KEYWORDS)
+
+
+def open_workbook(excel_file) -> Workbook:
+    """Read-only workbook handle to pass to the helpers below; close() it when done"""
+    return load_workbook(excel_file, read_only=True, data_only=True)
+
+
+@contextmanager
+def _workbook(source: Union[str, os.PathLike, Workbook]) -> Iterator[Workbook]:
+    """An already-open workbook as is, or a path opened for the duration of the call"""
+    if isinstance(source, Workbook):
+        yield source
+        return
+    workbook = open_workbook(source)
+    try:
+        yield workbook
+    finally:
+        workbook.close()
+
+
+# Pool workers' workbooks, kept open across tasks (keyed by pid so a forked child never reuses its parent's handle)
+_process_workbooks: Dict[Tuple[int, str], Workbook] = {}
+
+
+def process_workbook(excel_file) -> Workbook:
+    """This process's open handle on excel_file, opened on first use"""
+    key = (os.getpid(), str(excel_file))
+    if key not in _process_workbooks:
+        _process_workbooks[key] = open_workbook(excel_file)
+    return _process_workbooks[key]
+
+
+def list_sheet_names(excel_file) -> List[str]:
+    """Sheet names without parsing any sheet contents"""
+    with _workbook(excel_file) as workbook:
+        return list(workbook.sheetnames)
+
+
+def classify_columns(header: List[str]) -> Dict:
+    """Work out which columns hold dates, locations and offence data"""
+    lowered = [col.lower() for col in header]
+
+    date_cols = [col for col, low in zip(header, lowered) if any(term in low for term in DATE_TERMS)]
+    location_cols = [
+        col for col, low in zip(header, lowered)
+        if col not in date_cols and any(term in low for term in LOCATION_TERMS)
+    ]
+
+    # District beats region when a sheet carries both
+    district_col = next((col for col in location_cols if 'district' in col.lower()), None)
+    if district_col is None:
+        district_col = next((col for col in location_cols if 'region' in col.lower()), None)
+
+    remaining = [col for col in header if col not in date_cols + location_cols]
+    offense_label_col = next(
+        (col for col in remaining
+         if any(term in col.lower() for term in OFFENSE_LABEL_TERMS) and 'order' not in col.lower()),
+        None
+    )
+    count_col = next(
+        (col for col in remaining
+         if col != offense_label_col and any(term in col.lower() for term in COUNT_TERMS)),
+        None
+    )
+
+    if offense_label_col and count_col:
+        layout = 'long'
+        offense_cols = [count_col]
+    else:
+        layout = 'wide'
+        offense_cols = remaining
+
+    return {
+        'layout': layout,
+        'date_columns': date_cols,
+        'location_columns': location_cols,
+        'district_column': district_col,
+        'period_column': date_cols[0] if date_cols else None,
+        'offense_label_column': offense_label_col if layout == 'long' else None,
+        'offense_columns': offense_cols,
+    }
+
+
+def _clean_header(row: Tuple) -> List[str]:
+    """Stringify header cells, naming blanks and de-duplicating repeats like pandas does"""
+    header = []
+    seen = {}
+    for position, value in enumerate(row):
+        name = str(value).strip() if value is not None else ''
+        name = name or f'Unnamed: {position}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def sheet_row_count(excel_file, sheet_name: str) -> Optional[int]:
+    """Row count from the sheet's stored dimensions (None when the file doesn't record it)
+
+    On a shared workbook handle, read this before walking the sheet:
+    iter_sheet_batches resets the dimensions it doesn't trust.
+    """
+    with _workbook(excel_file) as workbook:
+        return workbook[sheet_name].max_row
+
+
+def _batch_frame(batch: List[Tuple], header: List[str], first_row: int) -> pd.DataFrame:
+    return pd.DataFrame.from_records(batch, columns=header, index=range(first_row, first_row + len(batch)))
+
+
+def iter_sheet_batches(
+    excel_file,
+    sheet_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    min_row: Optional[int] = None,
+    max_row: Optional[int] = None
+) -> Iterator[Tuple[List[str], pd.DataFrame]]:
+    """Yield (header, batch) pairs for one sheet, walking it exactly once
+
+    Batches are indexed by 1-based worksheet row number. min_row/max_row restrict
+    the data rows to a worksheet row range so a large sheet can be split across
+    workers. The header is always taken from the first non-empty row of the sheet.
+    """
+    with _workbook(excel_file) as workbook:
+        worksheet = workbook[sheet_name]
+        # Published workbooks don't always carry accurate dimensions
+        worksheet.reset_dimensions()
+
+        rows = worksheet.iter_rows(values_only=True)
+        header = None
+        header_row = 0
+        for header_row, row in enumerate(rows, start=1):
+            if any(value is not None for value in row):
+                header = _clean_header(row)
+                break
+
+        if header is None:
+            return
+
+        row_number = header_row + 1
+        if min_row is not None and min_row > header_row + 1:
+            # Rows before the range are still scanned by the XML parser but never materialized
+            rows = worksheet.iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+            row_number = min_row
+        elif max_row is not None:
+            rows = islice(rows, max(max_row - header_row, 0))
+
+        batch = []
+        for row in rows:
+            batch.append(row[:len(header)] + (None,) * (len(header) - len(row)))
+            if len(batch) >= batch_size:
+                yield header, _batch_frame(batch, header, row_number)
+                row_number += len(batch)
+                batch = []
+
+        if batch:
+            yield header, _batch_frame(batch, header, row_number)
+
+
+def parse_periods(values: pd.Series) -> pd.Series:
+    """Convert a date/period column to 'YYYY-MM' labels ('YYYY' when only a year is given)"""
+    numeric = pd.to_numeric(values, errors='coerce')
+    year_only = numeric.between(1900, 2100) & (numeric == numeric.round())
+
+    parsed = pd.to_datetime(values.where(~year_only), errors='coerce', format='mixed')
+    periods = parsed.dt.strftime('%Y-%m')
+    periods = periods.where(parsed.notna(), None)
+
+    if year_only.any():
+        periods = periods.where(~year_only, numeric[year_only].astype('Int64').astype(str))
+    return periods
+
+
+def batch_periods(batch: pd.DataFrame, columns: Dict) -> pd.Series:
+    """Period label for every row of a batch"""
+    if columns['period_column']:
+        return parse_periods(batch[columns['period_column']])
+    return pd.Series(None, index=batch.index, dtype=object)
+
+
+def extract_batch_counts(batch: pd.DataFrame, columns: Dict, period: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Reduce a batch of raw rows to (district, period, offense, count) sums"""
+    district_col = columns['district_column']
+    if district_col is None or not columns['offense_columns']:
+        return pd.DataFrame(columns=['district', 'period', 'offense', 'count'])
+
+    district = batch[district_col].astype('string').str.strip()
+    if period is None:
+        period = batch_periods(batch, columns)
+
+    if columns['layout'] == 'long':
+        counts = pd.DataFrame({
+            'district': district,
+            'period': period,
+            'offense': batch[columns['offense_label_column']].astype('string').str.strip(),
+            'count': pd.to_numeric(batch[columns['offense_columns'][0]], errors='coerce'),
+        })
+    else:
+        wide = batch[columns['offense_columns']].apply(pd.to_numeric, errors='coerce')
+        wide = wide.assign(district=district, period=period)
+        counts = wide.melt(id_vars=['district', 'period'], var_name='offense', value_name='count')
+
+    counts = counts[
+        counts['district'].notna()
+        & (counts['district'].str.len() > 2)
+        & (counts['district'].str.lower() != 'nan')
+        & counts['offense'].notna()
+        & counts['count'].notna()
+    ]
+    counts = counts.assign(period=counts['period'].fillna('unknown').astype(str))
+
+    return counts.groupby(['district', 'period', 'offense'], sort=False, as_index=False)['count'].sum()
+
+
+def merge_counts(target: Dict, counts: pd.DataFrame) -> Dict:
+    """Fold (district, period, offense, count) rows into nested district -> period -> offense totals"""
+    for district, period, offense, count in counts.itertuples(index=False, name=None):
+        offenses = target.setdefault(district, {}).setdefault(period, {})
+        offenses[offense] = offenses.get(offense, 0.0) + float(count)
+    return target
+
+
+def aggregate_sheet(
+    excel_file,
+    sheet_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    min_row: Optional[int] = None,
+    max_row: Optional[int] = None
+) -> Optional[Dict]:
+    """Stream one sheet (or a row range of it) into per-district monthly offence totals
+
+    Alongside the totals it records the first and last worksheet row of each
+    period and the last row read, which incremental runs use as their watermark.
+    """
+    sheet_data = None
+
+    for header, batch in iter_sheet_batches(excel_file, sheet_name, batch_size, min_row, max_row):
+        if sheet_data is None:
+            columns = classify_columns(header)
+            sheet_data = {
+                'sheet_name': sheet_name,
+                'total_rows': 0,
+                'layout': columns['layout'],
+                'date_columns': columns['date_columns'],
+                'location_columns': columns['location_columns'],
+                'offense_columns': columns['offense_columns'],
+                'columns': columns,
+                'header': header,
+                'district_counts': {},
+                'period_first_row': {},
+                'period_last_row': {},
+                'last_row': 0,
+            }
+
+        periods = batch_periods(batch, columns)
+        sheet_data['total_rows'] += len(batch)
+        sheet_data['last_row'] = int(batch.index[-1])
+        merge_counts(sheet_data['district_counts'], extract_batch_counts(batch, columns, periods))
+
+        # Batches arrive in row order, so the first sighting of a period is its first row
+        labels = periods.fillna('unknown').astype(str)
+        batch_rows = pd.Series(labels.index, index=labels.to_numpy()).groupby(level=0).agg(['min', 'max'])
+        for period, first_row, last_row in batch_rows.itertuples():
+            sheet_data['period_first_row'].setdefault(period, int(first_row))
+            sheet_data['period_last_row'][period] = int(last_row)
+
+    return sheet_data
+
+
+def timed_aggregate_sheet(
+    excel_file: str,
+    sheet_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    min_row: Optional[int] = None,
+    max_row: Optional[int] = None
+) -> Tuple[Optional[Dict], float]:
+    """aggregate_sheet plus its wall time - the unit of work handed to pool workers"""
+    started = time.perf_counter()
+    # Each worker opens the workbook once, however many tasks it runs
+    sheet_data = aggregate_sheet(process_workbook(excel_file), sheet_name, batch_size, min_row, max_row)
+    return sheet_data, time.perf_counter() - started
+
+
+def merge_sheet_parts(parts: List[Optional[Dict]]) -> Optional[Dict]:
+    """Combine row-range results for one sheet, in range order, into a single sheet result"""
+    merged = None
+    for part in parts:
+        if not part:
+            continue
+        if merged is None:
+            merged = {**part, 'district_counts': {}, 'period_first_row': {}, 'period_last_row': {}, 'total_rows': 0, 'last_row': 0}
+
+        merged['total_rows'] += part['total_rows']
+        merged['last_row'] = max(merged['last_row'], part['last_row'])
+        for period, row in part['period_first_row'].items():
+            merged['period_first_row'][period] = min(row, merged['period_first_row'].get(period, row))
+        for period, row in part['period_last_row'].items():
+            merged['period_last_row'][period] = max(row, merged['period_last_row'].get(period, row))
+        for district, periods in part['district_counts'].items():
+            for period, offenses in periods.items():
+                target = merged['district_counts'].setdefault(district, {}).setdefault(period, {})
+                for offense, count in offenses.items():
+                    target[offense] = target.get(offense, 0.0) + count
+    return merged
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Facility Attribution
+
+Assigns facility points (OSM extracts, GTFS stops, hospital layers, or any
+other point file) to the SAL suburb they fall in and writes per-suburb
+counts by category. Inputs are read in fixed-size chunks, and each chunk is
+joined against the saved suburb index (see suburb_index.py) in one batched
+point-in-polygon query. With several chunks the queries run in worker
+processes, each memory-mapping the same index. Memory stays bounded by the
+chunk size and the number of chunks in flight, not by the input size.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from pipeline_metrics import RunReport
+from suburb_index import INDEX_NAME, SuburbIndex
+from suburb_common import FACILITIES_DIR, FACILITY_FILES, PROCESSED_DIR, REPO_ROOT, TRANSPORT_STOPS_FILE
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = PROCESSED_DIR / INDEX_NAME
+SAL_SHAPEFILE = REPO_ROOT / "scripts/data/geographic/SAL_2021_AUST_GDA2020/SAL_2021_AUST_GDA2020.shp"
+COUNTS_FILE = PROCESSED_DIR / "suburb_facility_counts.json"
+HOSPITALS_FILE = 'health/Health_Hospitals_HEALTH_001_WA_GDA2020_Public.gpkg'
+
+CHUNK_SIZE = 200_000
+# Chunks queued per worker; bounds how much input is held in memory at once
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+
+LATITUDE_COLUMNS = ['latitude', 'lat', 'stop_lat', 'y']
+LONGITUDE_COLUMNS = ['longitude', 'lon', 'lng', 'long', 'stop_lon', 'x']
+CATEGORY_FIELD = 'category'
+JSON_SUFFIXES = {'.json'}
+NDJSON_SUFFIXES = {'.ndjson', '.jsonl'}
+CSV_SUFFIXES = {'.csv', '.txt'}
+
+# {category: path}, or (category, path) pairs where a None category means "use each point's own"
+Sources = Union[Dict[str, Path], Sequence[Tuple[Optional[str], Path]]]
+
+
+def default_sources(facilities_dir=FACILITIES_DIR) -> Dict[str, Path]:
+    """The convenience-data point files, keyed like the scoring engine's facility sets"""
+    facilities_dir = Path(facilities_dir)
+    sources = {key: facilities_dir / path for key, path in FACILITY_FILES.items()}
+    sources['transport_stops'] = facilities_dir / TRANSPORT_STOPS_FILE
+    sources['hospitals'] = facilities_dir / HOSPITALS_FILE
+    return sources
+
+
+def _pick_column(columns, candidates: List[str]) -> Optional[str]:
+    lookup = {str(col).strip().lower(): col for col in columns}
+    return next((lookup[name] for name in candidates if name in lookup), None)
+
+
+def _chunk_from_records(records: List[Dict], category: Optional[str], source: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(latitude, longitude, category) arrays for one chunk of JSON records (keys taken from the first record)"""
+    lat_key = _pick_column(records[0], LATITUDE_COLUMNS)
+    lon_key = _pick_column(records[0], LONGITUDE_COLUMNS)
+    if lat_key is None or lon_key is None:
+        raise ValueError(f"No latitude/longitude fields in {source}")
+    latitude = pd.to_numeric(pd.Series([record.get(lat_key) for record in records], dtype=object), errors='coerce')
+    longitude = pd.to_numeric(pd.Series([record.get(lon_key) for record in records], dtype=object), errors='coerce')
+
+    if category is not None:
+        categories = np.full(len(records), category, dtype=object)
+    else:
+        fallback = Path(source).stem
+        categories = np.array([str(record.get(CATEGORY_FIELD) or fallback) for record in records], dtype=object)
+    return latitude.to_numpy(dtype=np.float64), longitude.to_numpy(dtype=np.float64), categories
+
+
+def _chunk_from_frame(frame: pd.DataFrame, category: Optional[str], source: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(latitude, longitude, category) arrays for one chunk of a tabular source"""
+    lat_col = _pick_column(frame.columns, LATITUDE_COLUMNS)
+    lon_col = _pick_column(frame.columns, LONGITUDE_COLUMNS)
+    if lat_col is None or lon_col is None:
+        raise ValueError(f"No latitude/longitude columns in {source}")
+    latitude = pd.to_numeric(frame[lat_col], errors='coerce').to_numpy(dtype=np.float64)
+    longitude = pd.to_numeric(frame[lon_col], errors='coerce').to_numpy(dtype=np.float64)
+
+    if category is not None:
+        categories = np.full(len(frame), category, dtype=object)
+    elif CATEGORY_FIELD in frame.columns:
+        categories = frame[CATEGORY_FIELD].fillna(Path(source).stem).astype(str).to_numpy(dtype=object)
+    else:
+        categories = np.full(len(frame), Path(source).stem, dtype=object)
+    return latitude, longitude, categories
+
+
+def read_point_chunks(path, category: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Stream (latitude, longitude, category) chunks from a point file
+
+    JSON arrays, NDJSON, CSV/GTFS text and any OGR point layer (GeoPackage,
+    shapefile, GeoJSON) are supported. Without an explicit category, each
+    point's 'category' field is used, falling back to the file name.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    source = str(path)
+
+    if suffix in CSV_SUFFIXES:
+        wanted = set(LATITUDE_COLUMNS + LONGITUDE_COLUMNS + [CATEGORY_FIELD])
+        reader = pd.read_csv(path, skipinitialspace=True, chunksize=chunk_size,
+                             usecols=lambda col: col.strip().lower() in wanted)
+        for frame in reader:
+            yield _chunk_from_frame(frame, category, source)
+
+    elif suffix in NDJSON_SUFFIXES:
+        records = []
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+                if len(records) >= chunk_size:
+                    yield _chunk_from_records(records, category, source)
+                    records = []
+        if records:
+            yield _chunk_from_records(records, category, source)
+
+    elif suffix in JSON_SUFFIXES:
+        # ijson walks the array without holding the whole document; otherwise it is parsed in one go
+        with open(path, 'rb') as f:
+            items = ijson.items(f, 'item', use_float=True) if ijson is not None else iter(json.load(f))
+            records = []
+            for record in items:
+                records.append(record)
+                if len(records) >= chunk_size:
+                    yield _chunk_from_records(records, category, source)
+                    records = []
+            if records:
+                yield _chunk_from_records(records, category, source)
+
+    else:
+        columns = [] if category is not None else None
+        start = 0
+        while True:
+            layer = gpd.read_file(path, rows=slice(start, start + chunk_size), columns=columns)
+            if layer.empty:
+                break
+            if layer.crs is not None and layer.crs != 'EPSG:4326':
+                layer = layer.to_crs('EPSG:4326')
+            # Non-point features are attributed by a representative point
+            points = layer.geometry.representative_point()
+            if category is not None:
+                categories = np.full(len(layer), category, dtype=object)
+            elif CATEGORY_FIELD in layer.columns:
+                categories = layer[CATEGORY_FIELD].fillna(path.stem).astype(str).to_numpy(dtype=object)
+            else:
+                categories = np.full(len(layer), path.stem, dtype=object)
+            yield points.y.to_numpy(dtype=np.float64), points.x.to_numpy(dtype=np.float64), categories
+            if len(layer) < chunk_size:
+                break
+            start += chunk_size
+
+
+_worker_index: Optional[SuburbIndex] = None
+
+
+def _init_worker(index_path: str):
+    global _worker_index
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_index = SuburbIndex.load(index_path)
+
+
+def _contains_chunk(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    return _worker_index.contains(latitude, longitude).astype(np.int32)
+
+
+class FacilityAttributor:
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        output_path: Optional[str] = None,
+        sal_shapefile: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+        chunk_size: int = CHUNK_SIZE,
+        trace_memory: bool = False,
+        profile: bool = False
+    ):
+        self.index_path = Path(index_path) if index_path else INDEX_DIR
+        self.output_path = Path(output_path) if output_path else COUNTS_FILE
+        self.sal_shapefile = Path(sal_shapefile) if sal_shapefile else SAL_SHAPEFILE
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.trace_memory = trace_memory
+        self.profile = profile
+
+        self.index: Optional[SuburbIndex] = None
+        # category -> points per suburb position, with one extra slot for points outside every suburb
+        self.counts: Dict[str, np.ndarray] = {}
+        self.sources: List[Dict] = []
+
+    def load_index(self) -> SuburbIndex:
+        """The geographic pipeline's suburb index, built from the SAL shapefile if it hasn't been saved yet"""
+        if not (self.index_path / 'index.json').exists():
+            from process_geographic_data_final_fixed import WASuburbProcessorFinalFixed
+
+            logger.info(f"🗂️ No suburb index at {self.index_path}, building it from {self.sal_shapefile}")
+            processor = WASuburbProcessorFinalFixed(str(self.sal_shapefile.parents[1]))
+            suburbs = processor.extract_wa_suburbs_from_sal(str(self.sal_shapefile))
+            if suburbs.empty:
+                raise ValueError(f"No suburbs read from {self.sal_shapefile}")
+            SuburbIndex.build(suburbs).save(self.index_path)
+
+        self.index = SuburbIndex.load(self.index_path)
+        logger.info(f"📂 Loaded suburb index: {len(self.index)} suburbs")
+        return self.index
+
+    def _chunks(self, sources: Sources) -> Iterator[Tuple[Dict, np.ndarray, np.ndarray, np.ndarray]]:
+        for category, path in (sources.items() if isinstance(sources, dict) else sources):
+            path = Path(path)
+            if not path.exists():
+                logger.warning(f"⚠️ {path} not found, skipping it")
+                continue
+            summary = {'category': category, 'path': str(path), 'points': 0, 'matched': 0}
+            self.sources.append(summary)
+            for latitude, longitude, categories in read_point_chunks(path, category, self.chunk_size):
+                yield summary, latitude, longitude, categories
+
+    def _tally(self, summary: Dict, categories: np.ndarray, positions: np.ndarray):
+        # Unmatched points (-1) land in the extra last slot
+        slots = np.where(positions < 0, len(self.index), positions)
+        codes, labels = pd.factorize(categories)
+        for code, label in enumerate(labels):
+            counts = self.counts.setdefault(label, np.zeros(len(self.index) + 1, dtype=np.int64))
+            counts += np.bincount(slots[codes == code], minlength=len(counts))
+        summary['points'] += len(positions)
+        summary['matched'] += int((positions >= 0).sum())
+
+    def attribute(self, sources: Sources) -> int:
+        """Assign every point in sources to a suburb, accumulating counts; returns the number of points"""
+        if self.index is None:
+            self.load_index()
+        chunks = self._chunks(sources)
+        first = next(chunks, None)
+        if first is None:
+            return 0
+        second = next(chunks, None)
+
+        # A single chunk isn't worth the process start-up
+        if second is None or self.workers <= 1:
+            for summary, latitude, longitude, categories in chain([first], [second] if second else [], chunks):
+                self._tally(summary, categories, self.index.contains(latitude, longitude))
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(str(self.index_path),)) as executor:
+                pending = {}
+                for summary, latitude, longitude, categories in chain([first, second], chunks):
+                    if len(pending) >= self.workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._tally(*pending.pop(future), future.result())
+                    pending[executor.submit(_contains_chunk, latitude, longitude)] = (summary, categories)
+                for future in list(pending):
+                    self._tally(*pending.pop(future), future.result())
+
+        total = sum(summary['points'] for summary in self.sources)
+        for summary in self.sources:
+            logger.info(f"📍 {summary['category'] or Path(summary['path']).name}: {summary['matched']}/{summary['points']} points in a suburb")
+        return total
+
+    def counts_frame(self) -> pd.DataFrame:
+        """Suburbs x categories count table indexed by sal_code"""
+        frame = pd.DataFrame({label: counts[:-1] for label, counts in sorted(self.counts.items())}, dtype=np.int64)
+        frame.index = pd.Index(self.index.codes, name='sal_code')
+        return frame
+
+    def build_output(self) -> Dict:
+        frame = self.counts_frame()
+        return {
+            'generated': datetime.now(timezone.utc).isoformat(),
+            'index': str(self.index_path),
+            'sources': self.sources,
+            'categories': list(frame.columns),
+            'unmatched': {label: int(counts[-1]) for label, counts in sorted(self.counts.items())},
+            'sal_codes': list(frame.index),
+            # One list per category, aligned with sal_codes
+            'counts': {label: frame[label].tolist() for label in frame.columns},
+        }
+
+    def save(self, output: Dict) -> Path:
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(output, f, separators=(',', ':'))
+        temp_path.replace(self.output_path)
+        logger.info(f"💾 Saved facility counts to {self.output_path}")
+        return self.output_path
+
+    def process_all(self, sources: Optional[Sources] = None) -> Optional[Path]:
+        """Attribute sources (default: the convenience-data files) and write per-suburb counts"""
+        logger.info("🚀 Starting facility attribution...")
+        sources = sources or default_sources()
+        report = RunReport(
+            'facility_attribution',
+            trace_memory=self.trace_memory,
+            profile_dir=self.output_path.parent / 'profiles' / 'facility_attribution' if self.profile else None,
+            params={'sources': [[category, str(path)] for category, path in (sources.items() if isinstance(sources, dict) else sources)],
+                    'workers': self.workers, 'chunk_size': self.chunk_size}
+        )
+
+        try:
+            with report.stage('load_index') as stage:
+                stage['rows_out'] = len(self.load_index())
+
+            with report.stage('attribute') as stage:
+                stage['rows_in'] = self.attribute(sources)
+                stage['rows_out'] = sum(summary['matched'] for summary in self.sources)
+
+            with report.stage('save') as stage:
+                output_path = self.save(self.build_output())
+                stage['rows_out'] = len(self.index)
+                stage['bytes_out'] = output_path.stat().st_size
+            report.add_output(output_path)
+
+            logger.info("🎉 ATTRIBUTION COMPLETE!")
+            report.finish('ok')
+            return output_path
+
+        except Exception as e:
+            logger.error(f"❌ Attribution failed: {e}")
+            import traceback
+            traceback.print_exc()
+            report.finish('failed', e)
+            return None
+
+        finally:
+            if report.status == 'running':
+                report.finish('failed')
+            report.write(self.output_path.with_suffix('.run.json'), self.output_path.with_suffix('.runs.ndjson'))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Count facility points per SAL suburb")
+    parser.add_argument('sources', nargs='*', help="[category=]path point files (default: convenience-data)")
+    parser.add_argument('--index', default=str(INDEX_DIR), help="Suburb index directory from the geographic processor")
+    parser.add_argument('--sal-shapefile', default=str(SAL_SHAPEFILE), help="Used to build the index if it's missing")
+    parser.add_argument('--output', default=str(COUNTS_FILE), help="Counts file to write")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Worker processes (1 = in-process)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Points per batch")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks per stage (slower)")
+    parser.add_argument('--profile', action='store_true', help="Save a profile of each stage next to the output")
+    args = parser.parse_args()
+
+    sources = None
+    if args.sources:
+        sources = []
+        for spec in args.sources:
+            category, _, path = spec.rpartition('=')
+            # Without a category prefix, points are grouped by their own 'category' field
+            sources.append((category or None, Path(path)))
+
+    started = time.perf_counter()
+    result = FacilityAttributor(
+        args.index, args.output, args.sal_shapefile,
+        workers=args.workers, chunk_size=args.chunk_size,
+        trace_memory=args.trace_memory, profile=args.profile
+    ).process_all(sources)
+
+    if result:
+        print(f"\n🎉 SUCCESS! Counts saved to {result} in {time.perf_counter() - started:.1f}s")
+    else:
+        print("\n❌ Attribution failed. Check logs above.")
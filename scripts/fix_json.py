@@ -1,27 +1,245 @@
 #!/usr/bin/env python3
 """
-Fix JSON file by replacing NaN values with null
+Fix JSON files by replacing non-finite numbers with null
+
+Streams the file through a small tokenizer, so memory stays bounded by the
+chunk size and nesting depth rather than the file size. Only bare NaN,
+Infinity and -Infinity tokens in value positions are rewritten; the same
+text inside strings (a suburb name, say) is left alone. Works on JSON and
+NDJSON outputs, gzip-compressed or not, and reports every change by path.
 """
-import json
+
+import argparse
+import gzip
+import logging
+import os
 import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+NON_FINITE_TOKENS = ('NaN', 'Infinity', '-Infinity')
+REPLACEMENT = 'null'
+DEFAULT_CHUNK_SIZE = 1 << 16
+DEFAULT_FILES = ['../src/data/wa_suburbs_final.json']
+
+STRING_SPECIAL = re.compile(r'["\\]')
+BARE_TOKEN = re.compile(r'[A-Za-z0-9+\-.]+')
+WHITESPACE = re.compile(r'[ \t\r\n]+')
+
+
+class JsonSanitizer:
+    """Incremental tokenizer that rewrites non-finite number tokens as it copies text
+
+    Feed chunks in order and call finish() at the end. The first `max_changes`
+    changes are recorded as (line, JSON path, original token); counts cover all.
+    """
+
+    def __init__(self, output: TextIO, max_key_length: int = 256, max_changes: int = 1000):
+        self.output = output
+        self.max_key_length = max_key_length
+        self.max_changes = max_changes
+        self.changes: List[Dict] = []
+        self.counts: Dict[str, int] = {token: 0 for token in NON_FINITE_TOKENS}
+
+        self.line = 1
+        self.in_string = False
+        self.escape = False
+        # One frame per open container: ['obj', key, expecting_key] or ['arr', index]
+        self.stack: List[list] = []
+        self._token: List[str] = []
+        self._key: Optional[List[str]] = None
+
+    def _path(self) -> str:
+        parts = ['$']
+        for frame in self.stack:
+            if frame[0] == 'obj':
+                parts.append(f".{frame[1]}" if frame[1] is not None else '')
+            else:
+                parts.append(f"[{frame[1]}]")
+        return ''.join(parts)
+
+    def _flush_token(self, out: List[str]):
+        if not self._token:
+            return
+        token = ''.join(self._token)
+        self._token = []
+        if token in self.counts:
+            self.counts[token] += 1
+            if len(self.changes) < self.max_changes:
+                self.changes.append({'line': self.line, 'path': self._path(), 'token': token})
+            out.append(REPLACEMENT)
+        else:
+            out.append(token)
+
+    @property
+    def total_changes(self) -> int:
+        return sum(self.counts.values())
+
+    def _capture(self, text: str):
+        if self._key is not None and sum(map(len, self._key)) < self.max_key_length:
+            self._key.append(text)
+
+    def feed(self, chunk: str):
+        out: List[str] = []
+        i, n = 0, len(chunk)
+
+        while i < n:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    out.append(chunk[i])
+                    self._capture(chunk[i])
+                    i += 1
+                    continue
+
+                match = STRING_SPECIAL.search(chunk, i)
+                end = match.start() if match else n
+                out.append(chunk[i:end])
+                self._capture(chunk[i:end])
+                if not match:
+                    break
+
+                char = chunk[end]
+                out.append(char)
+                if char == '\\':
+                    self.escape = True
+                    self._capture(char)
+                else:
+                    self.in_string = False
+                    if self._key is not None:
+                        self.stack[-1][1] = ''.join(self._key)[:self.max_key_length]
+                        self._key = None
+                i = end + 1
+                continue
+
+            char = chunk[i]
+            bare = BARE_TOKEN.match(chunk, i)
+            if bare:
+                # A token touching the chunk end may continue in the next chunk
+                self._token.append(bare.group())
+                i = bare.end()
+                if i < n:
+                    self._flush_token(out)
+                continue
+
+            self._flush_token(out)
+            if char in ' \t\r\n':
+                space = WHITESPACE.match(chunk, i)
+                out.append(space.group())
+                self.line += space.group().count('\n')
+                i = space.end()
+                continue
+
+            out.append(char)
+            i += 1
+            if char == '"':
+                self.in_string = True
+                if self.stack and self.stack[-1][0] == 'obj' and self.stack[-1][2]:
+                    self._key = []
+            elif char == '{':
+                self.stack.append(['obj', None, True])
+            elif char == '[':
+                self.stack.append(['arr', 0])
+            elif char in '}]':
+                if not self.stack:
+                    raise ValueError(f"Unbalanced '{char}' on line {self.line}")
+                self.stack.pop()
+            elif char == ',':
+                if self.stack and self.stack[-1][0] == 'obj':
+                    self.stack[-1][2] = True
+                elif self.stack:
+                    self.stack[-1][1] += 1
+            elif char == ':':
+                if self.stack and self.stack[-1][0] == 'obj':
+                    self.stack[-1][2] = False
+            else:
+                raise ValueError(f"Unexpected character {char!r} on line {self.line}")
+
+        self.output.write(''.join(out))
+
+    def finish(self):
+        out: List[str] = []
+        self._flush_token(out)
+        self.output.write(''.join(out))
+        if self.in_string or self.stack:
+            raise ValueError("Truncated JSON: input ended inside a string or container")
+
+
+def _open_text(path: Path, mode: str):
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def sanitize_file(path, output_path=None, chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False) -> JsonSanitizer:
+    """Rewrite non-finite numbers in `path` (in place unless output_path is given)"""
+    path = Path(path)
+    target = Path(output_path) if output_path else path
+
+    # Same suffix as the target so a .gz output is compressed again
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=target.suffix, dir=target.parent)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+
+    try:
+        with _open_text(path, 'r') as src, _open_text(tmp_path, 'w') as dst:
+            sanitizer = JsonSanitizer(dst)
+            for chunk in iter(lambda: src.read(chunk_size), ''):
+                sanitizer.feed(chunk)
+            sanitizer.finish()
+
+        if dry_run or (not sanitizer.total_changes and target == path):
+            tmp_path.unlink()
+        else:
+            if target.exists():
+                shutil.copymode(target, tmp_path)
+            os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return sanitizer
+
+
+def report(path, sanitizer: JsonSanitizer, max_examples: int = 20):
+    total = sanitizer.total_changes
+    if not total:
+        logger.info(f"✅ {path}: no non-finite numbers found")
+        return
+
+    counts = ', '.join(f"{token}: {count}" for token, count in sanitizer.counts.items() if count)
+    logger.info(f"🔧 {path}: replaced {total} non-finite numbers with null ({counts})")
+    for change in sanitizer.changes[:max_examples]:
+        logger.info(f"  line {change['line']}: {change['path']} = {change['token']}")
+    if total > max_examples:
+        logger.info(f"  ... and {total - max_examples} more")
 
-# Read the file
-with open('../src/data/wa_suburbs_final.json', 'r') as f:
-    content = f.read()
 
-# Replace NaN with null for valid JSON
-fixed_content = re.sub(r'\bNaN\b', 'null', content)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replace NaN/Infinity values in generated JSON files with null")
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES, help="JSON, NDJSON or .gz files to fix in place")
+    parser.add_argument('--output', help="Write the fixed copy here instead of in place (single file only)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Characters read per chunk")
+    args = parser.parse_args()
 
-# Parse to verify valid JSON
-try:
-    data = json.loads(fixed_content)
-    print(f"JSON is now valid with {len(data['suburbs'])} suburbs")
-except json.JSONDecodeError as e:
-    print(f"Still invalid JSON: {e}")
-    exit(1)
+    if args.output and len(args.files) != 1:
+        parser.error("--output needs exactly one input file")
 
-# Write back
-with open('../src/data/wa_suburbs_final.json', 'w') as f:
-    json.dump(data, f, indent=2)
+    changed = 0
+    for file in args.files:
+        try:
+            sanitizer = sanitize_file(file, args.output, args.chunk_size, args.dry_run)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ {file}: {e}")
+            sys.exit(1)
+        report(file, sanitizer)
+        changed += sanitizer.total_changes
 
-print("Fixed JSON file successfully")
\ No newline at end of file
+    print(f"{'Would fix' if args.dry_run else 'Fixed'} {changed} values in {len(args.files)} files")
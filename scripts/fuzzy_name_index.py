@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Name Index
+
+Character n-gram inverted index for matching locality names that miss an exact
+lookup (spelling variants, extra qualifiers, truncated names). Candidates are
+ranked by n-gram Jaccard similarity over the whole name, so a near-miss such as
+"PORT HEDLAND (WA)" ranks "PORT HEDLAND" first instead of matching every
+locality that happens to share its first word. Batches of names are scored
+against the postings together, as array operations over (query, name) pairs.
+"""
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from sa2_correspondence_index import normalize_locality_name
+
+# Queries scored together in batch_query
+QUERY_BLOCK_SIZE = 256
+
+
+def name_ngrams(name: str, n: int = 3) -> Set[str]:
+    """Padded character n-grams of a normalized name"""
+    padded = f"{' ' * (n - 1)}{name} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyNameIndex:
+    """Inverted n-gram index with ranked similarity queries"""
+
+    def __init__(self, names: Iterable[str], n: int = 3):
+        self.n = n
+        self.names: List[str] = []
+        postings: Dict[str, List[int]] = {}
+
+        seen = set()
+        gram_counts = []
+        for name in names:
+            key = normalize_locality_name(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+
+            name_id = len(self.names)
+            grams = name_ngrams(key, n)
+            self.names.append(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+
+        # Postings as CSR arrays: names holding gram g are _posting_names[_offsets[g]:_offsets[g + 1]]
+        self._gram_ids: Dict[str, int] = {gram: i for i, gram in enumerate(postings)}
+        self._offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in postings.values()], out=self._offsets[1:])
+        self._posting_names = np.array([name_id for ids in postings.values() for name_id in ids], dtype=np.int64)
+        self._gram_counts = np.array(gram_counts, dtype=np.int64)
+        # Alphabetical rank of each name, for deterministic tie-breaking
+        self._name_ranks = np.argsort(np.argsort(np.array(self.names, dtype=object), kind='stable'), kind='stable')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def query(self, name: str, limit: int = 5, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """Return up to `limit` (name, similarity) candidates, best first"""
+        return self.batch_query([name], limit=limit, min_score=min_score)[name]
+
+    def batch_query(
+        self,
+        names: Iterable[str],
+        limit: int = 5,
+        min_score: float = 0.0
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """Score many names against the index in one pass; duplicate inputs are only scored once"""
+        queries = list(dict.fromkeys(names))
+        results: Dict[str, List[Tuple[str, float]]] = {name: [] for name in queries}
+        # Blocks bound the (query, name) pair arrays, which grow with the postings of common grams
+        for start in range(0, len(queries), QUERY_BLOCK_SIZE):
+            self._score_block(queries[start:start + QUERY_BLOCK_SIZE], results, limit, min_score)
+        return results
+
+    def _score_block(self, queries: List[str], results: Dict[str, List[Tuple[str, float]]], limit: int, min_score: float):
+        # Known grams of every query, flattened alongside the query they belong to
+        query_grams = np.zeros(len(queries), dtype=np.int64)
+        pair_queries, gram_ids = [], []
+        for query_id, name in enumerate(queries):
+            key = normalize_locality_name(name)
+            if not key:
+                continue
+            grams = name_ngrams(key, self.n)
+            query_grams[query_id] = len(grams)
+            known = [self._gram_ids[gram] for gram in grams if gram in self._gram_ids]
+            pair_queries.extend([query_id] * len(known))
+            gram_ids.extend(known)
+        if not gram_ids or not self.names:
+            return
+
+        # Expand every (query, gram) into one (query, name) pair per posting, then count shared grams per pair
+        gram_ids = np.array(gram_ids, dtype=np.int64)
+        starts = self._offsets[gram_ids]
+        lengths = self._offsets[gram_ids + 1] - starts
+        within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pair_names = self._posting_names[np.repeat(starts, lengths) + within]
+        pairs, overlap = np.unique(np.repeat(pair_queries, lengths) * len(self.names) + pair_names, return_counts=True)
+        pair_queries, pair_names = np.divmod(pairs, len(self.names))
+
+        scores = overlap / (query_grams[pair_queries] + self._gram_counts[pair_names] - overlap)
+        keep = scores >= min_score
+        pair_queries, pair_names, scores = pair_queries[keep], pair_names[keep], scores[keep]
+
+        # Best first within each query, ties broken by name; then the first `limit` of each
+        order = np.lexsort((self._name_ranks[pair_names], -scores, pair_queries))
+        ordered_queries = pair_queries[order]
+        rank = np.arange(len(order)) - np.searchsorted(ordered_queries, ordered_queries)
+        for position in order[rank < limit]:
+            results[queries[pair_queries[position]]].append(
+                (self.names[pair_names[position]], round(float(scores[position]), 4))
+            )
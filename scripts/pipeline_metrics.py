@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Metrics
+
+Measurement helpers shared by the benchmark suite and the processors: wall
+and CPU time, peak traced Python/NumPy allocations and process RSS for one
+stage at a time, plus a run report that collects them for a whole pipeline
+run (optionally with a profile per stage).
+"""
+
+import cProfile
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process right now"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / MB
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError):
+        return None
+
+
+def max_rss_mb() -> float:
+    """High-water RSS of this process so far (never goes down)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+
+@contextmanager
+def measure_stage(name: str, results: List[Dict], trace_memory: bool = True):
+    """Time one stage and append its metrics to results
+
+    The yielded dict can be filled in by the caller (e.g. rows_in/rows_out);
+    timings and memory are added when the block exits, even on error.
+    tracemalloc's peak is process-wide and reset here, so traced stages must
+    not overlap: callers run them one at a time.
+    """
+    record: Dict = {'stage': name}
+    started_tracing = False
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+    rss_before = current_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    except BaseException as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record['wall_s'] = round(time.perf_counter() - wall_start, 4)
+        record['cpu_s'] = round(time.process_time() - cpu_start, 4)
+        if trace_memory:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            # Peak allocations made by this stage on top of what was already live
+            record['traced_peak_mb'] = round(max(traced_peak - traced_before, 0) / MB, 2)
+            if started_tracing:
+                tracemalloc.stop()
+        rss_after = current_rss_mb()
+        if rss_after is not None:
+            record['rss_mb'] = round(rss_after, 1)
+            record['rss_delta_mb'] = round(rss_after - rss_before, 1) if rss_before is not None else None
+        record['max_rss_mb'] = round(max_rss_mb(), 1)
+
+        rows = record.get('rows_out', record.get('rows_in'))
+        if rows and record['wall_s'] > 0:
+            record['rows_per_s'] = round(rows / record['wall_s'], 1)
+        results.append(record)
+
+
+@contextmanager
+def profile_stage(name: str, profile_dir: Path, record: Dict):
+    """Profile one stage into profile_dir
+
+    Uses the pyinstrument sampling profiler when it's installed (HTML report),
+    otherwise cProfile (.prof, open with snakeviz or pstats).
+    """
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    if SamplingProfiler is not None:
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path = profile_dir / f"{name}.html"
+            path.write_text(profiler.output_html())
+            record['profile'] = str(path)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = profile_dir / f"{name}.prof"
+            profiler.dump_stats(path)
+            record['profile'] = str(path)
+
+
+class RunReport:
+    """Per-stage metrics for one pipeline run, written as JSON next to its outputs"""
+
+    def __init__(
+        self,
+        pipeline: str,
+        trace_memory: bool = False,
+        profile_dir: Optional[str] = None,
+        params: Optional[Dict] = None
+    ):
+        self.pipeline = pipeline
+        # tracemalloc slows allocation-heavy stages several times over, so it's opt-in
+        self.trace_memory = trace_memory
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.params = params or {}
+        self.stages: List[Dict] = []
+        self.outputs: List[str] = []
+        self.status = 'running'
+        self.error: Optional[str] = None
+        # Stage timeline and critical path when the stages ran as a DAG
+        self.dag: Optional[Dict] = None
+        # Stages may run concurrently in threads, each annotating its own record
+        self._local = threading.local()
+
+        self.started = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure (and optionally profile) one stage; yields its record for rows_in/rows_out etc."""
+        with measure_stage(name, self.stages, self.trace_memory) as record:
+            self._local.current = record
+            try:
+                if self.profile_dir is None:
+                    yield record
+                else:
+                    with profile_stage(name, self.profile_dir, record):
+                        yield record
+            finally:
+                self._local.current = None
+
+        rate = f", {record['rows_per_s']:,.0f} rows/s" if 'rows_per_s' in record else ''
+        logger.info(f"⏱️ Stage '{name}': {record['wall_s']:.2f}s wall, {record['cpu_s']:.2f}s CPU, "
+                    f"max RSS {record['max_rss_mb']:.0f} MB{rate}")
+
+    def annotate(self, **fields):
+        """Add fields to the stage that's currently running in this thread (no-op outside a stage)"""
+        current = getattr(self._local, 'current', None)
+        if current is not None:
+            current.update(fields)
+
+    def add_output(self, path):
+        self.outputs.append(str(path))
+
+    def finish(self, status: str = 'ok', error: Optional[BaseException] = None):
+        self.status = status
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict:
+        timed = [stage for stage in self.stages if 'wall_s' in stage]
+        return {
+            'pipeline': self.pipeline,
+            'status': self.status,
+            'error': self.error,
+            'started': self.started,
+            'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'wall_s': round(time.perf_counter() - self._wall_start, 4),
+            'cpu_s': round(time.process_time() - self._cpu_start, 4),
+            'max_rss_mb': round(max_rss_mb(), 1),
+            'slowest_stage': max(timed, key=lambda stage: stage['wall_s'])['stage'] if timed else None,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'argv': sys.argv,
+            'params': self.params,
+            'trace_memory': self.trace_memory,
+            # Profiled stages run slower than normal, so their timings aren't comparable
+            'profiled': self.profile_dir is not None,
+            'outputs': self.outputs,
+            'stages': self.stages,
+            'dag': self.dag,
+        }
+
+    def write(self, path, history_path=None) -> Path:
+        """Write the full report, and append a one-line summary to history_path if given"""
+        report = self.to_dict()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+        if history_path is not None:
+            summary = {
+                key: report[key] for key in ('pipeline', 'status', 'started', 'wall_s', 'cpu_s', 'max_rss_mb', 'profiled')
+            }
+            summary['stages'] = {
+                stage['stage']: {key: stage[key] for key in ('wall_s', 'rows_in', 'rows_out', 'max_rss_mb') if key in stage}
+                for stage in report['stages']
+            }
+            with open(history_path, 'a') as f:
+                f.write(json.dumps(summary, separators=(',', ':'), default=str) + '\n')
+
+        logger.info(f"📈 Run report saved to {path}")
+        return path
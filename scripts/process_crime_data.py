@@ -8,28 +8,112 @@ import pandas as pd
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from crime_apportionment import SUBURB_ESTIMATES_NAME, estimate_suburb_crime, load_apportionment
+from crime_cube import MONTH_PATTERN, CrimeCube, merge_monthly_sheets
+from crime_watermark import (
+    SHEET_FIELDS,
+    WATERMARK_VERSION,
+    build_watermark,
+    district_counts_from_output,
+    find_revision,
+    load_watermark,
+    save_watermark,
+    verify_periods_for,
+    watermark_path,
+)
+from crime_workbook_reader import (
+    DEFAULT_BATCH_SIZE,
+    aggregate_sheet,
+    classify_columns,
+    is_relevant_sheet,
+    iter_sheet_batches,
+    list_sheet_names,
+    merge_sheet_parts,
+    open_workbook,
+    sheet_row_count,
+    timed_aggregate_sheet,
+)
+from pipeline_metrics import RunReport
+from streaming_writer import COMPRESSIONS, OUTPUT_FORMATS, StreamingRecordWriter
+from suburb_common import PROCESSED_DIR, REPO_ROOT
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Anchored at the repo root so the processor works from any directory
+CRIME_WORKBOOK = REPO_ROOT / "src/data/wa_police_crime_timeseries.xlsx"
+CRIME_OUTPUT_DIR = REPO_ROOT / "src/data"
+
 class WACrimeDataProcessor:
-    def __init__(self, excel_file: str = "../src/data/wa_police_crime_timeseries.xlsx"):
+    def __init__(
+        self,
+        excel_file: str = str(CRIME_WORKBOOK),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int = 1,
+        rows_per_task: Optional[int] = None,
+        incremental: bool = False,
+        verify_periods: int = 12,
+        output_format: str = 'json',
+        compression: Sequence[str] = (),
+        strict: bool = False,
+        trace_memory: bool = False,
+        profile: bool = False,
+        apportionment_dir: str = str(PROCESSED_DIR),
+        output_dir: Optional[str] = None
+    ):
         self.excel_file = Path(excel_file)
-        self.output_dir = Path("../src/data/")
+        self.output_dir = Path(output_dir or CRIME_OUTPUT_DIR)
+        # Suburb x district weights written by the geographic processor
+        self.apportionment_dir = Path(apportionment_dir)
+        self.batch_size = batch_size
+        # workers > 1 spreads sheets (and row ranges of sheets longer than rows_per_task) over a process pool
+        self.workers = workers
+        self.rows_per_task = rows_per_task
+        # Incremental runs re-read the last `verify_periods` periods of each sheet to catch revisions
+        self.incremental = incremental
+        self.verify_periods = verify_periods
+        self.output_format = output_format
+        self.compression = list(compression)
+        # Strict mode refuses to write NaN/Infinity instead of emitting invalid JSON
+        self.strict = strict
+        # Per-stage metrics for process_all; tracemalloc and profiling add overhead so both are opt-in
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.sheet_names: List[str] = []
+        self.sheet_timings: Dict[str, float] = {}
+        # One read-only handle for the whole run; opening the workbook parses its shared strings
+        self.workbook = None
+        self.stored_row_counts: Dict[str, Optional[int]] = {}
 
         if not self.excel_file.exists():
             raise FileNotFoundError(f"Crime data file not found: {excel_file}")
 
+    def open_workbook(self):
+        """The run's workbook handle, opened on first use"""
+        if self.workbook is None:
+            self.workbook = open_workbook(self.excel_file)
+            # Stored dimensions are read before any sheet walk resets them
+            self.stored_row_counts = {name: sheet_row_count(self.workbook, name) for name in self.workbook.sheetnames}
+        return self.workbook
+
+    def close_workbook(self):
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+
     def load_and_explore_excel(self):
         """Load and explore the Excel file structure"""
         logger.info(f"Loading Excel file: {self.excel_file}")
 
-        # Load Excel file and check sheet names
-        excel_file = pd.ExcelFile(self.excel_file)
-        sheet_names = excel_file.sheet_names
+        # Read-only mode only touches the rows we ask for
+        sheet_names = list_sheet_names(self.open_workbook())
+        self.sheet_names = sheet_names
 
         logger.info(f"Found {len(sheet_names)} sheets: {sheet_names}")
 
@@ -37,13 +121,17 @@ class WACrimeDataProcessor:
         sheet_info = {}
         for sheet_name in sheet_names[:5]:  # Check first 5 sheets
             try:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name, nrows=10)
+                batches = iter_sheet_batches(self.workbook, sheet_name, batch_size=10)
+                header, df = next(batches, (None, None))
+                batches.close()
+                if df is None:
+                    continue
                 sheet_info[sheet_name] = {
-                    'shape': df.shape,
-                    'columns': list(df.columns),
+                    'columns': list(header),
+                    'layout': classify_columns(header)['layout'],
                     'sample_data': df.head(3).to_dict('records')
                 }
-                logger.info(f"Sheet '{sheet_name}': {df.shape[0]} rows, {df.shape[1]} columns")
+                logger.info(f"Sheet '{sheet_name}': {len(header)} columns")
             except Exception as e:
                 logger.warning(f"Could not read sheet '{sheet_name}': {e}")
 
@@ -53,25 +141,27 @@ class WACrimeDataProcessor:
         """Process the main crime data sheets"""
         logger.info("Processing WA Police crime time series data...")
 
-        excel_file = pd.ExcelFile(self.excel_file)
+        sheet_names = self.sheet_names or list_sheet_names(self.open_workbook())
         processed_data = {}
 
         # Look for main data sheets (usually contain "Data" or location names)
-        relevant_sheets = []
-        for sheet in excel_file.sheet_names:
-            sheet_lower = sheet.lower()
-            if any(keyword in sheet_lower for keyword in ['data', 'district', 'region', 'metro', 'wa ']):
-                relevant_sheets.append(sheet)
+        relevant_sheets = [sheet for sheet in sheet_names if is_relevant_sheet(sheet)]
+
+        logger.info(f"Processing {len(relevant_sheets)} relevant sheets: {relevant_sheets}")
 
-        logger.info(f"Processing {len(relevant_sheets)} relevant sheets: {relevant_sheets[:10]}")
+        if self.workers > 1:
+            return self.process_sheets_parallel(relevant_sheets)
 
-        for sheet_name in relevant_sheets[:10]:  # Process first 10 relevant sheets
+        for sheet_name in relevant_sheets:
             try:
                 logger.info(f"Processing sheet: {sheet_name}")
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
 
-                # Clean and standardize the data
-                processed_sheet = self.process_sheet_data(df, sheet_name)
+                # Stream every row once, reducing to district/month/offence totals as we go
+                started = time.perf_counter()
+                processed_sheet = self.process_sheet_data(sheet_name)
+                self.sheet_timings[sheet_name] = time.perf_counter() - started
+                logger.info(f"Sheet '{sheet_name}' took {self.sheet_timings[sheet_name]:.2f}s")
+
                 if processed_sheet:
                     processed_data[sheet_name] = processed_sheet
 
@@ -80,81 +170,157 @@ class WACrimeDataProcessor:
 
         return processed_data
 
-    def process_sheet_data(self, df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
-        """Process individual sheet data"""
-        if df.empty:
+    def process_crime_data_incremental(self, output_path: Path) -> Optional[Dict]:
+        """Append rows past the stored watermark to the existing aggregate
+
+        Returns None when there's nothing to build on or history has been
+        revised, in which case the caller falls back to a full rebuild.
+        """
+        watermark = load_watermark(watermark_path(output_path))
+        if not watermark or not output_path.exists():
+            logger.info("No watermark or previous output found, running a full rebuild")
+            return None
+        if watermark.get('version') != WATERMARK_VERSION:
+            logger.info("Watermark is from an older version, running a full rebuild")
             return None
 
-        # Look for common patterns in WA Police data structure
-        # Usually has Date/Period columns and various offense types
+        existing_counts = district_counts_from_output(output_path)
+        sheet_names = self.sheet_names or list_sheet_names(self.open_workbook())
+        relevant_sheets = [sheet for sheet in sheet_names if is_relevant_sheet(sheet)]
+        processed_data = {}
 
-        # Find date/period columns
-        date_cols = [col for col in df.columns if any(term in col.lower() for term in ['date', 'period', 'year', 'month'])]
+        for sheet_name in relevant_sheets:
+            sheet_watermark = watermark['sheets'].get(sheet_name)
+            started = time.perf_counter()
+
+            if sheet_watermark is None:
+                logger.info(f"Sheet '{sheet_name}' is new, processing in full")
+                sheet_data = self.process_sheet_data(sheet_name)
+            elif sheet_watermark['row_order'] != 'period':
+                # New months go inside every district's block, so there is no tail to read
+                logger.info(f"Sheet '{sheet_name}' is grouped by district, re-reading it in full")
+                sheet_data = self.process_sheet_data(sheet_name)
+            else:
+                verified_periods = verify_periods_for(sheet_watermark, self.verify_periods)
+                start_row = min(
+                    (sheet_watermark['period_first_row'][period] for period in verified_periods),
+                    default=sheet_watermark['last_row'] + 1
+                )
+
+                # Re-read the most recent periods plus anything appended after them
+                tail = aggregate_sheet(self.open_workbook(), sheet_name, self.batch_size, min_row=start_row)
+                # With nothing to verify, an empty tail only means no rows were appended
+                reason = None if tail is None and not verified_periods else find_revision(sheet_watermark, tail, verified_periods)
+                if reason:
+                    logger.warning(f"Sheet '{sheet_name}' history changed ({reason}), falling back to full rebuild")
+                    return None
+
+                previous = {
+                    **{field: sheet_watermark[field] for field in SHEET_FIELDS},
+                    'district_counts': existing_counts.get(sheet_name, {}),
+                }
+                if tail is None:
+                    sheet_data = previous
+                    logger.info(f"Sheet '{sheet_name}': 0 new rows")
+                else:
+                    # Verified periods are already in the aggregate, so only keep genuinely new ones
+                    new_periods = [period for period in tail['period_first_row'] if period not in verified_periods]
+                    appended = {
+                        **tail,
+                        'total_rows': tail['last_row'] - sheet_watermark['last_row'],
+                        'period_first_row': {period: tail['period_first_row'][period] for period in new_periods},
+                        'period_last_row': {period: tail['period_last_row'][period] for period in new_periods},
+                        'district_counts': {
+                            district: {period: offenses for period, offenses in periods.items() if period in new_periods}
+                            for district, periods in tail['district_counts'].items()
+                        },
+                    }
+                    sheet_data = merge_sheet_parts([previous, appended])
+                    logger.info(
+                        f"Sheet '{sheet_name}': {appended['total_rows']} new rows, "
+                        f"{len(new_periods)} new periods {new_periods}"
+                    )
 
-        # Find location columns
-        location_cols = [col for col in df.columns if any(term in col.lower() for term in ['district', 'region', 'area', 'location'])]
+            self.sheet_timings[sheet_name] = time.perf_counter() - started
+            if sheet_data:
+                processed_data[sheet_name] = sheet_data
+
+        return processed_data
 
-        # Find offense columns (usually numeric data)
-        offense_cols = []
-        for col in df.columns:
-            if col not in date_cols + location_cols:
+    def plan_sheet_tasks(self, sheet_names: List[str]) -> List[Tuple[str, Optional[int], Optional[int]]]:
+        """Split sheets into (sheet, min_row, max_row) work units for the process pool"""
+        tasks = []
+        for sheet_name in sheet_names:
+            row_count = self.stored_row_counts.get(sheet_name) if self.rows_per_task else None
+
+            if row_count and row_count > self.rows_per_task:
+                starts = list(range(1, row_count + 1, self.rows_per_task))
+                for start in starts[:-1]:
+                    tasks.append((sheet_name, start, start + self.rows_per_task - 1))
+                # The stored count can be short, so the last range runs to the real end of the sheet
+                tasks.append((sheet_name, starts[-1], None))
+            else:
+                tasks.append((sheet_name, None, None))
+        return tasks
+
+    def process_sheets_parallel(self, sheet_names: List[str]) -> Dict[str, Dict]:
+        """Process sheets across a process pool and merge results in sheet/row order"""
+        self.open_workbook()
+        tasks = self.plan_sheet_tasks(sheet_names)
+        logger.info(f"Dispatching {len(tasks)} tasks for {len(sheet_names)} sheets to {self.workers} workers")
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                task: executor.submit(
+                    timed_aggregate_sheet, str(self.excel_file), task[0], self.batch_size, task[1], task[2]
+                )
+                for task in tasks
+            }
+
+            for task, future in futures.items():
                 try:
-                    pd.to_numeric(df[col], errors='coerce')
-                    offense_cols.append(col)
-                except:
-                    continue
+                    results[task] = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing sheet '{task[0]}' rows {task[1]}-{task[2]}: {e}")
+                    results[task] = (None, 0.0)
 
-        logger.info(f"Sheet '{sheet_name}': Date cols: {date_cols}, Location cols: {location_cols}, Offense cols: {len(offense_cols)}")
-
-        # Extract relevant data
-        sheet_data = {
-            'sheet_name': sheet_name,
-            'total_rows': len(df),
-            'date_columns': date_cols,
-            'location_columns': location_cols,
-            'offense_columns': offense_cols[:20],  # Limit to first 20 offense types
-            'sample_records': []
-        }
-
-        # Extract sample records with geographic information
-        if location_cols and offense_cols:
-            sample_df = df.head(10).copy()
-
-            for idx, row in sample_df.iterrows():
-                record = {
-                    'row_index': idx,
-                }
+        # Merge in the original task order so totals don't depend on completion order
+        processed_data = {}
+        for sheet_name in sheet_names:
+            sheet_results = [results[task] for task in tasks if task[0] == sheet_name]
+            self.sheet_timings[sheet_name] = sum(elapsed for _, elapsed in sheet_results)
+
+            sheet_data = merge_sheet_parts([part for part, _ in sheet_results])
+            logger.info(
+                f"Sheet '{sheet_name}' took {self.sheet_timings[sheet_name]:.2f}s "
+                f"of worker time across {len(sheet_results)} task(s)"
+            )
 
-                # Add date information
-                for date_col in date_cols[:2]:
-                    if date_col in row:
-                        record[date_col] = str(row[date_col])
-
-                # Add location information
-                for loc_col in location_cols[:2]:
-                    if loc_col in row:
-                        record[loc_col] = str(row[loc_col])
-
-                # Add offense data (sum for total crimes)
-                offense_total = 0
-                offense_details = {}
-                for offense_col in offense_cols[:10]:
-                    if offense_col in row:
-                        try:
-                            value = pd.to_numeric(row[offense_col], errors='coerce')
-                            if pd.notna(value):
-                                offense_details[offense_col] = float(value)
-                                offense_total += float(value)
-                        except:
-                            pass
-
-                record['total_offenses'] = offense_total
-                record['offense_breakdown'] = offense_details
-
-                sheet_data['sample_records'].append(record)
+            if sheet_data and sheet_data['total_rows']:
+                self.log_sheet_summary(sheet_data)
+                processed_data[sheet_name] = sheet_data
 
+        return processed_data
+
+    def process_sheet_data(self, sheet_name: str) -> Dict[str, Any]:
+        """Process individual sheet data"""
+        sheet_data = aggregate_sheet(self.open_workbook(), sheet_name, self.batch_size)
+        if not sheet_data or not sheet_data['total_rows']:
+            return None
+
+        self.log_sheet_summary(sheet_data)
         return sheet_data
 
+    def log_sheet_summary(self, sheet_data: Dict):
+        """Log what was found in a processed sheet"""
+        sheet_name = sheet_data['sheet_name']
+        logger.info(
+            f"Sheet '{sheet_name}' ({sheet_data['layout']}): {sheet_data['total_rows']} rows, "
+            f"Date cols: {sheet_data['date_columns']}, Location cols: {sheet_data['location_columns']}, "
+            f"Offense cols: {len(sheet_data['offense_columns'])}, Districts: {len(sheet_data['district_counts'])}"
+        )
+
     def extract_district_level_data(self, processed_data: Dict) -> Dict[str, List[Dict]]:
         """Extract and aggregate data by police district"""
         logger.info("Extracting district-level crime data...")
@@ -162,79 +328,71 @@ class WACrimeDataProcessor:
         district_data = {}
 
         for sheet_name, sheet_data in processed_data.items():
-            if not sheet_data or not sheet_data['sample_records']:
+            if not sheet_data or not sheet_data['district_counts']:
                 continue
 
-            for record in sheet_data['sample_records']:
-                # Look for district information
-                district = None
-                for key, value in record.items():
-                    if 'district' in key.lower() and isinstance(value, str):
-                        district = value.strip()
-                        break
-
-                if district and district != 'nan' and len(district) > 2:
-                    if district not in district_data:
-                        district_data[district] = []
-
-                    # Create standardized record
+            for district, periods in sheet_data['district_counts'].items():
+                for period, offense_categories in sorted(periods.items()):
+                    # Create standardized record (one per district and period)
                     crime_record = {
                         'police_district': district,
                         'data_source': sheet_name,
-                        'total_offenses': record.get('total_offenses', 0),
-                        'year': self.extract_year_from_record(record),
-                        'offense_categories': record.get('offense_breakdown', {}),
-                        'raw_record': record
+                        'period': period,
+                        'total_offenses': sum(offense_categories.values()),
+                        'year': int(period[:4]) if period[:4].isdigit() else None,
+                        'offense_categories': offense_categories
                     }
 
-                    district_data[district].append(crime_record)
+                    district_data.setdefault(district, []).append(crime_record)
 
         return district_data
 
-    def extract_year_from_record(self, record: Dict) -> int:
-        """Extract year from record data"""
-        for key, value in record.items():
-            if 'date' in key.lower() or 'period' in key.lower() or 'year' in key.lower():
-                try:
-                    # Try to extract year from various formats
-                    value_str = str(value)
-                    if '2023' in value_str:
-                        return 2023
-                    elif '2024' in value_str:
-                        return 2024
-                    elif '2022' in value_str:
-                        return 2022
-                    elif len(value_str) == 4 and value_str.isdigit():
-                        year = int(value_str)
-                        if 2020 <= year <= 2024:
-                            return year
-                except:
-                    pass
-        return 2023  # Default to 2023
+    def build_crime_cube(self, processed_data: Dict) -> Optional[CrimeCube]:
+        """Build the district x offense x month cube from the full monthly time series"""
+        monthly_sheets = [
+            sheet_data for sheet_data in processed_data.values()
+            if sheet_data and any(
+                MONTH_PATTERN.match(period)
+                for periods in sheet_data['district_counts'].values()
+                for period in periods
+            )
+        ]
+        if not monthly_sheets:
+            logger.warning("No month-level periods found, skipping crime cube")
+            return None
+
+        # The sheet with the most rows wins district-months that several sheets carry
+        monthly_sheets.sort(key=lambda sheet_data: sheet_data['total_rows'], reverse=True)
+        district_counts = merge_monthly_sheets([sheet_data['district_counts'] for sheet_data in monthly_sheets])
+        source = ', '.join(sheet_data['sheet_name'] for sheet_data in monthly_sheets)
+        cube = CrimeCube.from_district_counts(district_counts, source=source)
+
+        logger.info(
+            f"Built crime cube from '{cube.source}': {len(cube.districts)} districts x "
+            f"{len(cube.offenses)} offenses x {len(cube.periods)} months"
+        )
+        return cube
 
     def save_processed_data(self, district_data: Dict[str, List[Dict]], filename: str = 'wa_police_crime_data.json'):
-        """Save processed crime data"""
+        """Stream processed crime data out district by district"""
         output_path = self.output_dir / filename
 
-        # Create summary structure
-        summary = {
-            'metadata': {
+        data_years = set()
+        with StreamingRecordWriter(output_path, 'districts', self.output_format, compression=self.compression, strict=self.strict) as writer:
+            for district, records in district_data.items():
+                for record in records:
+                    writer.write(record, group=district)
+                    if record['year'] is not None:
+                        data_years.add(record['year'])
+
+            writer.metadata = {
                 'source': 'WA Police Force Crime Time Series Data',
                 'processing_date': '2025-09-16T00:00:00.000Z',
                 'total_districts': len(district_data),
                 'districts': list(district_data.keys()),
-                'data_years': list(set([
-                    record['year']
-                    for records in district_data.values()
-                    for record in records
-                ])),
+                'data_years': sorted(data_years),
                 'note': 'Processed from official WA Police Excel time series data'
-            },
-            'districts': district_data
-        }
-
-        with open(output_path, 'w') as f:
-            json.dump(summary, f, indent=2)
+            }
 
         logger.info(f"Saved processed crime data to {output_path}")
         logger.info(f"Districts found: {len(district_data)}")
@@ -247,42 +405,138 @@ class WACrimeDataProcessor:
         """Main processing pipeline"""
         logger.info("Starting WA Police crime data processing...")
 
+        report = RunReport(
+            'crime',
+            trace_memory=self.trace_memory,
+            profile_dir=self.output_dir / 'profiles' / 'crime' if self.profile else None,
+            params={
+                'excel_file': str(self.excel_file),
+                'workers': self.workers,
+                'rows_per_task': self.rows_per_task,
+                'batch_size': self.batch_size,
+                'incremental': self.incremental,
+                'output_format': self.output_format,
+                'compression': self.compression,
+                'strict': self.strict,
+            }
+        )
+        output_path = self.output_dir / f'wa_police_crime_data.{self.output_format}'
+
         try:
             # 1. Explore file structure
-            sheet_info = self.load_and_explore_excel()
-
-            # 2. Process relevant crime data
-            processed_data = self.process_crime_data()
+            with report.stage('explore') as stage:
+                sheet_info = self.load_and_explore_excel()
+                stage['sheet_count'] = len(self.sheet_names)
+                stage['bytes_in'] = self.excel_file.stat().st_size
+
+            # 2. Process relevant crime data (only rows past the watermark when incremental)
+            processed_data = None
+            if self.incremental:
+                with report.stage('parse_incremental') as stage:
+                    processed_data = self.process_crime_data_incremental(output_path)
+                    stage['fell_back'] = processed_data is None
+                    if processed_data is not None:
+                        stage['rows_in'] = sum(sheet['total_rows'] for sheet in processed_data.values())
+            if processed_data is None:
+                with report.stage('parse') as stage:
+                    processed_data = self.process_crime_data()
+                    stage['rows_in'] = sum(sheet['total_rows'] for sheet in processed_data.values())
+                    stage['sheets'] = {name: round(seconds, 3) for name, seconds in self.sheet_timings.items()}
 
             if not processed_data:
                 logger.error("No data was successfully processed")
                 return None
 
             # 3. Extract district-level data
-            district_data = self.extract_district_level_data(processed_data)
+            with report.stage('record_build') as stage:
+                district_data = self.extract_district_level_data(processed_data)
+                stage['rows_out'] = sum(len(records) for records in district_data.values())
 
             if not district_data:
                 logger.error("No district-level data could be extracted")
                 return None
 
-            # 4. Save processed data
-            output_path = self.save_processed_data(district_data)
-
-            # 5. Final summary
+            # 4. Save processed data and the watermark for the next incremental run
+            with report.stage('save') as stage:
+                output_path = self.save_processed_data(district_data, output_path.name)
+                save_watermark(build_watermark(processed_data, self.excel_file), watermark_path(output_path))
+                stage['rows_out'] = sum(len(records) for records in district_data.values())
+                stage['bytes_out'] = output_path.stat().st_size
+            report.add_output(output_path)
+
+            # 5. Save the memory-mapped district x offense x month cube
+            with report.stage('cube') as stage:
+                cube = self.build_crime_cube(processed_data)
+                if cube is not None:
+                    cube_path = cube.save(self.output_dir)
+                    stage['rows_out'] = int(cube.values.size)
+                    report.add_output(cube_path)
+                    logger.info(f"Saved crime cube to {cube_path}")
+
+            # 6. Per-suburb estimates for the whole series: one sparse product with the apportionment weights
+            matrix = load_apportionment(self.apportionment_dir) if cube is not None else None
+            if matrix is not None:
+                with report.stage('suburb_estimates') as stage:
+                    estimates = estimate_suburb_crime(cube, matrix)
+                    estimates_path = estimates.save(self.output_dir, SUBURB_ESTIMATES_NAME)
+                    stage['rows_out'] = len(estimates.districts)
+                    stage['nnz'] = matrix.nnz
+                    stage['bytes_out'] = estimates_path.stat().st_size
+                report.add_output(estimates_path)
+                logger.info(f"Saved suburb crime estimates to {estimates_path}")
+            elif cube is not None:
+                logger.info(f"No apportionment weights in {self.apportionment_dir}, skipping suburb estimates")
+
+            # 7. Final summary
             logger.info("Crime data processing complete!")
             logger.info(f"Processed {len(district_data)} police districts")
             logger.info(f"Output saved to: {output_path}")
 
+            report.finish('ok')
             return output_path
 
         except Exception as e:
             logger.error(f"Critical error in crime data processing: {e}")
             import traceback
             traceback.print_exc()
+            report.finish('failed', e)
             return None
 
+        finally:
+            self.close_workbook()
+            if report.status == 'running':
+                report.finish('failed')
+            stem = output_path.with_suffix('')
+            report.write(stem.with_suffix('.run.json'), stem.with_suffix('.runs.ndjson'))
+
 if __name__ == "__main__":
-    processor = WACrimeDataProcessor()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process the WA Police crime time series workbook")
+    parser.add_argument('--workers', type=int, default=1, help="Process pool size (1 = serial)")
+    parser.add_argument('--rows-per-task', type=int, default=None, help="Split sheets longer than this across workers")
+    parser.add_argument('--incremental', action='store_true', help="Only ingest rows past the stored watermark")
+    parser.add_argument('--verify-periods', type=int, default=12, help="Recent periods re-read to detect revisions")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json', help="Crime output format")
+    parser.add_argument('--compress', choices=COMPRESSIONS, action='append', default=[], help="Also write pre-compressed copies")
+    parser.add_argument('--strict', action='store_true', help="Fail instead of writing NaN/Infinity values")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks per stage (slower)")
+    parser.add_argument('--profile', action='store_true', help="Save a profile of each stage next to the outputs")
+    parser.add_argument('--apportionment', default=str(PROCESSED_DIR), help="Directory with the suburb x district weights")
+    args = parser.parse_args()
+
+    processor = WACrimeDataProcessor(
+        workers=args.workers,
+        rows_per_task=args.rows_per_task,
+        incremental=args.incremental,
+        verify_periods=args.verify_periods,
+        output_format=args.format,
+        compression=args.compress,
+        strict=args.strict,
+        trace_memory=args.trace_memory,
+        profile=args.profile,
+        apportionment_dir=args.apportionment
+    )
     result = processor.process_all()
 
     if result:
@@ -9,64 +9,201 @@ FIXES:
 """
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import json
+import multiprocessing
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import logging
 
+import area_overlay
+import sal_reader
+from area_overlay import EQUAL_AREA_CRS, area_weighted_overlay, majority_assignment
+from crime_apportionment import APPORTIONMENT_NAME, build_apportionment
+from fuzzy_name_index import FuzzyNameIndex
+from pipeline_metrics import RunReport, max_rss_mb
+from sal_reader import find_column, read_sal_localities, read_sal_localities_by_state, resolve_state_name
+from sharded_records import SHARD_KEYS, ShardedRecordWriter, shard_directory
+from stage_cache import StageCache, code_digest
+from stage_dag import DEFAULT_MAX_WORKERS, StageGraph
+from streaming_writer import COMPRESSIONS, OUTPUT_FORMATS, StreamingRecordWriter
+from suburb_common import PROCESSED_DIR, REPO_ROOT
+from suburb_index import INDEX_NAME, SuburbIndex
+from sa2_correspondence_index import (
+    SA2CorrespondenceIndex,
+    STATE_ABBREVIATIONS,
+    STATE_CODES,
+    normalize_locality_name,
+    strip_locality_suffix,
+)
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Minimum n-gram similarity for a fuzzy SA2 name match to be accepted
+FUZZY_MATCH_THRESHOLD = 0.5
+
+# ASGS edition the app currently ships
+DEFAULT_CENSUS_YEAR = 2021
+# ABS/police inputs, anchored at the repo root so the processor works from any directory
+GEOGRAPHIC_DATA_DIR = REPO_ROOT / "scripts/data/geographic"
+
+
+def column_attributes(frame: pd.DataFrame) -> Dict:
+    """Column-name attributes (_sa2_col etc.) the correspondence loader hangs off a frame"""
+    return {
+        name: value for name, value in vars(frame).items()
+        if name.startswith('_') and name.endswith('_col')
+    }
+
+
+def _keyword_pattern(terms: List[str]) -> re.Pattern:
+    """Compile substring keywords into one alternation regex"""
+    return re.compile('|'.join(re.escape(term) for term in terms))
+
+
+# Name keyword rules for suburb classification and economic base
+CLASSIFICATION_MINING_PATTERN = _keyword_pattern(['mine', 'mines', 'mining', 'goldfield'])
+CLASSIFICATION_COASTAL_PATTERN = _keyword_pattern(['beach', 'bay', 'island', 'harbour'])
+ECONOMIC_MINING_PATTERN = _keyword_pattern(['mine', 'mining', 'gold', 'iron'])
+ECONOMIC_PORT_PATTERN = _keyword_pattern(['port', 'harbour'])
+ECONOMIC_TOURISM_PATTERN = _keyword_pattern(['beach', 'bay', 'island'])
+
 class WASuburbProcessorFinalFixed:
-    def __init__(self, data_dir: str = "./data/geographic"):
+    def __init__(
+        self,
+        data_dir: str = str(GEOGRAPHIC_DATA_DIR),
+        state_name: str = 'Western Australia',
+        use_cache: bool = True,
+        cache_dir: Optional[str] = None,
+        output_format: str = 'json',
+        compression: Sequence[str] = (),
+        strict: bool = False,
+        trace_memory: bool = False,
+        profile: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        low_memory: bool = False,
+        census_year: int = DEFAULT_CENSUS_YEAR,
+        output_dir: Optional[str] = None,
+        shard_by: Optional[str] = None
+    ):
         self.data_dir = Path(data_dir)
+        self.state_name = state_name
+        self.state_code = STATE_ABBREVIATIONS.get(state_name, state_name)
+        # ASGS edition: picks the SAL_<year> shapefile and the correspondence columns for that year
+        self.census_year = int(census_year)
+
+        # Loaded/projected/joined layers are cached by input hash so reruns skip the geospatial work
+        self.stage_cache = StageCache(cache_dir or self.data_dir / ".stage_cache", enabled=use_cache)
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         # Output directory for processed data
-        self.output_dir = Path("./src/data/processed")
+        self.output_dir = Path(output_dir or PROCESSED_DIR)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-
-    def extract_wa_suburbs_from_sal(self, sal_shapefile_path: str) -> gpd.GeoDataFrame:
+        # 'json' keeps the single document the app imports; 'ndjson' puts metadata in a sidecar
+        self.output_format = output_format
+        self.compression = list(compression)
+        # Strict mode refuses to write NaN/Infinity instead of emitting invalid JSON
+        self.strict = strict
+        # Also write NDJSON shards with a sal_code -> byte offset index for single-suburb reads
+        self.shard_by = shard_by
+        # Per-stage metrics for process_all; tracemalloc and profiling add overhead so both are opt-in
+        self.trace_memory = trace_memory
+        self.profile = profile
+        # Threads for independent process_all stages (1 runs them one at a time)
+        self.max_workers = max_workers
+        # Low-memory mode: only the needed columns, compact dtypes, one projection, stages one at a time
+        self.low_memory = low_memory
+        self.run_report: Optional[RunReport] = None
+
+    def output_name(self, name: str) -> str:
+        """Per-state variant of a WA output name ('wa_suburbs_final.json' -> 'nsw_suburbs_final.json')"""
+        return self.state_code.lower() + name[len('wa'):]
+
+    def sal_shapefile_path(self) -> Path:
+        year = self.census_year
+        return self.data_dir / f"SAL_{year}_AUST_GDA2020" / f"SAL_{year}_AUST_GDA2020.shp"
+
+    def police_shapefile_path(self) -> Path:
+        return self.data_dir / f"{self.state_code}_Police_District_Boundaries" / "Police_Districts.shp"
+
+    def extract_wa_suburbs_from_sal(self, sal_shapefile_path: str, localities: Optional[gpd.GeoDataFrame] = None) -> gpd.GeoDataFrame:
         """Extract Western Australia suburbs from ABS SAL shapefile with proper CRS handling"""
-        logger.info("🏗️ Loading ABS SAL shapefile...")
+        wa_suburbs = self.read_sal_suburbs(sal_shapefile_path, localities)
+        if wa_suburbs.empty:
+            return wa_suburbs
 
-        sal_gdf = gpd.read_file(sal_shapefile_path)
+        wa_suburbs = self.project_suburbs(wa_suburbs)
+        logger.info("✅ Successfully processed WA suburbs")
+        return wa_suburbs
 
-        logger.info(f"📊 Total features loaded: {len(sal_gdf)}")
-        logger.info(f"🗺️ Current CRS: {sal_gdf.crs}")
+    def read_sal_suburbs(self, sal_shapefile_path: str, localities: Optional[gpd.GeoDataFrame] = None) -> gpd.GeoDataFrame:
+        """Read the state's SAL localities and standardize code/name/state columns
+
+        Batch runs pass the state's rows of an already-read national file as `localities`.
+        """
+        if localities is not None:
+            wa_suburbs = localities
+        else:
+            logger.info("🏗️ Loading ABS SAL shapefile...")
+            # Only the target state's localities (and only the columns we use) are read
+            wa_suburbs = read_sal_localities(sal_shapefile_path, state=self.state_name)
+
+        logger.info(f"🗺️ Current CRS: {wa_suburbs.crs}")
 
         # Find the correct column names
         sal_code_col = None
         sal_name_col = None
-        state_col = None
 
-        for col in sal_gdf.columns:
+        for col in wa_suburbs.columns:
             col_upper = col.upper()
             if 'SAL_CODE' in col_upper:
                 sal_code_col = col
             elif 'SAL_NAME' in col_upper:
                 sal_name_col = col
-            elif 'STE_NAME' in col_upper:
-                state_col = col
 
         if not sal_code_col or not sal_name_col:
             logger.error(f"❌ Could not find required SAL columns")
             return gpd.GeoDataFrame()
 
-        # Filter for Western Australia
-        wa_suburbs = sal_gdf[sal_gdf[state_col] == 'Western Australia'].copy()
-        logger.info(f"🏘️ Found {len(wa_suburbs)} WA suburbs")
+        logger.info(f"🏘️ Found {len(wa_suburbs)} {self.state_code} suburbs")
 
         # Clean and standardize
         wa_suburbs['sal_code'] = wa_suburbs[sal_code_col].astype(str)
         wa_suburbs['sal_name'] = wa_suburbs[sal_name_col].astype(str)
-        wa_suburbs['state'] = 'WA'
+        wa_suburbs['state'] = self.state_code
 
+        if self.low_memory:
+            # Drop the raw ABS columns instead of carrying them through every copy
+            compact = wa_suburbs[['sal_code', 'sal_name', 'geometry']].copy()
+            compact['state'] = pd.Categorical([self.state_code] * len(compact))
+            area_col = find_column(wa_suburbs.columns, 'AREASQKM')
+            if area_col:
+                compact['abs_area_km2'] = wa_suburbs[area_col].astype(float)
+            return compact
+
+        return wa_suburbs
+
+    def project_suburbs(self, wa_suburbs: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Add WGS84 centroid coordinates and equal-area km² to the suburb layer"""
         # Proper CRS handling
         logger.info("📐 Calculating coordinates with proper CRS transformation...")
+        if self.low_memory:
+            # Project once and keep the equal-area geometry; the police overlay then needs no reprojection
+            wa_suburbs = wa_suburbs.to_crs(EQUAL_AREA_CRS)
+            centroids_wgs84 = wa_suburbs.geometry.centroid.to_crs('EPSG:4326')
+            wa_suburbs['latitude'] = centroids_wgs84.y
+            wa_suburbs['longitude'] = centroids_wgs84.x
+            del centroids_wgs84
+            wa_suburbs['area_km2'] = wa_suburbs.geometry.area / 1_000_000
+            return wa_suburbs
+
         wa_suburbs_projected = wa_suburbs.to_crs('EPSG:3577')
         centroids_wgs84 = wa_suburbs_projected.geometry.centroid.to_crs('EPSG:4326')
 
@@ -74,10 +211,11 @@ class WASuburbProcessorFinalFixed:
         wa_suburbs['longitude'] = centroids_wgs84.x
         wa_suburbs['area_km2'] = wa_suburbs_projected.geometry.area / 1_000_000
 
-        if 'AREASQKM21' in wa_suburbs.columns:
-            wa_suburbs['abs_area_km2'] = wa_suburbs['AREASQKM21'].astype(float)
+        # AREASQKM21 in the 2021 edition; the suffix follows the census year
+        area_col = find_column(wa_suburbs.columns, 'AREASQKM')
+        if area_col:
+            wa_suburbs['abs_area_km2'] = wa_suburbs[area_col].astype(float)
 
-        logger.info("✅ Successfully processed WA suburbs")
         return wa_suburbs
 
     def load_locality_sa2_correspondence(self, correspondence_file: str) -> pd.DataFrame:
@@ -94,17 +232,25 @@ class WASuburbProcessorFinalFixed:
 
             # Find columns
             locality_col = locality_name_col = sa2_col = sa2_name_col = None
+            ratio_col = quality_col = overall_quality_col = None
 
+            year = str(self.census_year)
             for col in df.columns:
                 col_upper = col.upper()
-                if 'LOCALITY_PID' in col_upper and '2021' in col_upper:
+                if 'LOCALITY_PID' in col_upper and year in col_upper:
                     locality_col = col
-                elif 'LOCALITY_NAME' in col_upper and '2021' in col_upper:
+                elif 'LOCALITY_NAME' in col_upper and year in col_upper:
                     locality_name_col = col
-                elif 'SA2_CODE' in col_upper and '2021' in col_upper:
+                elif 'SA2_CODE' in col_upper and year in col_upper:
                     sa2_col = col
-                elif 'SA2_NAME' in col_upper and '2021' in col_upper:
+                elif 'SA2_NAME' in col_upper and year in col_upper:
                     sa2_name_col = col
+                elif 'RATIO' in col_upper:
+                    ratio_col = col
+                elif 'OVERALL_QUALITY' in col_upper:
+                    overall_quality_col = col
+                elif 'QLTY_INDICATOR' in col_upper or 'QUALITY_INDICATOR' in col_upper:
+                    quality_col = col
 
             if not locality_name_col or not sa2_col:
                 logger.error("❌ Missing required columns")
@@ -117,6 +263,9 @@ class WASuburbProcessorFinalFixed:
             df._locality_name_col = locality_name_col
             df._sa2_col = sa2_col
             df._sa2_name_col = sa2_name_col
+            df._ratio_col = ratio_col
+            df._quality_col = quality_col
+            df._overall_quality_col = overall_quality_col
 
             return df
 
@@ -128,7 +277,15 @@ class WASuburbProcessorFinalFixed:
         """Load WA Police districts"""
         logger.info("🚔 Loading police districts...")
 
-        police_gdf = gpd.read_file(police_shapefile_path)
+        read_kwargs = {}
+        if self.low_memory:
+            # Only the district name column, found from a single attribute-only row
+            header = gpd.read_file(police_shapefile_path, rows=1, ignore_geometry=True).columns
+            district_columns = [col for col in header if 'DISTRICT' in col.upper()][:1]
+            if district_columns:
+                read_kwargs['columns'] = district_columns
+
+        police_gdf = gpd.read_file(police_shapefile_path, **read_kwargs)
         logger.info(f"📊 Found {len(police_gdf)} police districts")
 
         # Find district column
@@ -153,58 +310,25 @@ class WASuburbProcessorFinalFixed:
         suburbs_gdf: gpd.GeoDataFrame,
         police_gdf: gpd.GeoDataFrame
     ) -> gpd.GeoDataFrame:
-        """FIXED: Spatial intersection with proper error handling"""
+        """Area-weighted suburb -> police district overlay (majority district wins)"""
         logger.info("🗺️ Performing spatial intersection...")
 
-        # Convert to common CRS
-        target_crs = 'EPSG:3577'
-        suburbs_proj = suburbs_gdf.to_crs(target_crs)
-        police_proj = police_gdf.to_crs(target_crs)
-
         try:
-            # Initial spatial join
-            logger.info("🎯 Attempting 'within' spatial join...")
-            result = gpd.sjoin(
-                suburbs_proj,
-                police_proj[['geometry', 'police_district']],
-                how='left',
-                predicate='within'
-            )
-
-            within_count = result['police_district'].notna().sum()
-            logger.info(f"✅ Within join: {within_count}/{len(suburbs_proj)} suburbs")
-
-            # FIXED: Retry logic with proper boolean handling
-            unmapped_mask = result['police_district'].isna()
-            unmapped_count = unmapped_mask.sum()
-
-            if unmapped_count > 0:
-                logger.info(f"🔄 Retrying {unmapped_count} suburbs with intersects...")
+            # Every (suburb, district) overlap with its share of the suburb's area
+            pairs = area_weighted_overlay(suburbs_gdf, police_gdf, 'police_district')
+            logger.info(f"🎯 {len(pairs)} suburb/district overlaps across {pairs['left_pos'].nunique()} suburbs")
 
-                # Get unmapped suburbs
-                unmapped_indices = unmapped_mask[unmapped_mask].index
-                unmapped_suburbs = suburbs_proj.loc[unmapped_indices].copy()
+            districts, best_share, share_maps = majority_assignment(pairs, len(suburbs_gdf))
 
-                # Intersects join for unmapped suburbs
-                intersects_result = gpd.sjoin(
-                    unmapped_suburbs,
-                    police_proj[['geometry', 'police_district']],
-                    how='left',
-                    predicate='intersects'
-                )
-
-                # Update results - FIXED: Proper indexing
-                for idx in intersects_result.index:
-                    if pd.notna(intersects_result.loc[idx, 'police_district']):
-                        result.loc[idx, 'police_district'] = intersects_result.loc[idx, 'police_district']
-
-            # Calculate confidence
-            result['police_mapping_confidence'] = result['police_district'].notna().astype(float)
-
-            # Convert back to original CRS
-            result = result.to_crs(suburbs_gdf.crs)
+            # Low-memory runs are serial and nothing else reads the loaded layer afterwards
+            result = suburbs_gdf if self.low_memory else suburbs_gdf.copy()
+            result['police_district'] = districts
+            result['police_mapping_confidence'] = best_share
+            result['police_district_shares'] = share_maps
 
+            split_count = int((pairs.groupby('left_pos').size() > 1).sum())
             final_count = result['police_district'].notna().sum()
+            logger.info(f"🔀 {split_count} suburbs straddle more than one district")
             logger.info(f"🎉 Final police mapping: {final_count}/{len(result)} ({final_count/len(result)*100:.1f}%)")
 
             return result
@@ -214,6 +338,7 @@ class WASuburbProcessorFinalFixed:
             # Fallback: return original with empty police districts
             suburbs_gdf['police_district'] = ''
             suburbs_gdf['police_mapping_confidence'] = 0.0
+            suburbs_gdf['police_district_shares'] = [{} for _ in range(len(suburbs_gdf))]
             return suburbs_gdf
 
     def create_enhanced_suburb_records(
@@ -222,84 +347,123 @@ class WASuburbProcessorFinalFixed:
         correspondence_df: pd.DataFrame
     ) -> List[Dict]:
         """ENHANCED: Better SA2 mapping with name fallback"""
+        return self.records_from_frame(self.build_suburb_frame(suburbs_gdf, correspondence_df))
+
+    def build_suburb_frame(
+        self,
+        suburbs_gdf: gpd.GeoDataFrame,
+        correspondence_df: pd.DataFrame,
+        sa2_mappings_by_name: Optional[Dict[str, List[Dict]]] = None
+    ) -> pd.DataFrame:
+        """Build the suburb output table column by column (one row per suburb)"""
         logger.info("🏗️ Creating enhanced suburb records...")
 
-        enhanced_suburbs = []
-        successful_sa2_mappings = 0
-
-        for idx, suburb in suburbs_gdf.iterrows():
-            sa2_mappings = []
-
-            # SA2 mapping with enhanced matching
-            if not correspondence_df.empty and hasattr(correspondence_df, '_locality_name_col'):
-                locality_name_col = correspondence_df._locality_name_col
-                sa2_col = correspondence_df._sa2_col
-                sa2_name_col = correspondence_df._sa2_name_col
-
-                # Clean suburb name for matching
-                suburb_name_clean = suburb['sal_name'].upper().strip()
-
-                # Try exact name match first
-                name_matches = correspondence_df[
-                    correspondence_df[locality_name_col].str.upper().str.strip() == suburb_name_clean
-                ]
-
-                # Try partial name match if no exact match
-                if len(name_matches) == 0:
-                    # Remove common suffixes for better matching
-                    clean_patterns = [' (WA)', ' - WA', ' LOCALITY', ' SUBURB']
-                    for pattern in clean_patterns:
-                        if pattern in suburb_name_clean:
-                            suburb_name_clean = suburb_name_clean.replace(pattern, '')
-                            break
-
-                    name_matches = correspondence_df[
-                        correspondence_df[locality_name_col].str.upper().str.contains(
-                            suburb_name_clean.split()[0] if suburb_name_clean else suburb_name_clean,
-                            na=False, regex=False
-                        )
-                    ]
-
-                if len(name_matches) > 0:
-                    successful_sa2_mappings += 1
-                    # Take first match (could be improved with confidence scoring)
-                    match = name_matches.iloc[0]
-                    sa2_mappings.append({
-                        'sa2_code': str(match[sa2_col]),
-                        'sa2_name': str(match[sa2_name_col]) if sa2_name_col else '',
-                        'population_weight': 1.0,
-                        'area_weight': 1.0,
-                        'match_confidence': 0.9 if len(name_matches) == 1 else 0.7
-                    })
-
-            # Create record
-            enhanced_record = {
-                'sal_code': suburb['sal_code'],
-                'sal_name': suburb['sal_name'],
-                'state': 'WA',
-                'latitude': float(suburb['latitude']),
-                'longitude': float(suburb['longitude']),
-                'area_km2': float(suburb['area_km2']),
-                'abs_area_km2': float(suburb.get('abs_area_km2', suburb['area_km2'])),
-
-                'sa2_mappings': sa2_mappings,
-
-                'police_district': str(suburb.get('police_district', '')),
-                'police_mapping_confidence': float(suburb.get('police_mapping_confidence', 0.0)),
-
-                'classification_type': self.classify_suburb_type(suburb),
-                'economic_base': self.infer_economic_base(suburb),
-
-                'last_updated': '2025-09-15T00:00:00.000Z',
-                'data_source': 'ABS_SAL_2021_FINAL'
-            }
+        if sa2_mappings_by_name is None:
+            sa2_mappings_by_name = self.map_suburbs_to_sa2(suburbs_gdf['sal_name'], correspondence_df)
 
-            enhanced_suburbs.append(enhanced_record)
+        area_km2 = suburbs_gdf['area_km2'].astype(float)
+        if 'abs_area_km2' in suburbs_gdf.columns:
+            abs_area_km2 = suburbs_gdf['abs_area_km2'].astype(float).fillna(area_km2)
+        else:
+            abs_area_km2 = area_km2
 
-        logger.info(f"✅ Created {len(enhanced_suburbs)} suburb records")
-        logger.info(f"📊 SA2 mapping: {successful_sa2_mappings}/{len(enhanced_suburbs)} ({successful_sa2_mappings/len(enhanced_suburbs)*100:.1f}%)")
+        if 'police_district' in suburbs_gdf.columns:
+            police_district = suburbs_gdf['police_district'].fillna('').astype(str)
+        else:
+            police_district = pd.Series('', index=suburbs_gdf.index)
+
+        if 'police_mapping_confidence' in suburbs_gdf.columns:
+            police_confidence = suburbs_gdf['police_mapping_confidence'].astype(float).fillna(0.0)
+        else:
+            police_confidence = pd.Series(0.0, index=suburbs_gdf.index)
+
+        if 'police_district_shares' in suburbs_gdf.columns:
+            police_shares = suburbs_gdf['police_district_shares']
+        else:
+            police_shares = pd.Series([{} for _ in range(len(suburbs_gdf))], index=suburbs_gdf.index)
+
+        suburb_frame = pd.DataFrame({
+            'sal_code': suburbs_gdf['sal_code'].astype(str),
+            'sal_name': suburbs_gdf['sal_name'].astype(str),
+            'state': self.state_code,
+            'latitude': suburbs_gdf['latitude'].astype(float),
+            'longitude': suburbs_gdf['longitude'].astype(float),
+            'area_km2': area_km2,
+            'abs_area_km2': abs_area_km2,
+
+            'sa2_mappings': suburbs_gdf['sal_name'].map(lambda name: sa2_mappings_by_name.get(name, [])),
+
+            'police_district': police_district,
+            'police_mapping_confidence': police_confidence,
+            'police_district_shares': police_shares,
+
+            'classification_type': self.classify_suburb_types(suburbs_gdf),
+            'economic_base': self.infer_economic_bases(suburbs_gdf),
+
+            'last_updated': '2025-09-15T00:00:00.000Z',
+            'data_source': f'ABS_SAL_{self.census_year}_FINAL'
+        }).reset_index(drop=True)
+
+        successful_sa2_mappings = int(suburb_frame['sa2_mappings'].str.len().gt(0).sum())
+        logger.info(f"✅ Created {len(suburb_frame)} suburb records")
+        logger.info(f"📊 SA2 mapping: {successful_sa2_mappings}/{len(suburb_frame)} ({successful_sa2_mappings/len(suburb_frame)*100:.1f}%)")
+
+        return suburb_frame
+
+    def iter_records(self, suburb_frame: pd.DataFrame) -> Iterator[Dict]:
+        """Yield suburb records from the columnar table one at a time"""
+        columns = list(suburb_frame.columns)
+        for values in suburb_frame.itertuples(index=False, name=None):
+            record = dict(zip(columns, values))
+            # Suburbs sharing a name share mapping/base objects in the frame, so copy them out
+            record['sa2_mappings'] = [dict(mapping) for mapping in record['sa2_mappings']]
+            record['economic_base'] = list(record['economic_base'])
+            record['police_district_shares'] = dict(record['police_district_shares'])
+            yield record
+
+    def records_from_frame(self, suburb_frame: pd.DataFrame) -> List[Dict]:
+        """Materialize suburb records from the columnar table"""
+        return list(self.iter_records(suburb_frame))
+
+    def map_suburbs_to_sa2(self, sal_names, correspondence_df: pd.DataFrame) -> Dict[str, List[Dict]]:
+        """Map each distinct SAL name to its SA2s: exact index lookup, then batch fuzzy fallback"""
+        # Build the name index once instead of re-normalizing the correspondence per suburb
+        sa2_index = SA2CorrespondenceIndex(correspondence_df, self.state_name)
+        if not len(sa2_index):
+            return {}
+
+        logger.info(f"🗂️ Indexed {len(sa2_index)} {self.state_code} localities for SA2 lookup")
+
+        # Exact (normalized) name match returns every SA2 with its population share
+        mappings_by_name = {name: sa2_index.lookup(name) for name in pd.unique(sal_names)}
+        unmatched = [name for name, mappings in mappings_by_name.items() if not mappings]
+
+        if unmatched:
+            # Score all misses in one pass against an n-gram index of the state's localities
+            logger.info(f"🔎 Fuzzy matching {len(unmatched)} unmatched suburb names...")
+            fuzzy_index = FuzzyNameIndex(sa2_index.names)
+            candidates = fuzzy_index.batch_query(
+                [strip_locality_suffix(normalize_locality_name(name)) for name in unmatched],
+                limit=1,
+                min_score=FUZZY_MATCH_THRESHOLD
+            )
+
+            fuzzy_matched = 0
+            for name in unmatched:
+                ranked = candidates.get(strip_locality_suffix(normalize_locality_name(name)))
+                if not ranked:
+                    continue
+
+                best_name, score = ranked[0]
+                mappings = sa2_index.lookup(best_name)
+                for mapping in mappings:
+                    mapping['match_confidence'] = score
+                mappings_by_name[name] = mappings
+                fuzzy_matched += 1
+
+            logger.info(f"✅ Fuzzy matched {fuzzy_matched}/{len(unmatched)} names")
 
-        return enhanced_suburbs
+        return mappings_by_name
 
     def classify_suburb_type(self, suburb) -> str:
         """Classify suburb type"""
@@ -309,9 +473,9 @@ class WASuburbProcessorFinalFixed:
 
         if -32.5 < lat < -31.4:
             return 'Urban' if area < 10 else 'Suburban'
-        elif any(term in name for term in ['mine', 'mines', 'mining', 'goldfield']):
+        elif CLASSIFICATION_MINING_PATTERN.search(name):
             return 'Mining'
-        elif any(term in name for term in ['beach', 'bay', 'island', 'harbour']):
+        elif CLASSIFICATION_COASTAL_PATTERN.search(name):
             return 'Coastal'
         elif lat < -26:
             return 'Remote'
@@ -319,17 +483,40 @@ class WASuburbProcessorFinalFixed:
             return 'Rural'
         return 'Regional Town'
 
+    def classify_suburb_types(self, suburbs_df: pd.DataFrame) -> pd.Series:
+        """Vectorized classify_suburb_type over a whole suburb table"""
+        names = suburbs_df['sal_name'].astype(str).str.lower()
+        lat = suburbs_df['latitude'].astype(float)
+        area = suburbs_df['area_km2'].astype(float)
+        perth_band = (lat > -32.5) & (lat < -31.4)
+
+        # Conditions are checked in order, first match wins (same as the if/elif chain)
+        conditions = [
+            perth_band & (area < 10),
+            perth_band,
+            names.str.contains(CLASSIFICATION_MINING_PATTERN, na=False),
+            names.str.contains(CLASSIFICATION_COASTAL_PATTERN, na=False),
+            lat < -26,
+            area > 1000,
+        ]
+        choices = ['Urban', 'Suburban', 'Mining', 'Coastal', 'Remote', 'Rural']
+
+        return pd.Series(
+            np.select(conditions, choices, default='Regional Town'),
+            index=suburbs_df.index
+        )
+
     def infer_economic_base(self, suburb) -> List[str]:
         """Infer economic base"""
         name = suburb['sal_name'].lower()
         lat = suburb['latitude']
         base = []
 
-        if any(term in name for term in ['mine', 'mining', 'gold', 'iron']):
+        if ECONOMIC_MINING_PATTERN.search(name):
             base.append('Mining')
-        if any(term in name for term in ['port', 'harbour']):
+        if ECONOMIC_PORT_PATTERN.search(name):
             base.append('Port Services')
-        if any(term in name for term in ['beach', 'bay', 'island']):
+        if ECONOMIC_TOURISM_PATTERN.search(name):
             base.append('Tourism')
         if 'perth' in name or (-32.5 < lat < -31.4):
             base.extend(['Services', 'Finance'])
@@ -338,15 +525,63 @@ class WASuburbProcessorFinalFixed:
 
         return base or ['Mixed Economy']
 
-    def save_processed_data(self, enhanced_suburbs: List[Dict], filename: str = 'wa_suburbs_final.json'):
-        """Save final processed data"""
+    def infer_economic_bases(self, suburbs_df: pd.DataFrame) -> pd.Series:
+        """Vectorized infer_economic_base over a whole suburb table"""
+        names = suburbs_df['sal_name'].astype(str).str.lower()
+        lat = suburbs_df['latitude'].astype(float)
+        area = suburbs_df['area_km2'].astype(float)
+
+        # One boolean column per economic tag, in output order
+        flags = [
+            names.str.contains(ECONOMIC_MINING_PATTERN, na=False),
+            names.str.contains(ECONOMIC_PORT_PATTERN, na=False),
+            names.str.contains(ECONOMIC_TOURISM_PATTERN, na=False),
+            names.str.contains('perth', regex=False, na=False) | ((lat > -32.5) & (lat < -31.4)),
+            (area > 500) & (lat > -32),
+        ]
+        tags = [['Mining'], ['Port Services'], ['Tourism'], ['Services', 'Finance'], ['Agriculture']]
+
+        # Encode each row's flags as a bitmask and map the few distinct masks to tag lists
+        bitmask = np.zeros(len(suburbs_df), dtype=np.int64)
+        for bit, flag in enumerate(flags):
+            bitmask |= flag.to_numpy(dtype=bool).astype(np.int64) << bit
+
+        bases_by_mask = {}
+        for mask in np.unique(bitmask):
+            base = [tag for bit, tag_group in enumerate(tags) if mask >> bit & 1 for tag in tag_group]
+            bases_by_mask[mask] = base or ['Mixed Economy']
+
+        return pd.Series(bitmask, index=suburbs_df.index).map(bases_by_mask)
+
+    def save_processed_data(self, enhanced_suburbs: Iterable[Dict], filename: str = 'wa_suburbs_final.json'):
+        """Stream final processed data to JSON/NDJSON, CSV and any compressed copies in one pass"""
         output_path = self.output_dir / filename
+        if self.output_format == 'ndjson':
+            output_path = output_path.with_suffix('.ndjson')
+        csv_path = self.output_dir / filename.replace('.json', '.csv')
 
-        summary = {
-            'metadata': {
-                'total_suburbs': len(enhanced_suburbs),
+        total = sa2_mapped = police_mapped = 0
+        with ExitStack() as stack:
+            writer = stack.enter_context(
+                StreamingRecordWriter(output_path, 'suburbs', self.output_format, csv_path, self.compression, self.strict)
+            )
+            shards = None
+            if self.shard_by:
+                shards = stack.enter_context(ShardedRecordWriter(shard_directory(output_path), self.shard_by, strict=self.strict))
+
+            for suburb in enhanced_suburbs:
+                writer.write(suburb)
+                if shards is not None:
+                    shards.write(suburb)
+                # Coverage is tallied as records go out instead of re-scanning the list
+                total += 1
+                sa2_mapped += bool(suburb['sa2_mappings'])
+                police_mapped += bool(suburb['police_district'])
+
+            writer.metadata = {
+                'total_suburbs': total,
                 'processing_date': '2025-09-15T00:00:00.000Z',
-                'data_source': 'ABS_SAL_2021',
+                'data_source': f'ABS_SAL_{self.census_year}',
                 'version': 'final_fixed',
                 'fixes_applied': [
                     'Fixed police district spatial intersection pandas error',
@@ -354,89 +589,371 @@ class WASuburbProcessorFinalFixed:
                     'Improved error handling and validation'
                 ],
                 'coverage': {
-                    'sa2_mapped': sum(1 for s in enhanced_suburbs if s['sa2_mappings']),
-                    'police_mapped': sum(1 for s in enhanced_suburbs if s['police_district']),
-                    'sa2_percentage': sum(1 for s in enhanced_suburbs if s['sa2_mappings']) / len(enhanced_suburbs) * 100,
-                    'police_percentage': sum(1 for s in enhanced_suburbs if s['police_district']) / len(enhanced_suburbs) * 100
+                    'sa2_mapped': sa2_mapped,
+                    'police_mapped': police_mapped,
+                    'sa2_percentage': sa2_mapped / total * 100 if total else 0.0,
+                    'police_percentage': police_mapped / total * 100 if total else 0.0
                 }
-            },
-            'suburbs': enhanced_suburbs
-        }
-
-        with open(output_path, 'w') as f:
-            json.dump(summary, f, indent=2)
+            }
 
         logger.info(f"💾 Saved to {output_path}")
-
-        # Save CSV
-        csv_path = self.output_dir / filename.replace('.json', '.csv')
-        df = pd.json_normalize(enhanced_suburbs)
-        df.to_csv(csv_path, index=False)
         logger.info(f"📊 CSV saved to {csv_path}")
 
         return output_path
 
-    def process_all(self):
+    def run_cached_stage(self, stage: str, func, inputs: List[str], params: Dict, *args, code_deps: Tuple = ()):
+        """Run a stage or load its result from the cache; returns (result, cache key)
+
+        code_deps lists helper modules whose source is part of the stage's code version.
+        """
+        key = self.stage_cache.key(stage, inputs, params, code_digest(func, *code_deps))
+
+        cached = self.stage_cache.load(stage, key)
+        if self.run_report is not None:
+            self.run_report.annotate(cache_hit=cached is not None)
+        if cached is not None:
+            logger.info(f"♻️ Stage '{stage}' loaded from cache ({len(cached)} rows)")
+            return cached, key
+
+        result = func(*args)
+        if not result.empty:
+            # Keep the column-name attributes the correspondence loader hangs off the frame
+            self.stage_cache.store(stage, key, result, column_attributes(result))
+        return result, key
+
+    def find_correspondence(self) -> pd.DataFrame:
+        """Locality -> SA2 correspondence from the first data file with this census year's columns"""
+        correspondence_files = list(self.data_dir.glob("*correspondence*")) + list(self.data_dir.glob("*.csv")) + list(self.data_dir.glob("*.xlsx"))
+        correspondence_df = pd.DataFrame()
+        for file in correspondence_files:
+            if 'correspondence' in file.name.lower() or any(term in file.name.lower() for term in ['locality', 'sal']):
+                correspondence_df, _ = self.run_cached_stage(
+                    'correspondence', self.load_locality_sa2_correspondence,
+                    [self.stage_cache.file_digest(file)], {'census_year': self.census_year},
+                    str(file)
+                )
+                if not correspondence_df.empty:
+                    logger.info(f"✅ Using correspondence file: {file}")
+                    self._annotate(source=file.name)
+                    break
+        return correspondence_df
+
+    def _annotate(self, **fields):
+        if self.run_report is not None:
+            self.run_report.annotate(**fields)
+
+    def _add_output(self, path):
+        if self.run_report is not None:
+            self.run_report.add_output(path)
+
+    def build_stage_graph(
+        self,
+        sal_shapefile: Path,
+        police_shapefile: Path,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        shared: Optional[Dict] = None
+    ) -> StageGraph:
+        """process_all as a stage DAG: the three loaders (and the suburb index) run concurrently
+
+        `shared` may hold this state's 'localities' from an already-read SAL
+        file and an already-loaded 'correspondence' frame (see process_batch).
+        """
+        graph = StageGraph('geographic', report=self.run_report, max_workers=max_workers)
+        shared = shared or {}
+
+        def load_suburbs():
+            # Same cache key whether the localities were read here or handed over by a batch run
+            suburbs, suburbs_key = self.run_cached_stage(
+                'suburbs', self.extract_wa_suburbs_from_sal,
+                [self.stage_cache.file_digest(sal_shapefile)], {'state_name': self.state_name, 'low_memory': self.low_memory},
+                str(sal_shapefile), shared.get('localities'),
+                code_deps=(sal_reader, self.read_sal_suburbs, self.project_suburbs)
+            )
+            if suburbs.empty:
+                raise ValueError(f"No {self.state_code} suburbs in {sal_shapefile}")
+            self._annotate(rows_out=len(suburbs))
+            return suburbs, suburbs_key
+
+        def load_correspondence():
+            correspondence_df = shared['correspondence'] if 'correspondence' in shared else self.find_correspondence()
+            self._annotate(rows_out=len(correspondence_df))
+            return correspondence_df
+
+        def load_police():
+            police_districts, police_key = self.run_cached_stage(
+                'police_districts', self.load_police_districts,
+                [self.stage_cache.file_digest(police_shapefile)], {'low_memory': self.low_memory},
+                str(police_shapefile)
+            )
+            self._annotate(rows_out=len(police_districts))
+            return police_districts, police_key
+
+        def police_join(suburbs, suburbs_key, police_districts, police_key):
+            # Keyed on the upstream stage keys, so it only re-runs when either layer changed
+            joined, _ = self.run_cached_stage(
+                'police_join', self.spatial_intersection_suburbs_police,
+                [suburbs_key, police_key], {},
+                suburbs, police_districts,
+                code_deps=(area_overlay,)
+            )
+            self._annotate(rows_in=len(suburbs), rows_out=len(joined),
+                           matched=int(joined['police_district'].fillna('').ne('').sum()))
+            return joined
+
+        def no_police(suburbs):
+            logger.warning("⚠️ Police districts not found")
+            # Other stages read the loaded layer concurrently, so don't modify it in place
+            joined = suburbs.copy()
+            joined['police_district'] = ''
+            joined['police_mapping_confidence'] = 0.0
+            joined['police_district_shares'] = [{} for _ in range(len(joined))]
+            return joined
+
+        def record_build(joined_suburbs, correspondence):
+            # Columnar until serialization
+            suburb_frame = self.build_suburb_frame(joined_suburbs, correspondence)
+            self._annotate(rows_in=len(joined_suburbs), rows_out=len(suburb_frame))
+            return suburb_frame
+
+        def save(suburb_frame):
+            # Records are streamed straight out of the frame
+            output_path = self.save_processed_data(self.iter_records(suburb_frame), self.output_name('wa_suburbs_final.json'))
+            self._annotate(rows_out=len(suburb_frame), bytes_out=output_path.stat().st_size)
+            self._add_output(output_path)
+            if self.shard_by:
+                self._add_output(shard_directory(output_path))
+            return output_path
+
+        def apportionment(suburb_frame):
+            # Sparse suburb x district weights for apportioning district crime counts
+            matrix = build_apportionment(suburb_frame)
+            matrix_path = matrix.save(self.output_dir, self.output_name(APPORTIONMENT_NAME))
+            self._annotate(rows_in=len(suburb_frame), nnz=matrix.nnz, bytes_out=matrix_path.stat().st_size)
+            self._add_output(matrix_path)
+            return matrix_path
+
+        def suburb_index(suburbs):
+            # Point -> suburb index for coordinate lookups
+            index_path = SuburbIndex.build(suburbs).save(self.output_dir / self.output_name(INDEX_NAME))
+            self._annotate(rows_in=len(suburbs), bytes_out=sum(path.stat().st_size for path in index_path.iterdir()))
+            self._add_output(index_path)
+            return index_path
+
+        graph.add('load_suburbs', load_suburbs, outputs=['suburbs', 'suburbs_key'])
+        graph.add('load_correspondence', load_correspondence, outputs=['correspondence'])
+        if police_shapefile.exists():
+            graph.add('load_police', load_police, outputs=['police_districts', 'police_key'])
+            graph.add('police_join', police_join, ['suburbs', 'suburbs_key', 'police_districts', 'police_key'], ['joined_suburbs'])
+        else:
+            graph.add('police_join', no_police, ['suburbs'], ['joined_suburbs'])
+        graph.add('suburb_index', suburb_index, ['suburbs'], ['index_path'])
+        graph.add('record_build', record_build, ['joined_suburbs', 'correspondence'], ['suburb_frame'])
+        graph.add('save', save, ['suburb_frame'], ['output_path'])
+        graph.add('apportionment', apportionment, ['suburb_frame'], ['matrix_path'])
+        return graph
+
+    def process_all(self, shared: Optional[Dict] = None):
         """Main processing pipeline - FINAL VERSION"""
-        logger.info("🚀 Starting FINAL WA Suburb Processing Pipeline...")
+        logger.info(f"🚀 Starting FINAL {self.state_code} {self.census_year} Suburb Processing Pipeline...")
+
+        report = self.run_report = RunReport(
+            'geographic',
+            trace_memory=self.trace_memory,
+            profile_dir=self.output_dir / 'profiles' / 'geographic' if self.profile else None,
+            params={
+                'state_name': self.state_name,
+                'census_year': self.census_year,
+                'output_format': self.output_format,
+                'compression': self.compression,
+                'strict': self.strict,
+                'use_cache': self.stage_cache.enabled,
+                'max_workers': self.max_workers,
+                'low_memory': self.low_memory,
+                'shard_by': self.shard_by,
+            }
+        )
 
         try:
-            # 1. Load SAL suburbs
-            sal_shapefile = self.data_dir / "SAL_2021_AUST_GDA2020" / "SAL_2021_AUST_GDA2020.shp"
+            sal_shapefile = self.sal_shapefile_path()
             if not sal_shapefile.exists():
                 logger.error(f"❌ SAL shapefile not found")
                 return None
 
-            wa_suburbs = self.extract_wa_suburbs_from_sal(str(sal_shapefile))
-            if wa_suburbs.empty:
-                return None
-
-            # 2. Load correspondence
-            correspondence_files = list(self.data_dir.glob("*correspondence*")) + list(self.data_dir.glob("*.csv")) + list(self.data_dir.glob("*.xlsx"))
-            correspondence_df = pd.DataFrame()
-
-            for file in correspondence_files:
-                if 'correspondence' in file.name.lower() or any(term in file.name.lower() for term in ['locality', 'sal']):
-                    correspondence_df = self.load_locality_sa2_correspondence(str(file))
-                    if not correspondence_df.empty:
-                        logger.info(f"✅ Using correspondence file: {file}")
-                        break
-
-            # 3. Load police districts
-            police_shapefile = self.data_dir / "WA_Police_District_Boundaries" / "Police_Districts.shp"
-            if police_shapefile.exists():
-                police_districts = self.load_police_districts(str(police_shapefile))
-                wa_suburbs = self.spatial_intersection_suburbs_police(wa_suburbs, police_districts)
-            else:
-                logger.warning("⚠️ Police districts not found")
-                wa_suburbs['police_district'] = ''
-                wa_suburbs['police_mapping_confidence'] = 0.0
-
-            # 4. Create enhanced records
-            enhanced_suburbs = self.create_enhanced_suburb_records(wa_suburbs, correspondence_df)
-
-            # 5. Save results
-            output_path = self.save_processed_data(enhanced_suburbs)
+            police_shapefile = self.police_shapefile_path()
+            # Profiles are per thread, traced peaks are process-wide and each stage resets them,
+            # and overlapping stages hold their intermediates at the same time, so profiled,
+            # memory-traced and low-memory runs go one stage at a time
+            serial = self.profile or self.trace_memory or self.low_memory
+            graph = self.build_stage_graph(sal_shapefile, police_shapefile, max_workers=1 if serial else self.max_workers, shared=shared)
+            try:
+                # Everything else is dropped as soon as its last consumer has run
+                results = graph.run(keep=['suburb_frame', 'output_path'])
+            finally:
+                report.dag = graph.to_dict()
+            suburb_frame = results['suburb_frame']
+            output_path = results['output_path']
 
             # Final summary
-            with_police = sum(1 for s in enhanced_suburbs if s['police_district'])
-            with_sa2 = sum(1 for s in enhanced_suburbs if s['sa2_mappings'])
+            with_police = int(suburb_frame['police_district'].ne('').sum())
+            with_sa2 = int(suburb_frame['sa2_mappings'].str.len().gt(0).sum())
 
             logger.info("🎉 FINAL PROCESSING COMPLETE!")
-            logger.info(f"📊 Total: {len(enhanced_suburbs)} suburbs")
-            logger.info(f"🚔 Police: {with_police} ({with_police/len(enhanced_suburbs)*100:.1f}%)")
-            logger.info(f"📊 SA2: {with_sa2} ({with_sa2/len(enhanced_suburbs)*100:.1f}%)")
+            logger.info(f"📊 Total: {len(suburb_frame)} suburbs")
+            logger.info(f"🚔 Police: {with_police} ({with_police/len(suburb_frame)*100:.1f}%)")
+            logger.info(f"📊 SA2: {with_sa2} ({with_sa2/len(suburb_frame)*100:.1f}%)")
+            logger.info(f"🧠 Peak RSS: {max_rss_mb():.0f} MB" + (" (low-memory mode)" if self.low_memory else ""))
 
+            report.finish('ok')
             return output_path
 
         except Exception as e:
             logger.error(f"❌ Critical error: {e}")
             import traceback
             traceback.print_exc()
+            report.finish('failed', e)
             return None
 
+        finally:
+            if report.status == 'running':
+                report.finish('failed')
+            report.write(self.output_dir / self.output_name('wa_suburbs_final.run.json'),
+                         self.output_dir / self.output_name('wa_suburbs_final.runs.ndjson'))
+            self.run_report = None
+
+def _state_correspondence(correspondence_df: pd.DataFrame, state_name: str) -> pd.DataFrame:
+    """The state's rows of the correspondence, so each batch job is only sent what it uses"""
+    if correspondence_df.empty:
+        return correspondence_df
+    # SA2 codes start with the state digit; SA2CorrespondenceIndex drops other states' rows anyway
+    codes = correspondence_df[correspondence_df._sa2_col].astype(str).str.strip()
+    return correspondence_df[codes.str.startswith(STATE_CODES[state_name])]
+
+
+def _run_batch_job(options: Dict, localities: Optional[gpd.GeoDataFrame],
+                   correspondence_df: pd.DataFrame, attributes: Dict) -> Optional[str]:
+    """One (state, census year) run in a batch worker process"""
+    # Pickling drops the ad-hoc column-name attributes, so they travel separately
+    for name, value in attributes.items():
+        object.__setattr__(correspondence_df, name, value)
+
+    shared = {'correspondence': correspondence_df}
+    if localities is not None:
+        shared['localities'] = localities
+    output_path = WASuburbProcessorFinalFixed(**options).process_all(shared)
+    return str(output_path) if output_path else None
+
+
+def process_batch(
+    states: Sequence[str],
+    census_years: Sequence[int] = (DEFAULT_CENSUS_YEAR,),
+    data_dir: str = str(GEOGRAPHIC_DATA_DIR),
+    output_dir: str = str(PROCESSED_DIR),
+    workers: Optional[int] = None,
+    **options
+) -> Dict[Tuple[str, int], Optional[str]]:
+    """Run every (state, census year) job in a process pool; returns output paths by job
+
+    Each year's national SAL file and correspondence file are read once here
+    and every job is handed its state's rows. Outputs keep the single-state
+    schema with per-state names (nsw_suburbs_final.json, ...), under
+    <output_dir>/<year>/ when more than one year is requested. Other keyword
+    arguments go to each job's WASuburbProcessorFinalFixed.
+    """
+    state_names = list(dict.fromkeys(resolve_state_name(state) for state in states))
+    census_years = sorted({int(year) for year in census_years})
+    jobs = len(state_names) * len(census_years)
+    workers = min(workers or os.cpu_count() or 1, jobs)
+    # The pool already keeps every core busy, so each job runs its stages one at a time
+    options.setdefault('max_workers', 1)
+
+    logger.info(f"🗺️ Batch: {len(state_names)} states x {len(census_years)} census years on {workers} workers")
+    results: Dict[Tuple[str, int], Optional[str]] = {}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = {}
+        for year in census_years:
+            year_dir = Path(output_dir) / str(year) if len(census_years) > 1 else Path(output_dir)
+            reader = WASuburbProcessorFinalFixed(data_dir, census_year=year, output_dir=year_dir, **options)
+            sal_shapefile = reader.sal_shapefile_path()
+            if not sal_shapefile.exists():
+                logger.error(f"❌ SAL shapefile not found for {year}: {sal_shapefile}")
+                results.update({(state, year): None for state in state_names})
+                continue
+
+            # Hashed once here so the jobs' cache keys come from the memoized digest
+            reader.stage_cache.file_digest(sal_shapefile)
+            localities_by_state = read_sal_localities_by_state(sal_shapefile, state_names)
+            correspondence_df = reader.find_correspondence()
+            attributes = column_attributes(correspondence_df)
+
+            for state in state_names:
+                job_options = {**options, 'data_dir': data_dir, 'state_name': state,
+                               'census_year': year, 'output_dir': year_dir}
+                future = pool.submit(_run_batch_job, job_options, localities_by_state.pop(state),
+                                     _state_correspondence(correspondence_df, state), attributes)
+                futures[future] = (state, year)
+            del localities_by_state, correspondence_df
+
+        for future in as_completed(futures):
+            state, year = futures[future]
+            try:
+                results[(state, year)] = future.result()
+            except Exception as e:
+                logger.error(f"❌ {state} {year} failed: {e}")
+                results[(state, year)] = None
+            status = '✅' if results[(state, year)] else '❌'
+            logger.info(f"{status} {STATE_ABBREVIATIONS[state]} {year}: {results[(state, year)] or 'failed'}")
+
+    done = sum(path is not None for path in results.values())
+    logger.info(f"🎉 Batch complete: {done}/{jobs} jobs produced output")
+    return results
+
+
 if __name__ == "__main__":
-    processor = WASuburbProcessorFinalFixed()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process ABS SAL suburbs into the WA suburb database")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json', help="Suburb output format")
+    parser.add_argument('--compress', choices=COMPRESSIONS, action='append', default=[], help="Also write pre-compressed copies")
+    parser.add_argument('--strict', action='store_true', help="Fail instead of writing NaN/Infinity values")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks per stage (slower, runs stages one at a time)")
+    parser.add_argument('--profile', action='store_true', help="Save a profile of each stage next to the outputs")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS, help="Stages run concurrently (1 = one at a time)")
+    parser.add_argument('--low-memory', action='store_true', help="Minimize peak memory (slower, for small containers)")
+    parser.add_argument('--shard-by', choices=SHARD_KEYS, help="Also write NDJSON shards with a sal_code byte-offset index")
+    parser.add_argument('--states', nargs='+', help="Batch mode: states to process (names, abbreviations, ASGS codes or 'all')")
+    parser.add_argument('--census-years', nargs='+', type=int, default=[DEFAULT_CENSUS_YEAR], help="Census years for batch mode")
+    parser.add_argument('--batch-workers', type=int, help="Batch worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    if args.states:
+        states = list(STATE_CODES) if [state.lower() for state in args.states] == ['all'] else args.states
+        results = process_batch(
+            states,
+            args.census_years,
+            workers=args.batch_workers,
+            output_format=args.format,
+            compression=args.compress,
+            strict=args.strict,
+            trace_memory=args.trace_memory,
+            profile=args.profile,
+            low_memory=args.low_memory,
+            shard_by=args.shard_by
+        )
+        failed = [f"{STATE_ABBREVIATIONS[state]} {year}" for (state, year), path in results.items() if not path]
+        print(f"\n❌ Failed: {', '.join(failed)}" if failed else f"\n🎉 SUCCESS! {len(results)} state outputs written")
+        raise SystemExit(1 if failed else 0)
+
+    processor = WASuburbProcessorFinalFixed(
+        output_format=args.format,
+        compression=args.compress,
+        strict=args.strict,
+        trace_memory=args.trace_memory,
+        profile=args.profile,
+        max_workers=args.max_workers,
+        low_memory=args.low_memory,
+        shard_by=args.shard_by
+    )
     result = processor.process_all()
 
     if result:
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+SA2 Correspondence Index
+
+Hash index over the ABS SAL -> SA2 correspondence file. Built once per run so
+suburb records can be mapped to SA2s with dictionary lookups instead of
+re-scanning the whole correspondence table for every suburb.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# ASGS state/territory codes - every SA2 code starts with its state digit
+STATE_CODES = {
+    'New South Wales': '1',
+    'Victoria': '2',
+    'Queensland': '3',
+    'South Australia': '4',
+    'Western Australia': '5',
+    'Tasmania': '6',
+    'Northern Territory': '7',
+    'Australian Capital Territory': '8',
+    'Other Territories': '9',
+}
+
+STATE_ABBREVIATIONS = {
+    'New South Wales': 'NSW',
+    'Victoria': 'VIC',
+    'Queensland': 'QLD',
+    'South Australia': 'SA',
+    'Western Australia': 'WA',
+    'Tasmania': 'TAS',
+    'Northern Territory': 'NT',
+    'Australian Capital Territory': 'ACT',
+    'Other Territories': 'OT',
+}
+
+# SAL names disambiguate duplicates with a suffix, e.g. "Kensington (WA)"
+_SUFFIX_PATTERN = re.compile(r'\s*(\([^)]*\)|- WA| LOCALITY| SUBURB)$')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_locality_name(name) -> str:
+    """Upper-case, trim and collapse whitespace in a locality name"""
+    if name is None or (isinstance(name, float) and pd.isna(name)):
+        return ''
+    return _WHITESPACE_PATTERN.sub(' ', str(name).upper().strip())
+
+
+def strip_locality_suffix(name: str) -> str:
+    """Remove a trailing state/type qualifier from a normalized locality name"""
+    return _SUFFIX_PATTERN.sub('', name).strip()
+
+
+class SA2CorrespondenceIndex:
+    """Normalized locality name -> all SA2 mappings for that locality"""
+
+    def __init__(self, correspondence_df: pd.DataFrame, state_name: Optional[str] = 'Western Australia'):
+        self.state_name = state_name
+        self._index: Dict[str, List[Dict]] = {}
+        self.frame = pd.DataFrame()
+
+        if correspondence_df.empty or not hasattr(correspondence_df, '_locality_name_col'):
+            return
+
+        locality_name_col = correspondence_df._locality_name_col
+        sa2_col = correspondence_df._sa2_col
+        sa2_name_col = correspondence_df._sa2_name_col
+        ratio_col = getattr(correspondence_df, '_ratio_col', None)
+        quality_col = getattr(correspondence_df, '_quality_col', None)
+        overall_quality_col = getattr(correspondence_df, '_overall_quality_col', None)
+
+        frame = pd.DataFrame({
+            'locality_name': correspondence_df[locality_name_col],
+            # Codes can come back as floats ("501011003.0") when the column has blanks
+            'sa2_code': correspondence_df[sa2_col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True),
+            'sa2_name': correspondence_df[sa2_name_col].astype(str) if sa2_name_col else '',
+            'population_weight': (
+                pd.to_numeric(correspondence_df[ratio_col], errors='coerce').fillna(0.0)
+                if ratio_col else 1.0
+            ),
+            'quality_indicator': correspondence_df[quality_col].astype(str) if quality_col else '',
+            'overall_quality_indicator': (
+                correspondence_df[overall_quality_col].astype(str) if overall_quality_col else ''
+            ),
+        })
+        frame = frame[frame['locality_name'].notna()]
+
+        # Keep only the target state's SA2s so same-named localities elsewhere can't match
+        if state_name and state_name in STATE_CODES:
+            frame = frame[frame['sa2_code'].str.startswith(STATE_CODES[state_name])]
+
+        # Normalize the name column once for the whole run
+        frame = frame.assign(
+            name_key=frame['locality_name'].astype(str).str.upper().str.strip()
+            .str.replace(_WHITESPACE_PATTERN, ' ', regex=True)
+        )
+        frame = frame.sort_values(['name_key', 'population_weight'], ascending=[True, False])
+        self.frame = frame.reset_index(drop=True)
+
+        for key, sa2_code, sa2_name, weight, quality, overall_quality in zip(
+            self.frame['name_key'],
+            self.frame['sa2_code'],
+            self.frame['sa2_name'],
+            self.frame['population_weight'],
+            self.frame['quality_indicator'],
+            self.frame['overall_quality_indicator'],
+        ):
+            self._index.setdefault(key, []).append({
+                'sa2_code': sa2_code,
+                'sa2_name': sa2_name,
+                'population_weight': float(weight),
+                # The correspondence is population-based, so there's no area share to report
+                'area_weight': 1.0,
+                'match_confidence': 1.0,
+                'quality_indicator': quality,
+                'overall_quality_indicator': overall_quality,
+            })
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name) -> bool:
+        return normalize_locality_name(name) in self._index
+
+    @property
+    def names(self) -> List[str]:
+        """All normalized locality names in the index"""
+        return list(self._index.keys())
+
+    def lookup(self, sal_name) -> List[Dict]:
+        """Return every SA2 mapping for a SAL name, largest population share first"""
+        key = normalize_locality_name(sal_name)
+        if not key:
+            return []
+
+        mappings = self._index.get(key)
+        if mappings is None:
+            stripped = strip_locality_suffix(key)
+            if stripped != key:
+                mappings = self._index.get(stripped)
+
+        # Hand out copies so callers can annotate records without touching the index
+        return [dict(mapping) for mapping in mappings] if mappings else []
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+SAL Shapefile Reader
+
+Shared reader for the national ABS SAL (Suburbs and Localities) shapefile.
+The state filter, column projection and optional bounding box are pushed down
+into the OGR read itself, so localities from other states are never decoded
+and their geometries never materialized.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+
+from sa2_correspondence_index import STATE_ABBREVIATIONS, STATE_CODES
+
+logger = logging.getLogger(__name__)
+
+# Attribute columns the pipelines actually use (matched by substring, any census year suffix)
+DEFAULT_COLUMN_PATTERNS = ['SAL_CODE', 'SAL_NAME', 'STE_CODE', 'STE_NAME', 'AREASQKM']
+
+
+def resolve_state_name(state: str) -> str:
+    """Accept a state name ('Western Australia'), abbreviation ('WA') or ASGS code ('5')"""
+    state = str(state).strip()
+    for name in STATE_CODES:
+        if state.lower() == name.lower() or state.upper() == STATE_ABBREVIATIONS[name] or state == STATE_CODES[name]:
+            return name
+    raise ValueError(f"Unknown state: {state}")
+
+
+def read_sal_columns(shapefile_path) -> List[str]:
+    """Attribute column names, reading a single feature without its geometry"""
+    # rows=0 means "no limit" to the OGR reader, which would load the whole national file
+    return [col for col in gpd.read_file(shapefile_path, rows=1, ignore_geometry=True).columns if col != 'geometry']
+
+
+def find_column(columns: Sequence[str], pattern: str) -> Optional[str]:
+    return next((col for col in columns if pattern in col.upper()), None)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _state_filter(available: Sequence[str], states: Sequence[str]) -> Tuple[str, List[str]]:
+    """State column to filter on and the values to match for the given states"""
+    state_names = [resolve_state_name(state) for state in states]
+    state_name_col = find_column(available, 'STE_NAME')
+    state_code_col = find_column(available, 'STE_CODE')
+
+    # Match on the name like the pipelines always have, falling back to the ASGS code
+    if state_name_col:
+        return state_name_col, state_names
+    if state_code_col:
+        return state_code_col, [STATE_CODES[name] for name in state_names]
+    raise ValueError("SAL shapefile has no state column to filter on")
+
+
+def read_sal_localities(
+    shapefile_path,
+    state: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    states: Optional[Sequence[str]] = None
+) -> gpd.GeoDataFrame:
+    """Read SAL localities, optionally for one state, a subset of columns and a bbox
+
+    `state` may be a name, abbreviation or ASGS code; `states` reads several
+    in the same pass. `columns` defaults to the code/name/state/area columns;
+    pass [] for geometry only. `bbox` is (minx, miny, maxx, maxy) in the
+    shapefile's CRS.
+    """
+    available = read_sal_columns(shapefile_path)
+
+    if columns is None:
+        columns = [col for col in available if any(pattern in col.upper() for pattern in DEFAULT_COLUMN_PATTERNS)]
+
+    read_kwargs: Dict = {'columns': list(columns)}
+    if bbox is not None:
+        read_kwargs['bbox'] = tuple(bbox)
+
+    if state is not None or states:
+        filter_col, filter_values = _state_filter(available, [state] if state is not None else states)
+        if len(filter_values) == 1:
+            read_kwargs['where'] = f'"{filter_col}" = {_quote(filter_values[0])}'
+        else:
+            read_kwargs['where'] = f'"{filter_col}" IN ({", ".join(_quote(value) for value in filter_values)})'
+        # OGR only evaluates the filter against columns that are being read
+        if filter_col not in read_kwargs['columns']:
+            read_kwargs['columns'].append(filter_col)
+
+    logger.info(f"📥 Reading SAL localities with pushdown: {read_kwargs}")
+    return gpd.read_file(shapefile_path, **read_kwargs)
+
+
+def read_sal_localities_by_state(shapefile_path, states: Sequence[str], columns: Optional[List[str]] = None) -> Dict[str, gpd.GeoDataFrame]:
+    """One read of the national file for several states, split by state name"""
+    localities = read_sal_localities(shapefile_path, columns=columns, states=states)
+    filter_col, filter_values = _state_filter(list(localities.columns), states)
+    by_state = {}
+    for state, value in zip((resolve_state_name(state) for state in states), filter_values):
+        by_state[state] = localities[localities[filter_col].astype(str) == value].reset_index(drop=True)
+    return by_state
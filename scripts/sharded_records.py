@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Sharded Record Store
+
+Processor records written as NDJSON shards, one file per police district or
+SA4 region, plus a byte-offset index from each record's key (sal_code) to its
+shard, offset and length. A lookup is a binary search over the memory-mapped
+key array, one seek and one json.loads of a single line, so reading one
+suburb costs the same whether the store holds a state or the whole country.
+
+Layout of <name>.shards/:
+- index.json: shard file names and what the records are keyed/sharded by
+- keys.npy: record keys, sorted, as fixed-width bytes
+- locations.npy: (shard, offset, length) per key, in key order
+- <shard>.ndjson: the records, in the order they were written
+
+A store is built in <name>.shards.tmp/ and swapped in on close, so a failed
+write leaves the previous store as it was.
+"""
+
+import json
+import logging
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from streaming_writer import dumps, find_non_finite
+
+logger = logging.getLogger(__name__)
+
+SHARD_INDEX_VERSION = 1
+# 'sa4' groups by the first three digits of a suburb's main SA2 code
+SHARD_KEYS = ['police_district', 'sa4']
+UNASSIGNED_SHARD = 'unassigned'
+
+
+def shard_directory(path) -> Path:
+    """wa_suburbs_final.json -> wa_suburbs_final.shards"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.shards")
+
+
+def shard_value(record: Dict, shard_by: str) -> str:
+    if shard_by == 'sa4':
+        mappings = record.get('sa2_mappings') or []
+        return str(mappings[0]['sa2_code'])[:3] if mappings else ''
+    return str(record.get(shard_by) or '')
+
+
+def shard_file_name(value: str) -> str:
+    """'PERTH DISTRICT' -> 'perth_district.ndjson'"""
+    slug = re.sub(r'[^a-z0-9]+', '_', value.lower()).strip('_')
+    return f"{slug or UNASSIGNED_SHARD}.ndjson"
+
+
+class ShardedRecordWriter:
+    """Write records into shards as they are produced; use as a context manager
+
+    Files go to a sibling temp directory that replaces `directory` on close().
+    With `strict`, a NaN/Infinity anywhere in a record raises ValueError
+    like StreamingRecordWriter does.
+    """
+
+    def __init__(self, directory, shard_by: str, key: str = 'sal_code', strict: bool = False):
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key: {shard_by}")
+
+        self.directory = Path(directory)
+        self.build_directory = self.directory.with_name(self.directory.name + '.tmp')
+        self.shard_by = shard_by
+        self.key = key
+        self.strict = strict
+        self.records_written = 0
+
+        self._files: Dict[str, object] = {}
+        self._sizes: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._locations: List[tuple] = []
+        self._closed = False
+
+        # Left over from a run that died before it could clean up
+        shutil.rmtree(self.build_directory, ignore_errors=True)
+        self.build_directory.mkdir(parents=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._closed:
+            return False
+        if exc_type is not None:
+            self._abort()
+            return False
+        try:
+            self.close()
+        except Exception:
+            self._abort()
+            raise
+        return False
+
+    def write(self, record: Dict):
+        try:
+            data = dumps(record, allow_nan=not self.strict).encode('utf-8')
+        except ValueError:
+            raise ValueError(f"Non-finite float in record {self.records_written} at {find_non_finite(record)}") from None
+
+        file_name = shard_file_name(shard_value(record, self.shard_by))
+        if file_name not in self._files:
+            self._files[file_name] = open(self.build_directory / file_name, 'wb')
+            self._sizes[file_name] = 0
+
+        offset = self._sizes[file_name]
+        self._files[file_name].write(data + b'\n')
+        self._sizes[file_name] += len(data) + 1
+        self._keys.append(str(record[self.key]))
+        self._locations.append((file_name, offset, len(data)))
+        self.records_written += 1
+
+    def close(self) -> List[Path]:
+        """Flush the shards, write the index, swap the store in and return every file written"""
+        self._closed = True
+        for f in self._files.values():
+            f.close()
+
+        shards = sorted(self._files)
+        shard_ids = {name: i for i, name in enumerate(shards)}
+        keys = np.array(self._keys, dtype=np.bytes_) if self._keys else np.zeros(0, dtype='S1')
+        locations = np.array(
+            [(shard_ids[name], offset, length) for name, offset, length in self._locations],
+            dtype=np.int64
+        ).reshape(-1, 3)
+
+        order = np.argsort(keys, kind='stable')
+        keys, locations = keys[order], locations[order]
+        if len(keys) > 1 and (keys[1:] == keys[:-1]).any():
+            duplicate = keys[1:][keys[1:] == keys[:-1]][0].decode('utf-8')
+            raise ValueError(f"Duplicate {self.key} {duplicate!r} in sharded output")
+
+        np.save(self.build_directory / 'keys.npy', keys)
+        np.save(self.build_directory / 'locations.npy', locations)
+        with open(self.build_directory / 'index.json', 'w') as f:
+            json.dump({
+                'version': SHARD_INDEX_VERSION,
+                'key': self.key,
+                'shard_by': self.shard_by,
+                'records': self.records_written,
+                'shards': shards,
+                'arrays': ['keys.npy', 'locations.npy'],
+            }, f)
+        self._swap_in()
+
+        logger.info(f"🧩 Wrote {self.records_written} records in {len(shards)} shards to {self.directory}")
+        return [self.directory / name for name in shards] + [
+            self.directory / name for name in ('keys.npy', 'locations.npy', 'index.json')
+        ]
+
+    def _swap_in(self):
+        # A directory can't be replaced in one rename, so the old store moves aside first
+        retired = self.directory.with_name(self.directory.name + '.old')
+        shutil.rmtree(retired, ignore_errors=True)
+        if self.directory.exists():
+            self.directory.rename(retired)
+        self.build_directory.rename(self.directory)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _abort(self):
+        """Close handles after a failure; the partial build is removed, the previous store kept"""
+        self._closed = True
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.build_directory, ignore_errors=True)
+
+
+class ShardedRecordReader:
+    """Single-record reads from a ShardedRecordWriter directory"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / 'index.json') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != SHARD_INDEX_VERSION:
+            raise ValueError(f"Unsupported shard index version {self.meta.get('version')} in {self.directory}")
+        self.shards: List[str] = self.meta['shards']
+        # Memory-mapped, so opening the store doesn't grow with the number of records
+        self.keys = np.load(self.directory / 'keys.npy', mmap_mode='r')
+        self.locations = np.load(self.directory / 'locations.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return self._position(key) is not None
+
+    def _position(self, key) -> Optional[int]:
+        if not len(self.keys):
+            return None
+        needle = str(key).encode('utf-8')
+        if len(needle) > self.keys.dtype.itemsize:
+            return None
+        position = int(np.searchsorted(self.keys, needle))
+        if position < len(self.keys) and self.keys[position] == needle:
+            return position
+        return None
+
+    def locate(self, key) -> Optional[tuple]:
+        """(shard file, byte offset, length) of a record"""
+        position = self._position(key)
+        if position is None:
+            return None
+        shard, offset, length = (int(value) for value in self.locations[position])
+        return self.shards[shard], offset, length
+
+    def get(self, key) -> Optional[Dict]:
+        """The record for key, or None"""
+        location = self.locate(key)
+        if location is None:
+            return None
+        shard, offset, length = location
+        with open(self.directory / shard, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def iter_shard(self, shard: str) -> Iterator[Dict]:
+        """Every record in one shard, in write order"""
+        with open(self.directory / shard, 'rb') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Read single records from a sharded suburb store")
+    parser.add_argument('directory', help="A <name>.shards directory")
+    parser.add_argument('keys', nargs='*', help="Record keys (sal_code) to print")
+    parser.add_argument('--benchmark', type=int, default=0, help="Time N random single-record reads")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    reader = ShardedRecordReader(args.directory)
+    logger.info(f"📂 Opened {len(reader)} records in {len(reader.shards)} shards in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    for key in args.keys:
+        print(json.dumps(reader.get(key), indent=2))
+
+    if args.benchmark and len(reader):
+        sample = np.random.default_rng(0).choice(len(reader), args.benchmark)
+        sample_keys = [reader.keys[i].decode('utf-8') for i in sample]
+        started = time.perf_counter()
+        for key in sample_keys:
+            reader.get(key)
+        elapsed = time.perf_counter() - started
+        logger.info(f"⏱️ {args.benchmark} reads in {elapsed:.3f}s ({elapsed / args.benchmark * 1e6:.1f} µs per record)")
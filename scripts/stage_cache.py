@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Cache
+
+Content-addressed cache for expensive pipeline stages. A stage's key is a hash
+of its input file contents (or upstream stage keys), its parameters and the
+source code of the function that computes it, so a stage only re-runs when
+something it actually depends on changed. Results are stored as Parquet, with
+geometries as WKB via GeoPandas.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import geopandas as gpd
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - Parquet engine
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached stage (e.g. after a GeoPandas upgrade changes outputs)
+CACHE_FORMAT_VERSION = '1'
+
+# Files that make up an ESRI shapefile besides the .shp itself
+SHAPEFILE_SIDECARS = ['.shp', '.shx', '.dbf', '.prj', '.cpg']
+
+
+def code_digest(*code) -> str:
+    """Hash of the source of a stage function and any helper modules it relies on"""
+    digest = hashlib.sha256()
+    for obj in code:
+        try:
+            source = inspect.getsource(obj)
+        except (OSError, TypeError):
+            source = getattr(obj, '__qualname__', repr(obj))
+        digest.update(source.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class StageCache:
+    """Stores stage outputs under <cache_dir>/<stage>/<key>.parquet"""
+
+    def __init__(self, cache_dir, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled and pyarrow is not None
+        if enabled and pyarrow is None:
+            logger.warning("⚠️ pyarrow not installed, stage cache disabled")
+
+        self._digest_index_path = self.cache_dir / 'file_digests.json'
+        self._digest_index: Dict[str, Dict] = {}
+        # Stages may hash their inputs from several threads at once
+        self._digest_lock = threading.Lock()
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._digest_index_path.exists():
+                with open(self._digest_index_path) as f:
+                    self._digest_index = json.load(f)
+
+    def file_digest(self, path) -> str:
+        """SHA-256 of a file (all shapefile parts for a .shp), memoized by size and mtime"""
+        path = Path(path)
+        parts = [path]
+        if path.suffix.lower() == '.shp':
+            parts = [path.with_suffix(suffix) for suffix in SHAPEFILE_SIDECARS if path.with_suffix(suffix).exists()]
+
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.name.encode('utf-8'))
+            digest.update(self._single_file_digest(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _single_file_digest(self, path: Path) -> str:
+        stat = path.stat()
+        entry = self._digest_index.get(str(path.resolve()))
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        with self._digest_lock:
+            self._digest_index[str(path.resolve())] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': digest.hexdigest(),
+            }
+            if self.enabled:
+                # Batch jobs in other processes read this file, so it is replaced atomically
+                tmp_path = self._digest_index_path.with_suffix(f'.{os.getpid()}.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._digest_index, f, indent=2)
+                os.replace(tmp_path, self._digest_index_path)
+        return digest.hexdigest()
+
+    def key(self, stage: str, inputs: List[str], params: Optional[Dict] = None, code_version: str = '') -> str:
+        """Cache key for a stage from its input digests, parameters and code version"""
+        payload = json.dumps({
+            'stage': stage,
+            'inputs': list(inputs),
+            'params': params or {},
+            'code': code_version,
+            'format': CACHE_FORMAT_VERSION,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+    def _paths(self, stage: str, key: str):
+        stage_dir = self.cache_dir / stage
+        return stage_dir / f'{key}.parquet', stage_dir / f'{key}.json'
+
+    def load(self, stage: str, key: str) -> Optional[pd.DataFrame]:
+        """Cached frame for (stage, key), or None on a miss"""
+        if not self.enabled:
+            return None
+
+        data_path, meta_path = self._paths(stage, key)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        if meta['geo']:
+            frame = gpd.read_parquet(data_path)
+        else:
+            frame = pd.read_parquet(data_path)
+
+        for col in meta.get('json_columns', []):
+            frame[col] = frame[col].map(json.loads)
+
+        # Restore ad-hoc attributes such as the correspondence column names
+        for name, value in meta.get('attributes', {}).items():
+            object.__setattr__(frame, name, value)
+        return frame
+
+    def store(self, stage: str, key: str, frame: pd.DataFrame, attributes: Optional[Dict] = None):
+        """Write a stage result; failures only cost a cache miss next time"""
+        if not self.enabled:
+            return
+
+        data_path, meta_path = self._paths(stage, key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Parquet can't hold ragged dict/list columns, so those go in as JSON text
+        json_columns = [
+            col for col in frame.columns
+            if frame[col].dtype == object and frame[col].map(lambda value: isinstance(value, (dict, list))).any()
+        ]
+
+        try:
+            if json_columns:
+                frame = frame.copy()
+                for col in json_columns:
+                    frame[col] = frame[col].map(json.dumps)
+
+            frame.to_parquet(data_path)
+            with open(meta_path, 'w') as f:
+                json.dump({
+                    'stage': stage,
+                    'geo': isinstance(frame, gpd.GeoDataFrame),
+                    'rows': len(frame),
+                    'attributes': attributes or {},
+                    'json_columns': json_columns,
+                }, f, indent=2)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache stage '{stage}': {e}")
+            data_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
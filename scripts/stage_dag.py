@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage DAG
+
+A pipeline declared as stages with named inputs and outputs. Each stage
+starts as soon as everything it consumes has been produced, so independent
+stages (e.g. reading the SAL shapefile, the correspondence file and the
+police districts) overlap instead of queueing behind each other. Stages run
+in threads by default; GDAL, GEOS and most of pandas' I/O release the GIL.
+Stages marked in_process=True run in a worker process instead, so their
+function, inputs and outputs must be picklable.
+
+After a run the graph reports each stage's start/end offsets and the
+critical path: the chain of stages, each waiting on the one before it, that
+decided the total wall time.
+
+With a RunReport attached, every stage is measured as a report stage. CPU
+time and traced memory are process-wide counters, so stages that overlap
+share them.
+"""
+
+import gc
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        inputs: Sequence[str] = (),
+        outputs: Optional[Sequence[str]] = None,
+        in_process: bool = False
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        # A single-output stage's output is named after the stage unless declared
+        self.outputs = list(outputs) if outputs is not None else [name]
+        self.in_process = in_process
+
+
+class StageGraph:
+    """Runs stages as soon as their inputs are ready; func(**inputs) returns the output(s)"""
+
+    def __init__(self, name: str = 'pipeline', report=None, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.name = name
+        self.report = report
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.producers: Dict[str, str] = {}
+        # Per stage: start/end offsets from the start of the run, and which input it waited on last
+        self.timeline: Dict[str, Dict] = {}
+        self.critical_path: List[str] = []
+        self._started = 0.0
+
+    def add(self, name: str, func: Callable, inputs: Sequence[str] = (), outputs: Optional[Sequence[str]] = None,
+            in_process: bool = False) -> Stage:
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        stage = Stage(name, func, inputs, outputs, in_process)
+        for output in stage.outputs:
+            if output in self.producers:
+                raise ValueError(f"'{output}' is produced by both '{self.producers[output]}' and '{name}'")
+            self.producers[output] = name
+        self.stages[name] = stage
+        return stage
+
+    def _check(self, provided: Sequence[str]):
+        """Every input has a producer and there are no cycles"""
+        available = set(provided)
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in self.producers and name not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing}, which nothing produces")
+
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, stage in remaining.items() if all(
+                value in available for value in stage.inputs
+            )]
+            if not ready:
+                raise ValueError(f"Stage dependency cycle among {sorted(remaining)}")
+            for name in ready:
+                available.update(remaining.pop(name).outputs)
+
+    def _run_stage(self, stage: Stage, kwargs: Dict, process_pool: Optional[ProcessPoolExecutor]):
+        # Measured from when a worker picks the stage up, not when it became ready
+        self.timeline[stage.name]['start_s'] = round(time.perf_counter() - self._started, 4)
+        if self.report is None:
+            return self._call(stage, kwargs, process_pool)
+        with self.report.stage(stage.name):
+            return self._call(stage, kwargs, process_pool)
+
+    @staticmethod
+    def _call(stage: Stage, kwargs: Dict, process_pool: Optional[ProcessPoolExecutor]):
+        if stage.in_process:
+            return process_pool.submit(stage.func, **kwargs).result()
+        return stage.func(**kwargs)
+
+    def run(self, values: Optional[Dict[str, Any]] = None, keep: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Run every stage; returns all produced values (plus the given ones) by name
+
+        With keep given, every other value is dropped as soon as the last stage
+        consuming it has finished, and only the kept values are returned.
+        """
+        values = dict(values or {})
+        self._check(list(values))
+        # Stages still to consume each value
+        consumers: Dict[str, int] = {}
+        for stage in self.stages.values():
+            for value in stage.inputs:
+                consumers[value] = consumers.get(value, 0) + 1
+        self.timeline = {}
+        ready_at = {name: 0.0 for name in values}
+        pending = dict(self.stages)
+        started = self._started = time.perf_counter()
+
+        process_pool = None
+        if any(stage.in_process for stage in self.stages.values()):
+            process_pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+        running = {}
+        try:
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name) as threads:
+                while pending or running:
+                    for name, stage in list(pending.items()):
+                        if all(value in values for value in stage.inputs):
+                            del pending[name]
+                            # The input that arrived last is what this stage was waiting on
+                            waited_on = max(stage.inputs, key=lambda value: ready_at[value], default=None)
+                            self.timeline[name] = {
+                                'ready_s': round(time.perf_counter() - started, 4),
+                                'waited_on': self.producers.get(waited_on),
+                            }
+                            kwargs = {value: values[value] for value in stage.inputs}
+                            running[threads.submit(self._run_stage, stage, kwargs, process_pool)] = stage
+                            kwargs = None
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    finished_stages = []
+                    for future in done:
+                        stage = running.pop(future)
+                        result = future.result()
+                        finished = time.perf_counter() - started
+                        self.timeline[stage.name]['end_s'] = round(finished, 4)
+                        outputs = [result] if len(stage.outputs) == 1 else list(result)
+                        if len(outputs) != len(stage.outputs):
+                            raise ValueError(f"Stage '{stage.name}' returned {len(outputs)} values for outputs {stage.outputs}")
+                        for output, value in zip(stage.outputs, outputs):
+                            values[output] = value
+                            ready_at[output] = finished
+                        finished_stages.append(stage)
+                    if keep is not None:
+                        # Finished futures still hold their results, so they go first
+                        done = future = result = outputs = value = None
+                        for stage in finished_stages:
+                            self._release(values, consumers, stage, keep)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown(cancel_futures=True)
+
+        self.critical_path = self._critical_path()
+        self.log_summary(time.perf_counter() - started)
+        if keep is not None:
+            return {name: value for name, value in values.items() if name in keep}
+        return values
+
+    @staticmethod
+    def _release(values: Dict[str, Any], consumers: Dict[str, int], stage: Stage, keep: Sequence[str]):
+        """Drop the values nothing else is going to read"""
+        released = False
+        for value in stage.inputs:
+            consumers[value] -= 1
+        for value in stage.inputs + stage.outputs:
+            if value in values and value not in keep and consumers.get(value, 0) == 0:
+                del values[value]
+                released = True
+        if released:
+            gc.collect()
+
+    def _critical_path(self) -> List[str]:
+        if not self.timeline:
+            return []
+        name = max(self.timeline, key=lambda stage: self.timeline[stage]['end_s'])
+        path = []
+        while name is not None:
+            path.append(name)
+            name = self.timeline[name]['waited_on']
+        return path[::-1]
+
+    def log_summary(self, wall_s: float):
+        durations = {name: entry['end_s'] - entry['start_s'] for name, entry in self.timeline.items()}
+        serial_s = sum(durations.values())
+        chain = ' → '.join(f"{name} ({durations[name]:.2f}s)" for name in self.critical_path)
+        logger.info(f"🛤️ Critical path: {chain}")
+        logger.info(f"🧵 {len(self.timeline)} stages in {wall_s:.2f}s wall ({serial_s:.2f}s if run one after another)")
+
+    def to_dict(self) -> Dict:
+        return {
+            'stages': {
+                name: {**entry, 'inputs': self.stages[name].inputs, 'outputs': self.stages[name].outputs}
+                for name, entry in self.timeline.items()
+            },
+            'critical_path': self.critical_path,
+        }
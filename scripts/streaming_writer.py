@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Streaming Record Writer
+
+Writes processor outputs one record at a time instead of building the whole
+document in memory first. Records go out as compact JSON (the same
+{..., "<collection>": [...], "metadata": {...}} document the app imports) or
+as NDJSON with the metadata in a sidecar file. The CSV and any gzip/brotli
+pre-compressed copies are written in the same pass.
+
+Every file is written to <name>.tmp and renamed into place only once the
+whole output is complete, so a failed run leaves the previous output intact.
+"""
+
+import csv
+import gzip
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ['json', 'ndjson']
+COMPRESSIONS = ['gzip', 'br']
+
+# Compact separators: the indented output was mostly whitespace
+JSON_SEPARATORS = (',', ':')
+
+
+def dumps(value, allow_nan: bool = True) -> str:
+    return json.dumps(value, separators=JSON_SEPARATORS, allow_nan=allow_nan)
+
+
+def find_non_finite(value, path: str = '$') -> Optional[str]:
+    """Path of the first NaN/Infinity float inside value, if any"""
+    if isinstance(value, float):
+        return path if not math.isfinite(value) else None
+    if isinstance(value, dict):
+        items = ((f"{path}.{key}", item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        items = ((f"{path}[{i}]", item) for i, item in enumerate(value))
+    else:
+        return None
+    for item_path, item in items:
+        found = find_non_finite(item, item_path)
+        if found:
+            return found
+    return None
+
+
+def temp_path(path) -> Path:
+    """wa_suburbs_final.json -> wa_suburbs_final.json.tmp"""
+    path = Path(path)
+    return path.with_name(path.name + '.tmp')
+
+
+def metadata_path(path) -> Path:
+    """wa_suburbs_final.ndjson -> wa_suburbs_final.meta.json"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.meta.json")
+
+
+class _GzipFile:
+    """Gzip writer into the temp file whose header still names the final file"""
+
+    def __init__(self, path: Path):
+        self._file = open(temp_path(path), 'wb')
+        # mtime=0 keeps the .gz byte-identical across runs with the same content
+        self._compressor = gzip.GzipFile(str(path), 'wb', compresslevel=9, fileobj=self._file, mtime=0)
+
+    def write(self, data: bytes):
+        self._compressor.write(data)
+
+    def close(self):
+        self._compressor.close()
+        self._file.close()
+
+
+class _BrotliFile:
+    """Minimal binary file wrapper around a streaming brotli compressor, writing to the temp file"""
+
+    def __init__(self, path: Path):
+        self._file = open(temp_path(path), 'wb')
+        self._compressor = brotli.Compressor(quality=11)
+
+    def write(self, data: bytes):
+        self._file.write(self._compressor.process(data))
+
+    def close(self):
+        self._file.write(self._compressor.finish())
+        self._file.close()
+
+
+class TeeTextSink:
+    """Text sink that writes the same UTF-8 bytes to the plain file and its compressed copies
+
+    `paths` are the final file names; the data goes to their temp_path until commit().
+    """
+
+    def __init__(self, path, compression: Sequence[str] = ()):
+        self.paths = [Path(path)]
+        self._files = [open(temp_path(path), 'wb')]
+
+        for method in compression:
+            if method == 'gzip':
+                compressed_path = Path(f"{path}.gz")
+                self._files.append(_GzipFile(compressed_path))
+            elif method == 'br':
+                if brotli is None:
+                    logger.warning("⚠️ brotli not installed, skipping .br output")
+                    continue
+                compressed_path = Path(f"{path}.br")
+                self._files.append(_BrotliFile(compressed_path))
+            else:
+                raise ValueError(f"Unknown compression: {method}")
+            self.paths.append(compressed_path)
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        for f in self._files:
+            f.write(data)
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+    def commit(self):
+        for path in self.paths:
+            temp_path(path).replace(path)
+
+    def discard(self):
+        for path in self.paths:
+            temp_path(path).unlink(missing_ok=True)
+
+
+class StreamingRecordWriter:
+    """Write records as they are produced; use as a context manager
+
+    In 'json' format, records passed with a `group` are nested as
+    {"<collection>": {"<group>": [...]}} and must arrive grouped. Set
+    `metadata` before the writer closes; it is written after the records (or
+    to the .meta.json sidecar for NDJSON). `csv_path` adds a flat CSV with one
+    row per record, nested values encoded as JSON text. With `strict`, a
+    NaN/Infinity anywhere in a record raises ValueError instead of being
+    written as the non-standard NaN/Infinity tokens.
+    """
+
+    def __init__(
+        self,
+        path,
+        collection: str,
+        output_format: str = 'json',
+        csv_path=None,
+        compression: Sequence[str] = (),
+        strict: bool = False
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+
+        self.path = Path(path)
+        self.collection = collection
+        self.output_format = output_format
+        self.compression = list(compression)
+        self.strict = strict
+        self.metadata: Dict = {}
+        self.records_written = 0
+
+        self._sink = TeeTextSink(self.path, self.compression)
+        self._csv_path = Path(csv_path) if csv_path else None
+        self._csv_file = None
+        self._csv_writer = None
+        self._csv_columns: List[str] = []
+
+        self._group: Optional[str] = None
+        self._seen_groups = set()
+        self._first_in_array = True
+        self._opened_container = False
+        self._closed = False
+
+        if self.output_format == 'json':
+            self._sink.write('{' + dumps(collection) + ':')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._closed:
+            return False
+        if exc_type is not None:
+            self._abort()
+            return False
+        try:
+            self.close()
+        except Exception:
+            self._abort()
+            raise
+        return False
+
+    def _open_group(self, group: Optional[str]):
+        if not self._opened_container:
+            self._sink.write('{' if group is not None else '[')
+            self._opened_container = True
+        elif group is not None:
+            self._sink.write('],')
+
+        if group is not None:
+            if group in self._seen_groups:
+                raise ValueError(f"Records for group {group!r} are not contiguous")
+            self._seen_groups.add(group)
+            self._sink.write(dumps(str(group)) + ':[')
+
+        self._group = group
+        self._first_in_array = True
+
+    def _write_csv_row(self, record: Dict):
+        if self._csv_writer is None:
+            self._csv_columns = list(record)
+            self._csv_file = open(temp_path(self._csv_path), 'w', newline='', encoding='utf-8')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(self._csv_columns)
+
+        self._csv_writer.writerow([
+            dumps(value) if isinstance(value, (dict, list, tuple)) else value
+            for value in (record.get(column) for column in self._csv_columns)
+        ])
+
+    def _encode(self, value, label: str) -> str:
+        try:
+            return dumps(value, allow_nan=not self.strict)
+        except ValueError:
+            raise ValueError(f"Non-finite float in {label} at {find_non_finite(value)}") from None
+
+    def write(self, record: Dict, group: Optional[str] = None):
+        """Append one record (under `group` for grouped JSON output)"""
+        text = self._encode(record, f"record {self.records_written}")
+        if self.output_format == 'ndjson':
+            self._sink.write(text + '\n')
+        else:
+            if not self._opened_container or group != self._group:
+                self._open_group(group)
+            self._sink.write(('' if self._first_in_array else ',') + text)
+            self._first_in_array = False
+
+        if self._csv_path is not None:
+            self._write_csv_row(record)
+        self.records_written += 1
+
+    def close(self) -> List[Path]:
+        """Finish the document, move every file into place and return their paths"""
+        metadata_text = self._encode(self.metadata, 'metadata')
+        self._closed = True
+        paths = list(self._sink.paths)
+        renamed = []
+
+        if self.output_format == 'json':
+            if not self._opened_container:
+                self._sink.write('[]')
+            else:
+                self._sink.write(']}' if self._group is not None else ']')
+            self._sink.write(',' + dumps('metadata') + ':' + metadata_text + '}')
+            self._sink.close()
+        else:
+            self._sink.close()
+            meta_path = metadata_path(self.path)
+            with open(temp_path(meta_path), 'w') as f:
+                f.write(metadata_text)
+            renamed.append(meta_path)
+
+        if self._csv_file is not None:
+            self._csv_file.close()
+            renamed.append(self._csv_path)
+        elif self._csv_path is not None:
+            # No records: still leave an (empty) CSV behind like the old writer did
+            temp_path(self._csv_path).write_text('')
+            renamed.append(self._csv_path)
+
+        self._sink.commit()
+        for path in renamed:
+            temp_path(path).replace(path)
+        return paths + renamed
+
+    def _abort(self):
+        """Close handles after a failure; partial temp files are removed, earlier outputs kept"""
+        self._closed = True
+        self._sink.close()
+        self._sink.discard()
+        if self._csv_file is not None:
+            self._csv_file.close()
+        for path in [metadata_path(self.path)] + ([self._csv_path] if self._csv_path else []):
+            temp_path(path).unlink(missing_ok=True)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Suburb Pipeline Common
+
+Paths, district name normalization and lat/lon radius queries shared by the
+scoring engine, the spatial index, crime apportionment, facility attribution
+and the suburb store. Kept free of any pipeline imports so those modules can
+use it without pulling each other in.
+"""
+
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Where the geographic processor writes and the crime/scoring steps read, wherever they're run from
+PROCESSED_DIR = REPO_ROOT / "src/data/processed"
+SUBURB_FILES = [PROCESSED_DIR / "wa_suburbs_final.json", REPO_ROOT / "src/data/wa_suburbs_final.json"]
+FACILITIES_DIR = REPO_ROOT / "src/data/convenience-data"
+
+FACILITY_FILES = {
+    'shopping_centres': 'osm-static/shopping-centres.json',
+    'groceries': 'osm-static/groceries.json',
+    'health_care': 'osm-static/health-care.json',
+    'pharmacies': 'osm-static/pharmacies.json',
+    'leisure_centres': 'osm-static/leisure-centres.json',
+    'parks': 'osm-static/parks.json',
+}
+TRANSPORT_STOPS_FILE = 'transport/stops.txt'
+
+EARTH_RADIUS_KM = 6371.0
+# Rows scored per block by the brute-force fallback when scipy isn't installed
+FALLBACK_BLOCK_SIZE = 256
+
+
+def normalize_district_name(name: str) -> str:
+    """'Mid West - Gascoyne District' and 'MID WEST-GASCOYNE DISTRICT' -> 'MID WEST-GASCOYNE'"""
+    name = re.sub(r'\s*-\s*', '-', str(name).upper())
+    name = re.sub(r'\s+', ' ', name).strip()
+    return re.sub(r'\s+DISTRICT$', '', name)
+
+
+def unit_vectors(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere; chord length is monotonic in great-circle distance"""
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_length(distance_km: float) -> float:
+    return 2 * np.sin(distance_km / (2 * EARTH_RADIUS_KM))
+
+
+class RadiusIndex:
+    """Batch "how many points within r km" and nearest-neighbour queries over lat/lon points
+
+    Points without coordinates are left out of the index; queries without
+    coordinates find nothing.
+    """
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray):
+        points = unit_vectors(latitude, longitude)
+        self.size = len(points)
+        # Original position of each indexed point
+        self.positions = np.flatnonzero(np.isfinite(points).all(axis=1))
+        self.points = points[self.positions]
+        self.tree = cKDTree(self.points) if cKDTree is not None and len(self.points) else None
+
+    def __len__(self):
+        return self.size
+
+    def count_within(self, queries: np.ndarray, distance_km: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Points (optionally only those in mask) within distance_km of each query point"""
+        counts = np.zeros(len(queries), dtype=np.int64)
+        located = np.isfinite(queries).all(axis=1)
+        points = self.points if mask is None else self.points[mask[self.positions]]
+        if not len(points) or not located.any():
+            return counts
+        queries = queries[located]
+        radius = chord_length(distance_km)
+
+        if mask is None and self.tree is not None:
+            counts[located] = self.tree.query_ball_point(queries, radius, return_length=True)
+            return counts
+
+        # |a - b|^2 = 2 - 2 a.b on the unit sphere
+        min_dot = 1 - radius ** 2 / 2
+        found = np.empty(len(queries), dtype=np.int64)
+        for start in range(0, len(queries), FALLBACK_BLOCK_SIZE):
+            block = queries[start:start + FALLBACK_BLOCK_SIZE]
+            found[start:start + len(block)] = (block @ points.T >= min_dot).sum(axis=1)
+        counts[located] = found
+        return counts
+
+    def nearest(self, queries: np.ndarray, k: int, distance_km: float) -> np.ndarray:
+        """Positions of the k nearest points within distance_km (len(self) where there are fewer)"""
+        k = max(min(k, len(self.points)), 1)
+        result = np.full((len(queries), k), self.size, dtype=np.int64)
+        located = np.isfinite(queries).all(axis=1)
+        if not len(self.points) or not located.any():
+            return result
+        queries = queries[located]
+        radius = chord_length(distance_km)
+
+        if self.tree is not None:
+            _, indices = self.tree.query(queries, k=k, distance_upper_bound=radius)
+            indices = np.asarray(indices, dtype=np.int64).reshape(len(queries), k)
+        else:
+            indices = np.full((len(queries), k), len(self.points), dtype=np.int64)
+            for start in range(0, len(queries), FALLBACK_BLOCK_SIZE):
+                block = queries[start:start + FALLBACK_BLOCK_SIZE]
+                chord_sq = np.maximum(2 - 2 * (block @ self.points.T), 0)
+                nearest = np.argsort(chord_sq, axis=1, kind='stable')[:, :k]
+                in_range = np.take_along_axis(chord_sq, nearest, axis=1) <= radius ** 2
+                indices[start:start + len(block)] = np.where(in_range, nearest, len(self.points))
+
+        # Map tree indices back to original positions, keeping the "none" sentinel
+        result[located] = np.append(self.positions, self.size)[indices]
+        return result
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Suburb Point Index
+
+Persisted point -> suburb lookup over the SAL polygons. It is made of:
+- a packed Hilbert R-tree (flatbush layout) over polygon bounding boxes
+- the polygons as flat ragged coordinate arrays
+- the suburb centroids for nearest-suburb queries
+
+Every array is a plain .npy file opened memory-mapped, so loading an index
+takes milliseconds. The polygons become prepared shapely geometries the first
+time a containment query needs them. Queries are batched: tree descent, bbox
+filtering and the exact point-in-polygon test each run as one array operation
+over all points.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from suburb_common import EARTH_RADIUS_KM, RadiusIndex, unit_vectors
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'wa_suburb_index'
+INDEX_VERSION = 1
+NODE_SIZE = 8
+HILBERT_ORDER = 16
+# Points descended through the tree per batch, bounding the size of the candidate arrays
+QUERY_CHUNK_SIZE = 65536
+INDEX_CRS = 'EPSG:4326'
+
+ARRAYS = ['boxes', 'indices', 'centroids', 'coords', 'ring_offsets', 'part_offsets', 'geometry_offsets']
+
+
+def hilbert_index(x: np.ndarray, y: np.ndarray, order: int = HILBERT_ORDER) -> np.ndarray:
+    """Distance along a Hilbert curve for integer grid coordinates in [0, 2^order)"""
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    n = 1 << order
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # Rotate the quadrant so the curve stays continuous
+        rotate = ~ry
+        flip = rotate & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(rotate, y, x), np.where(rotate, x, y)
+        s >>= 1
+    return d
+
+
+def build_packed_tree(boxes: np.ndarray, node_size: int = NODE_SIZE) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    """Packed R-tree over (minx, miny, maxx, maxy) boxes
+
+    Returns all node boxes (leaves first, root last), for each node either
+    the item it holds (leaf level) or the position of its first child, and
+    the end position of every level.
+    """
+    extent = np.array([boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()])
+    span = np.maximum(extent[2:] - extent[:2], 1e-12)
+    grid = (1 << HILBERT_ORDER) - 1
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    cells = np.floor((centers - extent[:2]) / span * grid)
+    order = np.argsort(hilbert_index(cells[:, 0], cells[:, 1]), kind='stable')
+
+    level_boxes = [boxes[order]]
+    level_indices = [order.astype(np.int64)]
+    level_bounds = [len(boxes)]
+    while True:
+        current = level_boxes[-1]
+        starts = np.arange(0, len(current), node_size)
+        parents = np.column_stack([
+            np.minimum.reduceat(current[:, 0], starts),
+            np.minimum.reduceat(current[:, 1], starts),
+            np.maximum.reduceat(current[:, 2], starts),
+            np.maximum.reduceat(current[:, 3], starts),
+        ])
+        level_boxes.append(parents)
+        # Children are addressed by their position in the concatenated node array
+        level_indices.append(starts + level_bounds[-1] - len(current))
+        level_bounds.append(level_bounds[-1] + len(parents))
+        if len(parents) == 1:
+            break
+
+    return np.concatenate(level_boxes), np.concatenate(level_indices), level_bounds
+
+
+def _as_multipolygons(geometries: Sequence) -> np.ndarray:
+    """One MultiPolygon per suburb (empty where there's no polygon) so the ragged layout is uniform"""
+    result = []
+    for geometry in geometries:
+        if geometry is None or geometry.is_empty:
+            result.append(shapely.MultiPolygon())
+        elif geometry.geom_type == 'MultiPolygon':
+            result.append(geometry)
+        else:
+            result.append(shapely.MultiPolygon([part for part in shapely.get_parts(geometry) if part.geom_type == 'Polygon']))
+    return np.array(result, dtype=object)
+
+
+class SuburbIndex:
+    """Batch point-in-suburb and nearest-suburb lookups (coordinates in degrees)"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.arrays = arrays
+        self.meta = meta
+        self.codes: List[str] = meta['codes']
+        self.names: List[str] = meta['names']
+        self.node_size: int = meta['node_size']
+        self.level_bounds: List[int] = meta['level_bounds']
+        self._geometries: Optional[np.ndarray] = None
+        self._centroid_index: Optional[RadiusIndex] = None
+        self._blocks: Optional[List[np.ndarray]] = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, suburbs: gpd.GeoDataFrame, code_col: str = 'sal_code', name_col: str = 'sal_name') -> 'SuburbIndex':
+        """Index a suburb layer; uses its latitude/longitude columns as centroids when present"""
+        if suburbs.crs is not None and suburbs.crs != INDEX_CRS:
+            suburbs = suburbs.to_crs(INDEX_CRS)
+
+        geometries = _as_multipolygons(suburbs.geometry.array)
+        geometry_type, coords, (ring_offsets, part_offsets, geometry_offsets) = shapely.to_ragged_array(geometries)
+
+        boxes = shapely.bounds(geometries)
+        # Empty geometries get an inverted box that no point can fall into
+        empty = np.isnan(boxes).any(axis=1)
+        boxes[empty] = [np.inf, np.inf, -np.inf, -np.inf]
+
+        if {'latitude', 'longitude'} <= set(suburbs.columns):
+            centroids = suburbs[['latitude', 'longitude']].to_numpy(dtype=np.float64)
+        else:
+            points = shapely.point_on_surface(geometries)
+            centroids = np.column_stack([shapely.get_y(points), shapely.get_x(points)])
+
+        if len(suburbs):
+            node_boxes, indices, level_bounds = build_packed_tree(boxes)
+        else:
+            node_boxes, indices, level_bounds = np.empty((0, 4)), np.empty(0, dtype=np.int64), [0]
+
+        arrays = {
+            'boxes': node_boxes,
+            'indices': indices,
+            'centroids': centroids,
+            'coords': coords,
+            'ring_offsets': ring_offsets,
+            'part_offsets': part_offsets,
+            'geometry_offsets': geometry_offsets,
+        }
+        meta = {
+            'version': INDEX_VERSION,
+            'crs': INDEX_CRS,
+            'node_size': NODE_SIZE,
+            'level_bounds': [int(bound) for bound in level_bounds],
+            'codes': suburbs[code_col].astype(str).tolist(),
+            'names': suburbs[name_col].astype(str).tolist() if name_col in suburbs else [],
+            'vertices': int(len(coords)),
+        }
+        index = cls(arrays, meta)
+        index._geometries = geometries
+        return index
+
+    def save(self, directory) -> Path:
+        """Write <directory>/index.json plus one .npy per array"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(directory / f'{name}.npy', np.ascontiguousarray(self.arrays[name]))
+        with open(directory / 'index.json', 'w') as f:
+            json.dump({**self.meta, 'arrays': [f'{name}.npy' for name in ARRAYS]}, f)
+        logger.info(f"🗂️ Saved suburb index ({len(self)} suburbs, {self.meta['vertices']} vertices) to {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> 'SuburbIndex':
+        directory = Path(directory)
+        with open(directory / 'index.json') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported suburb index version {meta.get('version')} in {directory}")
+        arrays = {
+            name: np.load(directory / f'{name}.npy', mmap_mode='r' if mmap else None)
+            for name in ARRAYS
+        }
+        return cls(arrays, meta)
+
+    @property
+    def geometries(self) -> np.ndarray:
+        """Prepared polygons, materialized from the ragged arrays on first use"""
+        if self._geometries is None:
+            self._geometries = shapely.from_ragged_array(
+                shapely.GeometryType.MULTIPOLYGON,
+                np.asarray(self.arrays['coords']),
+                (np.asarray(self.arrays['ring_offsets']), np.asarray(self.arrays['part_offsets']),
+                 np.asarray(self.arrays['geometry_offsets']))
+            )
+        if not shapely.is_prepared(self._geometries[:1]).all():
+            shapely.prepare(self._geometries)
+        return self._geometries
+
+    def _child_blocks(self) -> List[np.ndarray]:
+        """Per level, the children of each node as a (nodes, node_size, 4) box block, padded with empty boxes"""
+        if self._blocks is None:
+            boxes = np.asarray(self.arrays['boxes'])
+            bounds = [0] + self.level_bounds
+            self._blocks = []
+            for level in range(1, len(self.level_bounds)):
+                children = boxes[bounds[level - 1]:bounds[level]]
+                parents = bounds[level + 1] - bounds[level]
+                padded = np.tile([np.inf, np.inf, -np.inf, -np.inf], (parents * self.node_size, 1))
+                padded[:len(children)] = children
+                self._blocks.append(padded.reshape(parents, self.node_size, 4))
+        return self._blocks
+
+    def candidates(self, latitude: np.ndarray, longitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(point, suburb) pairs whose bounding box contains the point, via one batched tree descent"""
+        x = np.asarray(longitude, dtype=np.float64)
+        y = np.asarray(latitude, dtype=np.float64)
+        if not len(self) or not len(x):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        indices = np.asarray(self.arrays['indices'])
+        bounds = [0] + self.level_bounds
+        blocks = self._child_blocks()
+
+        root = np.asarray(self.arrays['boxes'][-1])
+        points = np.flatnonzero((root[0] <= x) & (x <= root[2]) & (root[1] <= y) & (y <= root[3]))
+        nodes = np.full(len(points), bounds[-1] - 1, dtype=np.int64)
+        for level in range(len(self.level_bounds) - 1, 0, -1):
+            # Test every point against all children of its node at once
+            block = blocks[level - 1][nodes - bounds[level]]
+            px, py = x[points, None], y[points, None]
+            inside = (block[..., 0] <= px) & (px <= block[..., 2]) & (block[..., 1] <= py) & (py <= block[..., 3])
+            pair, child = np.nonzero(inside)
+            points = points[pair]
+            nodes = indices[nodes[pair]] + child
+
+        # Leaf nodes hold suburb positions
+        return points, indices[nodes]
+
+    def contains(self, latitude, longitude) -> np.ndarray:
+        """Position of the suburb containing each point, -1 where none does
+
+        Points on a shared border resolve to the lower suburb position.
+        """
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+        longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+        result = np.full(len(latitude), len(self), dtype=np.int64)
+        geometries = self.geometries if len(self) else None
+
+        for start in range(0, len(latitude), QUERY_CHUNK_SIZE):
+            lat = latitude[start:start + QUERY_CHUNK_SIZE]
+            lon = longitude[start:start + QUERY_CHUNK_SIZE]
+            points, suburbs = self.candidates(lat, lon)
+            if not len(points):
+                continue
+            hit = shapely.intersects_xy(geometries[suburbs], lon[points], lat[points])
+            np.minimum.at(result, points[hit] + start, suburbs[hit])
+
+        result[result == len(self)] = -1
+        return result
+
+    def nearest(self, latitude, longitude, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of and great-circle distances (km) to the k nearest suburb centroids"""
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+        longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+        centroids = np.asarray(self.arrays['centroids'])
+        if self._centroid_index is None:
+            self._centroid_index = RadiusIndex(centroids[:, 0], centroids[:, 1])
+
+        queries = unit_vectors(latitude, longitude)
+        # Half the earth's circumference: every centroid is in range
+        positions = self._centroid_index.nearest(queries, k, np.pi * EARTH_RADIUS_KM)
+
+        found = positions < len(self)
+        matched = centroids[np.where(found, positions, 0).ravel()]
+        targets = unit_vectors(matched[:, 0], matched[:, 1]).reshape(positions.shape + (3,))
+        chord = np.linalg.norm(targets - queries[:, None, :], axis=2)
+        distances = np.where(found, 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1)), np.inf)
+        return np.where(found, positions, -1), distances
+
+    def resolve(self, latitude, longitude, max_distance_km: Optional[float] = None) -> np.ndarray:
+        """Containing suburb, falling back to the nearest centroid (within max_distance_km) for points outside every polygon"""
+        positions = self.contains(latitude, longitude)
+        outside = np.flatnonzero(positions < 0)
+        if len(outside):
+            latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+            longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+            nearest, distances = self.nearest(latitude[outside], longitude[outside], 1)
+            if max_distance_km is not None:
+                nearest[distances > max_distance_km] = -1
+            positions[outside] = nearest[:, 0]
+        return positions
+
+    def codes_for(self, positions: np.ndarray) -> List[Optional[str]]:
+        """SAL codes for query results (None for -1)"""
+        return [self.codes[position] if position >= 0 else None for position in np.asarray(positions).tolist()]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Look up suburbs for coordinates with a saved suburb index")
+    parser.add_argument('index', help="Index directory written by the geographic processor")
+    parser.add_argument('--point', dest='points', action='append', default=[], help="lat,lng to look up, e.g. --point=-31.95,115.86")
+    parser.add_argument('--benchmark', type=int, default=0, help="Time this many random points inside the index bounds")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    suburb_index = SuburbIndex.load(args.index)
+    logger.info(f"📂 Loaded {len(suburb_index)} suburbs in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.points:
+        lat, lng = np.array([[float(value) for value in point.split(',')] for point in args.points]).T
+        for point, position in zip(args.points, suburb_index.resolve(lat, lng)):
+            name = suburb_index.names[position] if position >= 0 and suburb_index.names else None
+            print(f"{point}: {suburb_index.codes[position] if position >= 0 else '-'} {name or ''}")
+
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        root = np.asarray(suburb_index.arrays['boxes'][-1])
+        lng = rng.uniform(root[0], root[2], args.benchmark)
+        lat = rng.uniform(root[1], root[3], args.benchmark)
+        suburb_index.contains(lat[:1], lng[:1])  # Materialize the polygons outside the timing
+
+        started = time.perf_counter()
+        positions = suburb_index.contains(lat, lng)
+        elapsed = time.perf_counter() - started
+        print(f"contains: {args.benchmark / elapsed:,.0f} points/s ({(positions >= 0).mean():.1%} inside a suburb)")
+
+        started = time.perf_counter()
+        suburb_index.nearest(lat, lng, 5)
+        elapsed = time.perf_counter() - started
+        print(f"nearest (k=5): {args.benchmark / elapsed:,.0f} points/s")
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Suburb Scoring Engine
+
+Vectorized port of the TS scoring chain (safety-rating-service,
+enhanced-convenience-score-service and update-precomputed-data) that turns
+the processor outputs into src/data/precomputed-suburb-scores.json. Suburbs
+are scored as columns: district crime rates are mixed into suburbs with one
+(suburb x district) weight matrix, neighbour and facility lookups are batch
+radius queries, and every score rule is an array expression.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from crime_apportionment import district_shares
+from crime_cube import CUBE_NAME, MONTH_PATTERN, CrimeCube, merge_monthly_sheets
+from crime_watermark import district_counts_from_output
+from pipeline_metrics import RunReport
+from suburb_common import (
+    FACILITIES_DIR,
+    FACILITY_FILES,
+    REPO_ROOT,
+    SUBURB_FILES,
+    TRANSPORT_STOPS_FILE,
+    RadiusIndex,
+    normalize_district_name,
+    unit_vectors,
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CRIME_FILE = REPO_ROOT / "src/data/wa_police_crime_data.json"
+SCORES_FILE = REPO_ROOT / "src/data/precomputed-suburb-scores.json"
+
+# Months of crime data making up the "annual" rate
+CRIME_WINDOW_MONTHS = 12
+
+# Police district populations (2021 Census, by district boundary) used for offences per 1,000
+DISTRICT_POPULATIONS = {
+    'PERTH': 120000,
+    'FREMANTLE': 85000,
+    'ARMADALE': 95000,
+    'CANNINGTON': 75000,
+    'JOONDALUP': 180000,
+    'MANDURAH': 110000,
+    'MIDLAND': 90000,
+    'MIRRABOOKA': 85000,
+    'SOUTH WEST': 65000,
+    'GREAT SOUTHERN': 45000,
+    'PILBARA': 25000,
+    'KIMBERLEY': 20000,
+    'MID WEST-GASCOYNE': 35000,
+    'WHEATBELT': 30000,
+    'GOLDFIELDS-ESPERANCE': 40000,
+}
+DEFAULT_DISTRICT_POPULATION = 75000
+
+# Offence name keywords -> category, first match wins (same order as real-wa-police-parser)
+OFFENCE_CATEGORIES = [
+    ('homicide', ['homicide', 'murder']),
+    ('assault', ['assault', 'violence']),
+    ('sexual', ['sexual', 'rape']),
+    ('robbery', ['robbery', 'armed']),
+    ('burglary', ['burglary', 'break']),
+    ('theft', ['theft', 'steal']),
+    ('fraud', ['fraud', 'deception']),
+    ('drugs', ['drug', 'narcotic']),
+    ('weapons', ['weapon', 'firearm']),
+    ('property', ['property', 'damage']),
+    ('traffic', ['traffic', 'driving']),
+    ('public_order', ['public order', 'disorderly']),
+]
+
+# Crime rate per 1,000 -> direct crime score (1 = least crime), piecewise linear
+CRIME_RATE_BREAKS = [0, 15, 25, 35, 50, 70, 100, 150]
+CRIME_RATE_SCORES = [1, 2, 3, 4, 6, 8, 9.5, 10]
+
+# Neighbouring suburb influence on the crime score (higher = more crime)
+NEIGHBOUR_CLASSIFICATION_SCORES = {
+    'Suburban': 2.5,
+    'Rural': 3,
+    'Coastal': 3.5,
+    'Regional Town': 4.5,
+    'Urban': 6,
+    'Mining': 7.5,
+    'Remote': 8,
+}
+NEIGHBOUR_RADIUS_KM = 20
+NEIGHBOUR_LIMIT = 10  # Including the suburb itself
+
+CONVENIENCE_WEIGHTS = {'shopping': 0.30, 'health': 0.25, 'recreation': 0.25, 'transport': 0.20}
+GTFS_FEED_DATE = '2024-01-04'
+
+
+def js_round(values, digits: int = 1) -> np.ndarray:
+    """Math.round(x * 10^d) / 10^d (halves round up, unlike np.round)"""
+    scale = 10 ** digits
+    return np.floor(np.asarray(values, dtype=np.float64) * scale + 0.5) / scale
+
+
+class SuburbScoringEngine:
+    def __init__(
+        self,
+        suburbs_path: Optional[str] = None,
+        crime_path: str = str(CRIME_FILE),
+        facilities_dir: str = str(FACILITIES_DIR),
+        output_path: str = str(SCORES_FILE),
+        trace_memory: bool = False,
+        profile: bool = False
+    ):
+        self.suburbs_path = Path(suburbs_path) if suburbs_path else next(
+            (path for path in SUBURB_FILES if path.exists()), SUBURB_FILES[0]
+        )
+        self.crime_path = Path(crime_path)
+        self.facilities_dir = Path(facilities_dir)
+        self.output_path = Path(output_path)
+        self.trace_memory = trace_memory
+        self.profile = profile
+
+    def load_suburbs(self) -> pd.DataFrame:
+        """Suburb columns needed for scoring (JSON or NDJSON processor output)"""
+        logger.info(f"🏘️ Loading suburbs from {self.suburbs_path}")
+        with open(self.suburbs_path) as f:
+            if self.suburbs_path.suffix == '.ndjson':
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = json.load(f)['suburbs']
+
+        suburbs = pd.DataFrame.from_records(records)
+        for column, default in [('police_district', ''), ('classification_type', ''), ('sa2_mappings', None)]:
+            if column not in suburbs:
+                suburbs[column] = default
+        if 'police_district_shares' not in suburbs:
+            suburbs['police_district_shares'] = None
+
+        suburbs['sal_code'] = suburbs['sal_code'].astype(str)
+        suburbs['police_district'] = suburbs['police_district'].fillna('')
+        logger.info(f"✅ {len(suburbs)} suburbs")
+        return suburbs
+
+    def load_crime_cube(self) -> Optional[CrimeCube]:
+        """District x offence x month counts: the saved cube if it's current, else rebuilt from the crime output"""
+        cube_index = self.crime_path.parent / f'{CUBE_NAME}.json'
+        if cube_index.exists() and (
+            not self.crime_path.exists() or cube_index.stat().st_mtime >= self.crime_path.stat().st_mtime
+        ):
+            logger.info(f"🧊 Using crime cube {cube_index}")
+            return CrimeCube.load(self.crime_path.parent)
+
+        if not self.crime_path.exists():
+            logger.warning(f"⚠️ Crime data not found at {self.crime_path}")
+            return None
+
+        # Merged like the crime processor does, sheets with the most monthly data first
+        sheets = district_counts_from_output(self.crime_path)
+        monthly = {
+            sheet: sum(1 for periods in districts.values() for period in periods if MONTH_PATTERN.match(period))
+            for sheet, districts in sheets.items()
+        }
+        sources = sorted((sheet for sheet in monthly if monthly[sheet]), key=monthly.get, reverse=True)
+        if not sources:
+            logger.warning("⚠️ No monthly crime data found")
+            return None
+        return CrimeCube.from_district_counts(merge_monthly_sheets([sheets[sheet] for sheet in sources]), source=', '.join(sources))
+
+    def district_crime_table(self, cube: Optional[CrimeCube]) -> pd.DataFrame:
+        """Per normalized district: offences over the last 12 months, rate per 1,000 and violent share"""
+        columns = ['annual_offenses', 'crime_rate', 'violent_percentage']
+        if cube is None or not cube.periods:
+            return pd.DataFrame(columns=columns, dtype=float)
+
+        # Latest 12 months of the dense month axis; counts are [district, offence]
+        window = np.asarray(cube.values[:, :, -CRIME_WINDOW_MONTHS:], dtype=np.float64).sum(axis=2)
+        categories = np.array([self.offence_category(offense) for offense in cube.offenses])
+        totals = window.sum(axis=1)
+        # Same violent measure as the TS service: assaults plus a tenth of uncategorized offences
+        violent = window[:, categories == 'assault'].sum(axis=1) + 0.1 * window[:, categories == 'other'].sum(axis=1)
+
+        # Workbook labels that normalize to the same district are added together
+        table = pd.DataFrame({
+            'annual_offenses': totals,
+            'violent_offenses': violent,
+        }, index=pd.Index([normalize_district_name(district) for district in cube.districts], name='district'))
+        table = table.groupby(level=0).sum()
+
+        populations = np.array([DISTRICT_POPULATIONS.get(name, DEFAULT_DISTRICT_POPULATION) for name in table.index], dtype=np.float64)
+        offenses = table['annual_offenses'].to_numpy()
+        table['crime_rate'] = offenses / populations * 1000
+        table['violent_percentage'] = np.divide(
+            table['violent_offenses'].to_numpy() * 100, offenses, out=np.zeros_like(offenses), where=offenses > 0
+        )
+        table.attrs['period_end'] = cube.periods[-1]
+        table.attrs['period_start'] = cube.periods[max(len(cube.periods) - CRIME_WINDOW_MONTHS, 0)]
+        return table
+
+    @staticmethod
+    def offence_category(offense: str) -> str:
+        offense = offense.lower()
+        for category, keywords in OFFENCE_CATEGORIES:
+            if any(keyword in offense for keyword in keywords):
+                return category
+        return 'other'
+
+    def score_crime(self, suburbs: pd.DataFrame, district_table: pd.DataFrame) -> pd.DataFrame:
+        """Safety/crime scores for every suburb (see safety-rating-service.ts)"""
+        # Same area shares and SA2 fallback as the apportionment matrix, keyed like the crime table
+        _, weights, match = district_shares(suburbs, district_table.index, key=normalize_district_name)
+        has_crime = match > 0
+
+        crime_rate = weights @ district_table['crime_rate'].to_numpy(dtype=np.float64) if len(district_table) else np.zeros(len(suburbs))
+        violent_pct = weights @ district_table['violent_percentage'].to_numpy(dtype=np.float64) if len(district_table) else np.zeros(len(suburbs))
+
+        direct = np.interp(crime_rate, CRIME_RATE_BREAKS, CRIME_RATE_SCORES)
+        direct *= np.select([violent_pct > 25, violent_pct > 15], [1.15, 1.08], 1.0)
+        direct = np.where(has_crime, np.clip(direct, 1, 10), 5.5)
+
+        neighbourhood = self.neighbourhood_scores(suburbs)
+        overall = np.clip(direct * 0.70 + neighbourhood * 0.30, 1, 10)
+
+        # 80% for crime data (half when it's borrowed from the SA2), 20% for neighbours
+        confidence = np.maximum(0.3, np.select([match == 2, match == 1], [1.0, 0.6], 0.2))
+
+        return pd.DataFrame({
+            'safety': 11 - overall,
+            'crime': 11 - direct,
+            'crime_rate': np.where(has_crime, crime_rate, np.nan),
+            'violent_percentage': np.where(has_crime, violent_pct, np.nan),
+            'crime_match': np.array(['none', 'sa2', 'district'])[match],
+            'safety_confidence': confidence,
+        }, index=suburbs.index)
+
+    def neighbourhood_scores(self, suburbs: pd.DataFrame) -> np.ndarray:
+        """Mean classification score of up to 9 other suburbs within 20 km (5.5 when there are none)"""
+        latitude = suburbs['latitude'].to_numpy(dtype=np.float64)
+        longitude = suburbs['longitude'].to_numpy(dtype=np.float64)
+        neighbours = RadiusIndex(latitude, longitude).nearest(unit_vectors(latitude, longitude), NEIGHBOUR_LIMIT, NEIGHBOUR_RADIUS_KM)
+
+        class_scores = suburbs['classification_type'].map(NEIGHBOUR_CLASSIFICATION_SCORES).fillna(5).to_numpy(dtype=np.float64)
+        # Sentinel column for "no neighbour" so the gather stays one array op
+        padded = np.append(class_scores, np.nan)
+        valid = (neighbours < len(suburbs)) & (neighbours != np.arange(len(suburbs))[:, None])
+        values = np.where(valid, padded[np.minimum(neighbours, len(suburbs))], 0.0)
+
+        counts = valid.sum(axis=1)
+        means = np.divide(values.sum(axis=1), counts, out=np.full(len(suburbs), 5.5), where=counts > 0)
+        return np.clip(means, 1, 10)
+
+    def load_facilities(self) -> Dict[str, Dict]:
+        """Facility point sets keyed by type; missing files load as empty sets"""
+        facilities = {}
+        for key, relative_path in FACILITY_FILES.items():
+            path = self.facilities_dir / relative_path
+            points = []
+            if path.exists():
+                with open(path) as f:
+                    points = json.load(f)
+            else:
+                logger.warning(f"⚠️ {path.name} not found, scoring without it")
+            facilities[key] = {
+                'latitude': np.fromiter((point['latitude'] for point in points), dtype=np.float64, count=len(points)),
+                'longitude': np.fromiter((point['longitude'] for point in points), dtype=np.float64, count=len(points)),
+                'subcategory': np.array([point.get('subcategory') or '' for point in points], dtype=object),
+            }
+
+        stops_path = self.facilities_dir / TRANSPORT_STOPS_FILE
+        if stops_path.exists():
+            stops = pd.read_csv(stops_path, skipinitialspace=True, usecols=['stop_id', 'stop_lat', 'stop_lon'])
+            stops = stops.dropna()
+        else:
+            logger.warning(f"⚠️ {stops_path.name} not found, scoring without transport")
+            stops = pd.DataFrame({'stop_lat': [], 'stop_lon': []})
+        facilities['transport_stops'] = {
+            'latitude': stops['stop_lat'].to_numpy(dtype=np.float64),
+            'longitude': stops['stop_lon'].to_numpy(dtype=np.float64),
+            'subcategory': np.full(len(stops), '', dtype=object),
+        }
+
+        logger.info("📊 Facilities: " + ", ".join(f"{key} {len(points['latitude'])}" for key, points in facilities.items()))
+        return facilities
+
+    def score_convenience(self, suburbs: pd.DataFrame, facilities: Dict[str, Dict]) -> pd.DataFrame:
+        """Convenience scores for every suburb (see enhanced-convenience-score-service.ts)"""
+        queries = unit_vectors(suburbs['latitude'].to_numpy(dtype=np.float64), suburbs['longitude'].to_numpy(dtype=np.float64))
+        indexes = {key: RadiusIndex(points['latitude'], points['longitude']) for key, points in facilities.items()}
+
+        def within(key: str, distance_km: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+            return indexes[key].count_within(queries, distance_km, mask)
+
+        shopping_2, shopping_5 = within('shopping_centres', 2), within('shopping_centres', 5)
+        groceries_2, groceries_5 = within('groceries', 2), within('groceries', 5)
+        shopping = np.select([shopping_2 >= 2, shopping_2 >= 1, shopping_5 >= 2, shopping_5 >= 1], [9, 7, 5, 4], 1.0)
+        shopping += np.select([groceries_2 >= 3, groceries_2 >= 1], [1, 0.5], 0)
+        shopping += 0.5 * ((shopping_2 >= 1) & (groceries_2 >= 1))
+
+        health_5, health_10 = within('health_care', 5), within('health_care', 10)
+        pharmacies_5, pharmacies_10 = within('pharmacies', 5), within('pharmacies', 10)
+        health = np.select([health_5 >= 2, health_5 >= 1, health_10 >= 2, health_10 >= 1], [8, 6, 4, 3], 1.0)
+        health += np.select([pharmacies_5 >= 2, pharmacies_5 >= 1], [1, 0.5], 0)
+        health += 0.5 * ((health_5 >= 1) & (pharmacies_5 >= 1))
+
+        parks_2, parks_5 = within('parks', 2), within('parks', 5)
+        leisure_2, leisure_5 = within('leisure_centres', 2), within('leisure_centres', 5)
+        beach_access = within('parks', 5, facilities['parks']['subcategory'] == 'beach') > 0
+        recreation = np.select(
+            [parks_2 >= 3, parks_2 >= 2, parks_2 >= 1, parks_5 >= 2, parks_5 >= 1], [8, 6, 4, 3, 2], 1.0
+        )
+        recreation += 1.5 * (leisure_2 >= 1) + 2.0 * beach_access
+
+        stops_1, stops_2 = within('transport_stops', 1), within('transport_stops', 2)
+        transport = np.select(
+            [stops_1 >= 10, stops_1 >= 5, stops_1 >= 3, stops_1 >= 1, stops_2 >= 5, stops_2 >= 1], [10, 8, 6, 4, 3, 2], 1.0
+        )
+
+        components = {
+            'shopping': js_round(np.clip(shopping, 1, 10)),
+            'health': js_round(np.clip(health, 1, 10)),
+            'recreation': js_round(np.clip(recreation, 1, 10)),
+            'transport': transport,
+        }
+        overall = js_round(sum(components[key] * weight for key, weight in CONVENIENCE_WEIGHTS.items()))
+
+        # 0.3 base plus a fixed amount for each facility dataset that's available
+        available = {key: len(points['latitude']) > 0 for key, points in facilities.items()}
+        confidence = min(1.0, 0.3 + 0.15 * (available['shopping_centres'] + available['groceries'])
+                         + 0.1 * sum(available[key] for key in ['health_care', 'pharmacies', 'leisure_centres', 'parks', 'transport_stops']))
+
+        return pd.DataFrame({
+            'convenience': overall,
+            **{f'{key}_score': values for key, values in components.items()},
+            'transport_stops': stops_2,
+            'shopping_facilities': shopping_5 + groceries_5,
+            'health_facilities': health_10 + pharmacies_10,
+            'recreation_facilities': parks_5 + leisure_5,
+            'beach_access': beach_access,
+            'convenience_confidence': confidence,
+        }, index=suburbs.index)
+
+    def score(self, suburbs: pd.DataFrame, district_table: pd.DataFrame, facilities: Dict[str, Dict]) -> pd.DataFrame:
+        """All score columns for every suburb"""
+        scores = pd.concat([self.score_crime(suburbs, district_table), self.score_convenience(suburbs, facilities)], axis=1)
+
+        # Investment: safety 60% + convenience 40% (unrounded safety, as in update-precomputed-data.ts)
+        scores['investment'] = js_round(scores['safety'] * 0.6 + scores['convenience'] * 0.4)
+        scores['safety'] = js_round(scores['safety'])
+        scores['crime'] = js_round(scores['crime'])
+
+        safety_confidence = scores['safety_confidence']
+        convenience_confidence = scores['convenience_confidence']
+        scores['data_quality'] = np.select(
+            [(safety_confidence > 0.8) & (convenience_confidence > 0.8), (safety_confidence > 0.5) & (convenience_confidence > 0.5)],
+            ['high', 'medium'], 'low'
+        )
+        scores['confidence'] = js_round((safety_confidence + convenience_confidence) / 2, 2)
+        return scores
+
+    def build_output(self, suburbs: pd.DataFrame, scores: pd.DataFrame, district_table: pd.DataFrame) -> Dict:
+        """precomputed-suburb-scores.json document (PrecomputedDataFile in precomputed-data-service.ts)"""
+        now = datetime.now(timezone.utc)
+        calculated = now.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+        columns = {
+            name: values.tolist()
+            for name, values in pd.concat([suburbs[['sal_code', 'sal_name', 'latitude', 'longitude']], scores], axis=1).items()
+        }
+        entries = {}
+        for i, sal_code in enumerate(columns['sal_code']):
+            crime_rate = columns['crime_rate'][i]
+            latitude, longitude = columns['latitude'][i], columns['longitude'][i]
+            entries[sal_code] = {
+                'sal_code': sal_code,
+                'sal_name': columns['sal_name'][i],
+                # Non-geographic SALs ("No usual address") have no centroid
+                'coordinates': {
+                    'latitude': None if latitude is None or np.isnan(latitude) else latitude,
+                    'longitude': None if longitude is None or np.isnan(longitude) else longitude,
+                },
+                'scores': {
+                    'safety': columns['safety'][i],
+                    'crime': columns['crime'][i],
+                    'convenience': columns['convenience'][i],
+                    'investment': columns['investment'][i],
+                },
+                'raw_data': {
+                    'crime_stats': None if np.isnan(crime_rate) else {
+                        'crime_rate_per_1000': round(crime_rate, 1),
+                        'violent_percentage': round(columns['violent_percentage'][i], 1),
+                        'source': columns['crime_match'][i],
+                    },
+                    'transport_stops': columns['transport_stops'][i],
+                    'shopping_facilities': columns['shopping_facilities'][i],
+                    'schools': 0,  # Not part of the facility scoring yet
+                    'health_facilities': columns['health_facilities'][i],
+                    'recreation_facilities': columns['recreation_facilities'][i],
+                },
+                'metadata': {
+                    'last_calculated': calculated,
+                    'data_quality': columns['data_quality'][i],
+                    'confidence': columns['confidence'][i],
+                },
+            }
+
+        return {
+            '_metadata': {
+                'version': '1.1.0',
+                'last_updated': calculated,
+                'total_suburbs': len(entries),
+                'data_sources': {
+                    'wa_police_crime': district_table.attrs.get('period_end', 'unavailable'),
+                    'abs_census': '2021',
+                    'transperth_gtfs': GTFS_FEED_DATE,
+                    'convenience_static_data': now.strftime('%Y-%m-%d'),
+                },
+                'calculation_method': 'vectorized_python_scoring',
+                'next_update_due': (now + timedelta(days=180)).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            },
+            'suburbs': entries,
+        }
+
+    def save(self, output: Dict) -> Path:
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(output, f, separators=(',', ':'), allow_nan=False)
+        # The app reads this file directly, so never leave it half-written
+        temp_path.replace(self.output_path)
+        logger.info(f"💾 Saved scores to {self.output_path}")
+        return self.output_path
+
+    def process_all(self) -> Optional[Path]:
+        """Load processor outputs, score every suburb and write the precomputed scores file"""
+        logger.info("🚀 Starting suburb scoring...")
+        report = RunReport(
+            'scoring',
+            trace_memory=self.trace_memory,
+            profile_dir=self.output_path.parent / 'profiles' / 'scoring' if self.profile else None,
+            params={'suburbs': str(self.suburbs_path), 'crime': str(self.crime_path), 'facilities': str(self.facilities_dir)}
+        )
+
+        try:
+            with report.stage('load_suburbs') as stage:
+                suburbs = self.load_suburbs()
+                stage['rows_out'] = len(suburbs)
+
+            with report.stage('load_crime') as stage:
+                district_table = self.district_crime_table(self.load_crime_cube())
+                stage['rows_out'] = len(district_table)
+
+            with report.stage('load_facilities') as stage:
+                facilities = self.load_facilities()
+                stage['rows_out'] = sum(len(points['latitude']) for points in facilities.values())
+
+            with report.stage('score') as stage:
+                scores = self.score(suburbs, district_table, facilities)
+                stage['rows_in'] = stage['rows_out'] = len(scores)
+
+            with report.stage('save') as stage:
+                output_path = self.save(self.build_output(suburbs, scores, district_table))
+                stage['rows_out'] = len(scores)
+                stage['bytes_out'] = output_path.stat().st_size
+            report.add_output(output_path)
+
+            matched = scores['crime_match'].value_counts()
+            logger.info("🎉 SCORING COMPLETE!")
+            logger.info(f"📊 {len(scores)} suburbs, crime data: {matched.get('district', 0)} direct, "
+                        f"{matched.get('sa2', 0)} via SA2, {matched.get('none', 0)} without")
+            logger.info(f"📊 Mean safety {scores['safety'].mean():.2f}, convenience {scores['convenience'].mean():.2f}")
+
+            report.finish('ok')
+            return output_path
+
+        except Exception as e:
+            logger.error(f"❌ Scoring failed: {e}")
+            import traceback
+            traceback.print_exc()
+            report.finish('failed', e)
+            return None
+
+        finally:
+            if report.status == 'running':
+                report.finish('failed')
+            report.write(self.output_path.with_suffix('.run.json'), self.output_path.with_suffix('.runs.ndjson'))
+
+
+def refresh_all(crime_kwargs: Optional[Dict] = None, geographic_kwargs: Optional[Dict] = None, **scoring_kwargs) -> Optional[Path]:
+    """Crime processor -> geographic processor -> scoring, all in one Python run"""
+    from process_crime_data import WACrimeDataProcessor
+    from process_geographic_data_final_fixed import WASuburbProcessorFinalFixed
+
+    try:
+        crime_output = WACrimeDataProcessor(**(crime_kwargs or {})).process_all()
+    except FileNotFoundError as e:
+        logger.error(f"❌ {e}")
+        crime_output = None
+    if crime_output is None:
+        logger.error("❌ Crime processing failed, not rescoring")
+        return None
+
+    try:
+        suburbs_output = WASuburbProcessorFinalFixed(**(geographic_kwargs or {})).process_all()
+    except FileNotFoundError as e:
+        logger.error(f"❌ {e}")
+        suburbs_output = None
+    if suburbs_output is None:
+        logger.error("❌ Suburb processing failed, not rescoring")
+        return None
+
+    return SuburbScoringEngine(str(suburbs_output), str(crime_output), **scoring_kwargs).process_all()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score every suburb into precomputed-suburb-scores.json")
+    parser.add_argument('--suburbs', help="Suburb processor output (JSON or NDJSON)")
+    parser.add_argument('--crime', default=str(CRIME_FILE), help="Crime processor output")
+    parser.add_argument('--facilities', default=str(FACILITIES_DIR), help="convenience-data directory")
+    parser.add_argument('--output', default=str(SCORES_FILE), help="Scores file to write")
+    parser.add_argument('--refresh', action='store_true', help="Run the crime and suburb processors first")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc peaks per stage (slower)")
+    parser.add_argument('--profile', action='store_true', help="Save a profile of each stage next to the output")
+    args = parser.parse_args()
+
+    scoring_kwargs = dict(facilities_dir=args.facilities, output_path=args.output,
+                          trace_memory=args.trace_memory, profile=args.profile)
+    if args.refresh:
+        result = refresh_all(**scoring_kwargs)
+    else:
+        result = SuburbScoringEngine(args.suburbs, args.crime, **scoring_kwargs).process_all()
+
+    if result:
+        print(f"\n🎉 SUCCESS! Scores saved to: {result}")
+    else:
+        print("\n❌ Scoring failed. Check logs above.")
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Suburb Store
+
+The processed suburb output held as columns instead of a list of dicts:
+numbers in float64/int64 arrays, repeated strings (district, classification,
+SA2 code and name, ...) as int32 codes into one table of distinct values, and
+nested lists/dicts (sa2_mappings, economic_base, police_district_shares) as
+offsets into flattened child columns.
+
+Indexes built on load:
+- sal_code: hash (code -> row)
+- every interned column, nested ones included: value -> rows, as a hash of
+  value ids into row lists kept in row order
+- latitude/longitude: sorted, for range and bounding-box queries
+
+query() combines filters by starting from the most selective index and
+checking the remaining conditions on just those rows; top_k() ranks any
+numeric column. Rows come back as position arrays; records() turns them
+back into dicts.
+"""
+
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from sharded_records import ShardedRecordReader
+from suburb_common import SUBURB_FILES
+
+logger = logging.getLogger(__name__)
+
+# Columns with a sorted index, for range and bounding-box queries
+SORTED_COLUMNS = ['latitude', 'longitude']
+# Short names for nested interned columns in query()
+ALIASES = {'sa2_code': 'sa2_mappings.sa2_code', 'sa2_name': 'sa2_mappings.sa2_name'}
+
+Condition = Union[str, Sequence[str]]
+
+
+class NumericColumn:
+    """float64 (missing values as NaN) or int64 values"""
+
+    def __init__(self, values: Sequence):
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            self.array = np.array(values, dtype=np.int64)
+        else:
+            self.array = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.array)
+
+    def get(self, i: int):
+        value = self.array[i].item()
+        return None if value != value else value
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+
+class InternedColumn:
+    """Strings as int32 codes into a sorted table of distinct values (-1 for missing)"""
+
+    def __init__(self, values: Sequence[Optional[str]]):
+        codes, categories = pd.factorize(pd.Series(values, dtype=object), sort=True)
+        self.codes = codes.astype(np.int32)
+        self.categories: List[str] = list(categories)
+        self.ids: Dict[str, int] = {value: i for i, value in enumerate(self.categories)}
+        self._postings: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def get(self, i: int) -> Optional[str]:
+        code = self.codes[i]
+        return self.categories[code] if code >= 0 else None
+
+    def postings(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Element positions grouped by value: positions[offsets[id]:offsets[id + 1]]"""
+        if self._postings is None:
+            order = np.argsort(self.codes, kind='stable')
+            offsets = np.searchsorted(self.codes[order], np.arange(len(self.categories) + 1))
+            self._postings = (order.astype(np.int32), offsets)
+        return self._postings
+
+    def positions(self, values: Iterable[str]) -> np.ndarray:
+        """Sorted element positions holding any of the values"""
+        order, offsets = self.postings()
+        ids = [self.ids[value] for value in values if value in self.ids]
+        if len(ids) == 1:
+            return order[offsets[ids[0]]:offsets[ids[0] + 1]]
+        return np.sort(np.concatenate([order[offsets[i]:offsets[i + 1]] for i in ids] or [np.zeros(0, np.int32)]))
+
+    @property
+    def nbytes(self) -> int:
+        index_bytes = sum(array.nbytes for array in self._postings) if self._postings else 0
+        return self.codes.nbytes + sum(sys.getsizeof(value) for value in self.categories) + index_bytes
+
+
+class ObjectColumn:
+    """Anything that isn't a number, string, list or dict, kept as is"""
+
+    def __init__(self, values: Sequence):
+        self.values = list(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, i: int):
+        return self.values[i]
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values)
+
+
+class TableColumns:
+    """Named columns for a sequence of dicts; keys missing from a dict come back as None"""
+
+    def __init__(self, records: Sequence[Dict]):
+        names = list(dict.fromkeys(key for record in records for key in record))
+        self.length = len(records)
+        self.columns = {name: build_column([record.get(name) for record in records]) for name in names}
+
+    def __len__(self):
+        return self.length
+
+    def get(self, i: int) -> Dict:
+        return {name: column.get(i) for name, column in self.columns.items()}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+
+class RaggedColumn:
+    """Per-row lists (or dicts, as key/value pairs) flattened into child columns"""
+
+    def __init__(self, values: Sequence, mapping: bool = False):
+        self.mapping = mapping
+        rows = [(list(value.items()) if mapping else list(value)) if value else [] for value in values]
+        self.offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum([len(row) for row in rows], out=self.offsets[1:])
+        items = [item for row in rows for item in row]
+        if mapping:
+            self.keys = InternedColumn([key for key, _ in items])
+            self.items = build_column([value for _, value in items])
+        else:
+            self.keys = None
+            self.items = build_column(items)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get(self, i: int):
+        span = range(self.offsets[i], self.offsets[i + 1])
+        if self.mapping:
+            return {self.keys.get(j): self.items.get(j) for j in span}
+        return [self.items.get(j) for j in span]
+
+    def rows(self, item_positions: np.ndarray) -> np.ndarray:
+        """Sorted, distinct rows owning the given flattened items"""
+        return np.unique(np.searchsorted(self.offsets, item_positions, side='right') - 1).astype(np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.items.nbytes + (self.keys.nbytes if self.keys else 0)
+
+
+def build_column(values: Sequence):
+    """The most compact column type for a list of JSON values"""
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, str):
+        return InternedColumn(values)
+    if isinstance(sample, (int, float)) and not isinstance(sample, bool):
+        if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)) for value in values):
+            return NumericColumn(values)
+    if isinstance(sample, list):
+        if all(value is None or isinstance(value, list) for value in values):
+            return RaggedColumn(values)
+    if isinstance(sample, dict):
+        if all(value is None or isinstance(value, dict) for value in values):
+            items = [value for row in values if row for value in row.values()]
+            # Records (dicts of mixed fields) become a table; str -> number maps stay key/value pairs
+            if items and all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in items):
+                return RaggedColumn(values, mapping=True)
+            return TableColumns([value or {} for value in values])
+    return ObjectColumn(values)
+
+
+def load_suburb_records(path) -> List[Dict]:
+    """Records from the processor output: the JSON document, NDJSON or a .shards directory"""
+    path = Path(path)
+    if path.is_dir():
+        reader = ShardedRecordReader(path)
+        return [record for shard in reader.shards for record in reader.iter_shard(shard)]
+    with open(path) as f:
+        if path.suffix == '.ndjson':
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)['suburbs']
+
+
+class SuburbStore:
+    """Columnar suburb records with hash and sorted indexes"""
+
+    def __init__(self, records: Sequence[Dict]):
+        self.table = TableColumns(records)
+        self.columns = self.table.columns
+        if 'sal_code' not in self.columns:
+            raise ValueError("Suburb records have no sal_code")
+
+        codes = self.columns['sal_code']
+        self.row_by_code: Dict[str, int] = {codes.get(i): i for i in range(len(self))}
+        # Row order by value, and the sorted values, for range queries
+        self.sorted_index: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name in SORTED_COLUMNS:
+            if isinstance(self.columns.get(name), NumericColumn):
+                values = self.columns[name].array
+                order = np.argsort(values, kind='stable')
+                self.sorted_index[name] = (order.astype(np.int32), values[order])
+        # Value -> rows for every interned column, built up front so queries never pay for it
+        for name in self.interned_columns():
+            self._interned(name).postings()
+
+    @classmethod
+    def load(cls, path=None) -> 'SuburbStore':
+        path = Path(path) if path else next((path for path in SUBURB_FILES if path.exists()), SUBURB_FILES[0])
+        store = cls(load_suburb_records(path))
+        logger.info(f"🗃️ Loaded {len(store)} suburbs from {path} ({store.nbytes / 1024:.0f} KiB)")
+        return store
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def nbytes(self) -> int:
+        """Column and index memory (the sal_code hash included)"""
+        index_bytes = sys.getsizeof(self.row_by_code) + sum(
+            order.nbytes + values.nbytes for order, values in self.sorted_index.values()
+        )
+        return self.table.nbytes + index_bytes
+
+    def interned_columns(self) -> List[str]:
+        """Names usable as equality filters, nested ones as 'parent.field'"""
+        names = []
+        for name, column in self.columns.items():
+            if isinstance(column, InternedColumn):
+                names.append(name)
+            elif isinstance(column, RaggedColumn) and isinstance(column.items, InternedColumn):
+                names.append(name)
+            elif isinstance(column, RaggedColumn) and isinstance(column.items, TableColumns):
+                names.extend(f"{name}.{field}" for field, child in column.items.columns.items()
+                             if isinstance(child, InternedColumn))
+        return names
+
+    def _interned(self, name: str) -> InternedColumn:
+        parent, _, field = name.partition('.')
+        column = self.columns[parent]
+        if isinstance(column, RaggedColumn):
+            return column.items.columns[field] if field else column.items
+        return column
+
+    def column(self, name: str) -> np.ndarray:
+        """A numeric column's array, or an interned column's codes"""
+        column = self.columns[name]
+        return column.array if isinstance(column, NumericColumn) else column.codes
+
+    def get(self, sal_code: str) -> Optional[Dict]:
+        row = self.row_by_code.get(str(sal_code))
+        return self.table.get(row) if row is not None else None
+
+    def records(self, rows: Iterable[int]) -> List[Dict]:
+        return [self.table.get(int(row)) for row in rows]
+
+    def _matching(self, name: str, condition: Condition) -> np.ndarray:
+        """Sorted rows whose (possibly nested) value is the condition or one of a list of them"""
+        values = [condition] if isinstance(condition, str) else list(condition)
+        positions = self._interned(name).positions(values)
+        column = self.columns[name.partition('.')[0]]
+        return column.rows(positions) if isinstance(column, RaggedColumn) else positions
+
+    def _in_range(self, name: str, low: float, high: float) -> np.ndarray:
+        """Sorted rows with low <= value <= high, from the sorted index"""
+        order, values = self.sorted_index[name]
+        return np.sort(order[np.searchsorted(values, low, 'left'):np.searchsorted(values, high, 'right')])
+
+    def query(
+        self,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+        **equals: Condition
+    ) -> np.ndarray:
+        """Rows matching every condition, in row order
+
+        Keyword conditions are equality (or any-of, given a list) on interned
+        columns, e.g. police_district='PERTH DISTRICT' or sa2_code=[...];
+        nested columns match if any element does. bbox is (min_lat, min_lon,
+        max_lat, max_lon) and ranges maps numeric columns to inclusive
+        (low, high) bounds.
+        """
+        ranges = dict(ranges or {})
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            ranges['latitude'] = (min_lat, max_lat)
+            ranges['longitude'] = (min_lon, max_lon)
+        equals = {ALIASES.get(name, name): condition for name, condition in equals.items()}
+
+        # Index lookups: counts are known before any rows are gathered, so start from the smallest
+        candidates = []
+        for name, condition in equals.items():
+            column = self._interned(name)
+            _, offsets = column.postings()
+            values = [condition] if isinstance(condition, str) else list(condition)
+            count = sum(int(offsets[column.ids[value] + 1] - offsets[column.ids[value]]) for value in values if value in column.ids)
+            candidates.append((count, 'equals', name))
+        for name, (low, high) in ranges.items():
+            if name in self.sorted_index:
+                values = self.sorted_index[name][1]
+                count = np.searchsorted(values, high, 'right') - np.searchsorted(values, low, 'left')
+                candidates.append((int(count), 'range', name))
+
+        if candidates:
+            _, kind, name = min(candidates)
+            rows = self._matching(name, equals.pop(name)) if kind == 'equals' else self._in_range(name, *ranges.pop(name))
+        else:
+            rows = np.arange(len(self), dtype=np.int32)
+
+        # Remaining conditions are checked on just those rows
+        for name, condition in equals.items():
+            if not len(rows):
+                break
+            column = self.columns[name.partition('.')[0]]
+            if isinstance(column, RaggedColumn):
+                rows = np.intersect1d(rows, self._matching(name, condition), assume_unique=True)
+            else:
+                values = [condition] if isinstance(condition, str) else list(condition)
+                # Lookup table over value ids; the extra last slot catches missing values (-1)
+                wanted = np.zeros(len(column.categories) + 1, dtype=bool)
+                wanted[[column.ids[value] for value in values if value in column.ids]] = True
+                rows = rows[wanted[column.codes[rows]]]
+        for name, (low, high) in ranges.items():
+            if not len(rows):
+                break
+            values = self.column(name)[rows]
+            rows = rows[(values >= low) & (values <= high)]
+        return rows
+
+    def top_k(self, name: str, k: int = 10, rows: Optional[np.ndarray] = None, largest: bool = True) -> np.ndarray:
+        """Rows (of all, or of the given rows) with the k largest (or smallest) values of a numeric column"""
+        rows = np.arange(len(self), dtype=np.int32) if rows is None else np.asarray(rows)
+        values = self.column(name)[rows].astype(np.float64)
+        keep = ~np.isnan(values)
+        rows, values = rows[keep], values[keep]
+        if largest:
+            values = -values
+        k = min(k, len(rows))
+        if not k:
+            return rows[:0]
+        nearest = np.argpartition(values, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        return rows[nearest[np.argsort(values[nearest], kind='stable')]]
+
+
+def dict_nbytes(value) -> int:
+    """Deep size of plain JSON-like Python objects"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(dict_nbytes(key) + dict_nbytes(item) for key, item in value.items())
+    elif isinstance(value, list):
+        size += sum(dict_nbytes(item) for item in value)
+    return size
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Query the processed suburbs from a columnar store")
+    parser.add_argument('path', nargs='?', help="Suburb output (JSON, NDJSON or a .shards directory)")
+    parser.add_argument('--police-district', help="Only suburbs in this police district")
+    parser.add_argument('--classification', help="Only suburbs of this classification_type")
+    parser.add_argument('--sa2', help="Only suburbs mapped to this SA2 code")
+    parser.add_argument('--bbox', help="min_lat,min_lon,max_lat,max_lon")
+    parser.add_argument('--top', help="Rank the matches by this numeric column")
+    parser.add_argument('-k', type=int, default=10, help="How many ranked matches to print")
+    parser.add_argument('--benchmark', type=int, default=0, help="Time N runs of the query")
+    args = parser.parse_args()
+
+    path = Path(args.path) if args.path else None
+    records = load_suburb_records(path or next((p for p in SUBURB_FILES if p.exists()), SUBURB_FILES[0]))
+    store = SuburbStore(records)
+    logger.info(f"🗃️ {len(store)} suburbs: {store.nbytes / len(store):.0f} bytes each as columns "
+                f"vs {dict_nbytes(records) / len(records):.0f} as dicts")
+    del records
+
+    conditions = {}
+    if args.police_district:
+        conditions['police_district'] = args.police_district
+    if args.classification:
+        conditions['classification_type'] = args.classification
+    if args.sa2:
+        conditions['sa2_code'] = args.sa2
+    bbox = tuple(float(value) for value in args.bbox.split(',')) if args.bbox else None
+
+    def run():
+        rows = store.query(bbox=bbox, **conditions)
+        return store.top_k(args.top, args.k, rows) if args.top else rows[:args.k]
+
+    rows = run()
+    for record in store.records(rows):
+        print(f"{record['sal_code']}  {record['sal_name']:<30} {record.get('police_district') or '-':<24} "
+              f"{record.get('classification_type') or '-':<14} {record.get(args.top, '') if args.top else ''}")
+
+    if args.benchmark:
+        started = time.perf_counter()
+        for _ in range(args.benchmark):
+            run()
+        elapsed = time.perf_counter() - started
+        logger.info(f"⏱️ {elapsed / args.benchmark * 1e6:.1f} µs per query")
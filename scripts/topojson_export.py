@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Shared-Arc TopoJSON Export
+
+Builds a TopoJSON topology over suburb polygons. Coordinates are quantized
+to an integer grid first, so borders shared by neighbouring suburbs line up
+exactly; rings are then cut at junctions (vertices where the neighbouring
+geometry changes) into arcs, and each distinct arc is stored and simplified
+once. Neighbours therefore keep identical borders after simplification, with
+no slivers or gaps, and every shared edge is written only once.
+"""
+
+import json
+import logging
+from typing import Dict, List, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUANTIZATION = 100_000
+OBJECT_NAME = 'suburbs'
+
+
+def _canonical_start(ring: np.ndarray) -> np.ndarray:
+    """Rotate a junction-free ring to start at its smallest point so shared copies line up"""
+    start = np.lexsort((ring[:, 1], ring[:, 0]))[0]
+    return np.roll(ring, -start, axis=0)
+
+
+class TopologyBuilder:
+    """Collects quantized rings, then cuts them into shared arcs"""
+
+    def __init__(self, bounds: Tuple[float, float, float, float], quantization: int = DEFAULT_QUANTIZATION):
+        minx, miny, maxx, maxy = bounds
+        # One scale for both axes keeps the grid (and the simplification tolerance) isotropic
+        self.scale = max(maxx - minx, maxy - miny, 1e-12) / (quantization - 1)
+        self.translate = (minx, miny)
+        self.quantization = quantization
+
+        self.rings: List[np.ndarray] = []
+        # Per geometry: list of polygons, each a list of ring indices
+        self.geometries: List[List[List[int]]] = []
+
+    def quantize(self, coords: np.ndarray) -> np.ndarray:
+        return np.rint((coords - self.translate) / self.scale).astype(np.int64)
+
+    def add_geometry(self, geometry):
+        polygons = []
+        if geometry is not None and not geometry.is_empty:
+            for part in shapely.get_parts(geometry):
+                if part.geom_type != 'Polygon' or part.is_empty:
+                    continue
+                ring_ids = []
+                for ring in [part.exterior] + list(part.interiors):
+                    points = self.quantize(np.asarray(ring.coords)[:, :2])[:-1]
+                    # Quantization can merge neighbouring vertices
+                    keep = np.ones(len(points), dtype=bool)
+                    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+                    points = points[keep]
+                    if len(points) > 1 and np.array_equal(points[0], points[-1]):
+                        points = points[:-1]
+                    if len(points) >= 3:
+                        ring_ids.append(len(self.rings))
+                        self.rings.append(points)
+                    elif not ring_ids:
+                        break  # Exterior collapsed, drop the whole polygon
+                if ring_ids:
+                    polygons.append(ring_ids)
+        self.geometries.append(polygons)
+
+    def junctions(self) -> np.ndarray:
+        """Boolean per concatenated ring vertex: is it a junction?
+
+        A point is a junction when it is visited with more than one distinct
+        (unordered) pair of neighbours, i.e. where shared borders start or end.
+        """
+        if not self.rings:
+            return np.zeros(0, dtype=bool)
+
+        lengths = np.array([len(ring) for ring in self.rings])
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        points = np.concatenate(self.rings)
+        keys = points[:, 0] * (self.quantization + 1) + points[:, 1]
+
+        # Previous/next vertex within each (implicitly closed) ring
+        positions = np.arange(len(keys))
+        ring_of = np.repeat(np.arange(len(self.rings)), lengths)
+        offset = positions - starts[ring_of]
+        prev_keys = keys[starts[ring_of] + (offset - 1) % lengths[ring_of]]
+        next_keys = keys[starts[ring_of] + (offset + 1) % lengths[ring_of]]
+
+        visits = pd.DataFrame({
+            'key': keys,
+            'low': np.minimum(prev_keys, next_keys),
+            'high': np.maximum(prev_keys, next_keys),
+        })
+        pair_counts = visits.drop_duplicates().groupby('key').size()
+        return visits['key'].map(pair_counts).to_numpy() > 1
+
+    def build_arcs(self) -> Tuple[List[np.ndarray], List[List[int]]]:
+        """Unique arcs and, per ring, its arc references (~i for a reversed arc)"""
+        is_junction = self.junctions()
+        arcs: List[np.ndarray] = []
+        arc_index: Dict[bytes, int] = {}
+        ring_arcs: List[List[int]] = []
+
+        def reference(arc: np.ndarray) -> int:
+            key = arc.tobytes()
+            if key in arc_index:
+                return arc_index[key]
+            reversed_key = arc[::-1].tobytes()
+            if reversed_key in arc_index:
+                return ~arc_index[reversed_key]
+            arc_index[key] = len(arcs)
+            arcs.append(arc)
+            return arc_index[key]
+
+        position = 0
+        for ring in self.rings:
+            ring_junctions = np.flatnonzero(is_junction[position:position + len(ring)])
+            position += len(ring)
+
+            if not len(ring_junctions):
+                rotated = _canonical_start(ring)
+                ring_arcs.append([reference(np.vstack([rotated, rotated[:1]]))])
+                continue
+
+            # Start at the first junction and cut at every junction after it
+            rotated = np.roll(ring, -ring_junctions[0], axis=0)
+            cuts = list(ring_junctions - ring_junctions[0]) + [len(ring)]
+            closed = np.vstack([rotated, rotated[:1]])
+            ring_arcs.append([reference(closed[start:end + 1]) for start, end in zip(cuts[:-1], cuts[1:])])
+
+        return arcs, ring_arcs
+
+
+def simplify_arcs(arcs: List[np.ndarray], tolerance: float) -> List[np.ndarray]:
+    """Douglas-Peucker each arc once; endpoints (junctions) always survive"""
+    if tolerance <= 0 or not arcs:
+        return arcs
+
+    lengths = [len(arc) for arc in arcs]
+    lines = shapely.linestrings(np.concatenate(arcs).astype(float), indices=np.repeat(np.arange(len(arcs)), lengths))
+    simplified = shapely.simplify(lines, tolerance, preserve_topology=True)
+
+    result = []
+    for arc, line in zip(arcs, simplified):
+        coords = shapely.get_coordinates(line).astype(np.int64)
+        # A closed arc is a whole ring on its own and has to stay a ring
+        if np.array_equal(arc[0], arc[-1]) and len(coords) < 4:
+            coords = arc
+        result.append(coords)
+    return result
+
+
+def _delta_encode(arc: np.ndarray) -> List[List[int]]:
+    return np.vstack([arc[:1], np.diff(arc, axis=0)]).tolist()
+
+
+def build_topology(
+    gdf: gpd.GeoDataFrame,
+    tolerance: float = 0.0,
+    quantization: int = DEFAULT_QUANTIZATION,
+    object_name: str = OBJECT_NAME,
+    id_column: str = None
+) -> Dict:
+    """TopoJSON Topology dict for a polygon layer
+
+    `tolerance` is in the layer's CRS units (degrees for EPSG:4326) and is
+    applied per shared arc. Non-geometry columns become properties.
+    """
+    builder = TopologyBuilder(tuple(gdf.total_bounds), quantization)
+    for geometry in gdf.geometry.array:
+        builder.add_geometry(geometry)
+
+    arcs, ring_arcs = builder.build_arcs()
+    total_vertices = sum(len(ring) for ring in builder.rings)
+    logger.info(f"🧵 {len(builder.rings)} rings ({total_vertices} vertices) -> {len(arcs)} shared arcs "
+                f"({sum(len(arc) for arc in arcs)} vertices)")
+
+    arcs = simplify_arcs(arcs, tolerance / builder.scale)
+
+    property_columns = [col for col in gdf.columns if col != gdf.geometry.name]
+    records = gdf[property_columns].to_dict('records')
+    geometries = []
+    for polygons, properties in zip(builder.geometries, records):
+        properties = {key: (None if isinstance(value, float) and np.isnan(value) else value)
+                      for key, value in properties.items()}
+        polygon_arcs = [[ring_arcs[ring_id] for ring_id in polygon] for polygon in polygons]
+        if not polygon_arcs:
+            geometry = {'type': None}
+        elif len(polygon_arcs) == 1:
+            geometry = {'type': 'Polygon', 'arcs': polygon_arcs[0]}
+        else:
+            geometry = {'type': 'MultiPolygon', 'arcs': polygon_arcs}
+        if id_column:
+            geometry['id'] = properties.get(id_column)
+        geometry['properties'] = properties
+        geometries.append(geometry)
+
+    return {
+        'type': 'Topology',
+        'bbox': [float(value) for value in gdf.total_bounds],
+        'transform': {
+            'scale': [builder.scale, builder.scale],
+            'translate': [float(builder.translate[0]), float(builder.translate[1])],
+        },
+        'objects': {object_name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': [_delta_encode(arc) for arc in arcs],
+    }
+
+
+def write_topology(topology: Dict, output_path) -> None:
+    with open(output_path, 'w') as f:
+        json.dump(topology, f, separators=(',', ':'), default=str)
+
+
+def decode_arc(topology: Dict, arc: List[List[int]]) -> np.ndarray:
+    """Absolute coordinates of one delta-encoded arc"""
+    scale = np.array(topology['transform']['scale'])
+    translate = np.array(topology['transform']['translate'])
+    return np.cumsum(np.asarray(arc, dtype=np.int64), axis=0) * scale + translate
+
+
+def topology_to_geometries(topology: Dict, object_name: str = OBJECT_NAME) -> List:
+    """Shapely geometries back from a topology built here (for checks and tooling)"""
+    decoded = [decode_arc(topology, arc) for arc in topology['arcs']]
+
+    def ring(references):
+        parts = []
+        for i, ref in enumerate(references):
+            coords = decoded[ref] if ref >= 0 else decoded[~ref][::-1]
+            parts.append(coords if i == 0 else coords[1:])
+        return np.vstack(parts)
+
+    geometries = []
+    for geometry in topology['objects'][object_name]['geometries']:
+        if geometry['type'] == 'Polygon':
+            polygons = [geometry['arcs']]
+        elif geometry['type'] == 'MultiPolygon':
+            polygons = geometry['arcs']
+        else:
+            geometries.append(None)
+            continue
+        shapes = [shapely.Polygon(ring(rings[0]), [ring(hole) for hole in rings[1:]]) for rings in polygons]
+        geometries.append(shapes[0] if len(shapes) == 1 else shapely.MultiPolygon(shapes))
+    return geometries
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Suburb Vector Tiles
+
+Builds zoom-dependent Mapbox Vector Tiles for the suburb boundaries into a
+single MBTiles (SQLite) archive. Each zoom level gets its own simplification
+tolerance (about one screen pixel), tiles are clipped and encoded across a
+process pool, and the quantized geometry of every tile is kept in the archive
+so a run where only attributes (scores) changed re-encodes just the affected
+tiles without touching the geometry again.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+logger = logging.getLogger(__name__)
+
+WEB_MERCATOR_CRS = 'EPSG:3857'
+WORLD_HALF_SIZE = 20037508.342789244
+DEFAULT_EXTENT = 4096
+DEFAULT_BUFFER = 64
+DEFAULT_MIN_ZOOM = 4
+DEFAULT_MAX_ZOOM = 12
+LAYER_NAME = 'suburbs'
+
+# Simplify to ~1 screen pixel: a 4096-unit tile is drawn 256 px wide
+SIMPLIFY_TILE_UNITS = DEFAULT_EXTENT / 256
+
+# Tiles are dispatched to workers in square blocks so neighbouring tiles share feature geometry
+TASK_BLOCK_SIZE = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT);
+CREATE UNIQUE INDEX IF NOT EXISTS metadata_name ON metadata (name);
+CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+CREATE TABLE IF NOT EXISTS tile_features (
+    zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, feature_id INTEGER, sal_code TEXT, geometry BLOB
+);
+CREATE INDEX IF NOT EXISTS tile_features_tile ON tile_features (zoom_level, tile_column, tile_row);
+CREATE INDEX IF NOT EXISTS tile_features_code ON tile_features (sal_code);
+CREATE TABLE IF NOT EXISTS feature_attributes (sal_code TEXT PRIMARY KEY, digest TEXT);
+"""
+
+
+# --- Protobuf / MVT encoding -------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _length_delimited(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _encode_value(value) -> bytes:
+    """MVT Value message for a str/bool/int/float attribute"""
+    if isinstance(value, str):
+        return _length_delimited(1, value.encode('utf-8'))
+    if isinstance(value, (bool, np.bool_)):
+        return _field(7, 0) + _varint(int(value))
+    if isinstance(value, (int, np.integer)):
+        return _field(6, 0) + _varint(_zigzag(int(value)))
+    return _field(3, 1) + np.float64(value).tobytes()
+
+
+def _ring_commands(ring: np.ndarray, exterior: bool, cursor: List[int]) -> List[int]:
+    """MoveTo/LineTo/ClosePath commands for one closed ring of integer tile coordinates"""
+    # Drop the closing vertex and consecutive duplicates left by quantization
+    points = ring[:-1]
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    points = points[keep]
+    if len(points) > 1 and np.array_equal(points[0], points[-1]):
+        points = points[:-1]
+    if len(points) < 3:
+        return []
+
+    # Surveyor's formula in y-down tile space: exteriors positive, holes negative
+    x, y = points[:, 0], points[:, 1]
+    area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    if area == 0:
+        return []
+    if (area > 0) != exterior:
+        points = points[::-1]
+
+    deltas = np.diff(np.vstack([cursor, points]), axis=0)
+    cursor[:] = points[-1].tolist()
+
+    commands = [(1 & 0x7) | (1 << 3), _zigzag(int(deltas[0, 0])), _zigzag(int(deltas[0, 1]))]
+    commands.append((2 & 0x7) | ((len(points) - 1) << 3))
+    for dx, dy in deltas[1:]:
+        commands.extend((_zigzag(int(dx)), _zigzag(int(dy))))
+    commands.append((7 & 0x7) | (1 << 3))
+    return commands
+
+
+def polygon_geometry(geometry, origin: Tuple[float, float], scale: float) -> bytes:
+    """Packed MVT polygon geometry for a clipped geometry, or b'' if nothing survives quantization"""
+    cursor = [0, 0]
+    commands: List[int] = []
+
+    for part in shapely.get_parts(geometry):
+        if part.geom_type != 'Polygon' or part.is_empty:
+            continue
+        rings = [part.exterior] + list(part.interiors)
+        for i, ring in enumerate(rings):
+            coords = np.asarray(ring.coords)
+            tile_coords = np.empty((len(coords), 2), dtype=np.int64)
+            tile_coords[:, 0] = np.rint((coords[:, 0] - origin[0]) * scale)
+            tile_coords[:, 1] = np.rint((origin[1] - coords[:, 1]) * scale)
+            ring_commands = _ring_commands(tile_coords, exterior=i == 0, cursor=cursor)
+            if not ring_commands:
+                if i == 0:
+                    break  # No exterior left, so its holes go too
+                continue
+            commands.extend(ring_commands)
+
+    return b''.join(_varint(command) for command in commands)
+
+
+def encode_tile(features: Sequence[Tuple[int, bytes, Dict]], layer_name: str = LAYER_NAME,
+                extent: int = DEFAULT_EXTENT) -> bytes:
+    """Encode (feature id, packed geometry, attributes) triples as a one-layer MVT tile"""
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[str, object], int] = {}
+    encoded_features = []
+
+    for feature_id, geometry, attributes in features:
+        tags = []
+        for key, value in attributes.items():
+            if value is None or (isinstance(value, float) and not math.isfinite(value)):
+                continue
+            key_index = keys.setdefault(key, len(keys))
+            value_index = values.setdefault((type(value).__name__, value), len(values))
+            tags.extend((key_index, value_index))
+
+        feature = _field(1, 0) + _varint(feature_id)
+        if tags:
+            feature += _length_delimited(2, b''.join(_varint(tag) for tag in tags))
+        feature += _field(3, 0) + _varint(3)  # POLYGON
+        feature += _length_delimited(4, geometry)
+        encoded_features.append(_length_delimited(2, feature))
+
+    layer = _field(15, 0) + _varint(2) + _length_delimited(1, layer_name.encode('utf-8'))
+    layer += b''.join(encoded_features)
+    layer += b''.join(_length_delimited(3, key.encode('utf-8')) for key in keys)
+    layer += b''.join(_length_delimited(4, _encode_value(value)) for _, value in values)
+    layer += _field(5, 0) + _varint(extent)
+
+    return _length_delimited(3, layer)
+
+
+# --- Tiling ----------------------------------------------------------------
+
+def tile_size(zoom: int) -> float:
+    return 2 * WORLD_HALF_SIZE / (1 << zoom)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Web Mercator bounds of an XYZ tile"""
+    size = tile_size(zoom)
+    minx = -WORLD_HALF_SIZE + x * size
+    maxy = WORLD_HALF_SIZE - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tile_ranges(bounds: np.ndarray, zoom: int) -> np.ndarray:
+    """Inclusive [x0, y0, x1, y1] tile ranges covering each feature's bounds"""
+    size = tile_size(zoom)
+    last = (1 << zoom) - 1
+    x0 = np.floor((bounds[:, 0] + WORLD_HALF_SIZE) / size)
+    x1 = np.floor((bounds[:, 2] + WORLD_HALF_SIZE) / size)
+    y0 = np.floor((WORLD_HALF_SIZE - bounds[:, 3]) / size)
+    y1 = np.floor((WORLD_HALF_SIZE - bounds[:, 1]) / size)
+    return np.clip(np.column_stack([x0, y0, x1, y1]), 0, last).astype(np.int64)
+
+
+def plan_tiles(bounds: np.ndarray, zoom: int) -> Dict[Tuple[int, int], List[int]]:
+    """(x, y) -> indices of features whose bounding box touches the tile"""
+    tiles: Dict[Tuple[int, int], List[int]] = {}
+    for index, (x0, y0, x1, y1) in enumerate(tile_ranges(bounds, zoom)):
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                tiles.setdefault((x, y), []).append(index)
+    return tiles
+
+
+def clip_tile_block(zoom: int, tiles: List[Tuple[int, int, List[int]]], geometries_wkb: Dict[int, bytes],
+                    extent: int = DEFAULT_EXTENT, buffer: int = DEFAULT_BUFFER) -> List[Tuple[int, int, int, bytes]]:
+    """Clip and quantize one block of tiles; returns (x, y, feature index, packed geometry)"""
+    geometries = dict(zip(geometries_wkb, shapely.from_wkb(list(geometries_wkb.values()))))
+    size = tile_size(zoom)
+    scale = extent / size
+    pad = size * buffer / extent
+
+    results = []
+    for x, y, indices in tiles:
+        minx, miny, maxx, maxy = tile_bounds(zoom, x, y)
+        clipped = shapely.clip_by_rect(
+            np.array([geometries[i] for i in indices], dtype=object),
+            minx - pad, miny - pad, maxx + pad, maxy + pad
+        )
+        for index, geometry in zip(indices, clipped):
+            if geometry is None or geometry.is_empty:
+                continue
+            packed = polygon_geometry(geometry, (minx, maxy), scale)
+            if packed:
+                results.append((x, y, index, packed))
+    return results
+
+
+def attribute_digest(attributes: Dict) -> str:
+    return hashlib.sha1(json.dumps(attributes, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _feature_id(sal_code: str, index: int) -> int:
+    return int(sal_code) if str(sal_code).isdigit() else index
+
+
+class VectorTileArchive:
+    """MBTiles archive of suburb tiles plus the cached per-tile geometry used for attribute-only updates"""
+
+    def __init__(self, path, min_zoom: int = DEFAULT_MIN_ZOOM, max_zoom: int = DEFAULT_MAX_ZOOM,
+                 extent: int = DEFAULT_EXTENT, buffer: int = DEFAULT_BUFFER, workers: int = 1):
+        self.path = Path(path)
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.extent = extent
+        self.buffer = buffer
+        self.workers = workers
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _metadata(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        return dict(conn.execute("SELECT name, value FROM metadata"))
+
+    def build(self, suburbs: gpd.GeoDataFrame, attributes: Dict[str, Dict], geometry_key: str) -> Dict:
+        """Write tiles for `suburbs` (needs sal_code + geometry); returns a small run summary
+
+        geometry_key identifies the boundary source and tiling parameters. When the
+        archive was built with the same key, only tiles holding suburbs whose
+        attributes changed are re-encoded.
+        """
+        geometry_key = attribute_digest({
+            'geometry': geometry_key, 'zooms': [self.min_zoom, self.max_zoom],
+            'extent': self.extent, 'buffer': self.buffer,
+        })
+        sal_codes = suburbs['sal_code'].astype(str).tolist()
+        digests = {code: attribute_digest(attributes.get(code, {})) for code in sal_codes}
+
+        if self.path.exists():
+            with sqlite3.connect(self.path) as conn:
+                try:
+                    same_geometry = self._metadata(conn).get('geometry_key') == geometry_key
+                except sqlite3.DatabaseError:
+                    same_geometry = False
+            if same_geometry:
+                return self._update_attributes(suburbs, attributes, digests, geometry_key)
+            self.path.unlink()
+
+        conn = self._connect()
+        try:
+            tile_count = self._build_geometry(conn, suburbs, sal_codes)
+            self._encode_tiles(conn, attributes, tiles=None)
+            conn.executemany("INSERT OR REPLACE INTO feature_attributes VALUES (?, ?)", digests.items())
+            self._write_metadata(conn, suburbs, attributes, geometry_key)
+            conn.commit()
+        finally:
+            conn.close()
+
+        logger.info(f"🧱 Built {tile_count} tiles (z{self.min_zoom}-z{self.max_zoom}) into {self.path}")
+        return {'mode': 'full', 'tiles': tile_count}
+
+    def _build_geometry(self, conn: sqlite3.Connection, suburbs: gpd.GeoDataFrame, sal_codes: List[str]) -> int:
+        mercator = suburbs.to_crs(WEB_MERCATOR_CRS) if suburbs.crs != WEB_MERCATOR_CRS else suburbs
+        geometries = shapely.make_valid(np.asarray(mercator.geometry.array, dtype=object))
+        feature_ids = [_feature_id(code, i) for i, code in enumerate(sal_codes)]
+
+        tasks = []
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            tolerance = tile_size(zoom) / self.extent * SIMPLIFY_TILE_UNITS
+            simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+            bounds = shapely.bounds(simplified)
+
+            blocks: Dict[Tuple[int, int], List] = {}
+            for (x, y), indices in plan_tiles(bounds, zoom).items():
+                blocks.setdefault((x // TASK_BLOCK_SIZE, y // TASK_BLOCK_SIZE), []).append((x, y, indices))
+
+            for block in blocks.values():
+                used = sorted({i for _, _, indices in block for i in indices})
+                wkb = dict(zip(used, shapely.to_wkb(simplified[used])))
+                tasks.append((zoom, block, wkb))
+
+        logger.info(f"🧩 Clipping {sum(len(block) for _, block, _ in tasks)} candidate tiles in {len(tasks)} blocks")
+
+        def store(zoom, rows):
+            conn.executemany(
+                "INSERT INTO tile_features VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (zoom, x, (1 << zoom) - 1 - y, feature_ids[index], sal_codes[index], packed)
+                    for x, y, index, packed in rows
+                ]
+            )
+
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    (zoom, executor.submit(clip_tile_block, zoom, block, wkb, self.extent, self.buffer))
+                    for zoom, block, wkb in tasks
+                ]
+                for zoom, future in futures:
+                    store(zoom, future.result())
+        else:
+            for zoom, block, wkb in tasks:
+                store(zoom, clip_tile_block(zoom, block, wkb, self.extent, self.buffer))
+
+        return conn.execute(
+            "SELECT COUNT(*) FROM (SELECT DISTINCT zoom_level, tile_column, tile_row FROM tile_features)"
+        ).fetchone()[0]
+
+    def _encode_tiles(self, conn: sqlite3.Connection, attributes: Dict[str, Dict], tiles: Optional[Iterable] = None):
+        """(Re-)encode tiles from cached geometry; all tiles when `tiles` is None"""
+        if tiles is None:
+            tiles = conn.execute("SELECT DISTINCT zoom_level, tile_column, tile_row FROM tile_features").fetchall()
+
+        encoded = []
+        for zoom, column, row in tiles:
+            features = [
+                (feature_id, geometry, attributes.get(sal_code, {'sal_code': sal_code}))
+                for feature_id, sal_code, geometry in conn.execute(
+                    "SELECT feature_id, sal_code, geometry FROM tile_features "
+                    "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ? ORDER BY feature_id",
+                    (zoom, column, row)
+                )
+            ]
+            # mtime=0 so identical tiles compress to identical bytes
+            encoded.append((zoom, column, row, gzip.compress(encode_tile(features, extent=self.extent), mtime=0)))
+
+        conn.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)", encoded)
+        return len(encoded)
+
+    def _update_attributes(self, suburbs: gpd.GeoDataFrame, attributes: Dict[str, Dict], digests: Dict[str, str],
+                           geometry_key: str) -> Dict:
+        conn = self._connect()
+        try:
+            previous = dict(conn.execute("SELECT sal_code, digest FROM feature_attributes"))
+            changed = [code for code, digest in digests.items() if previous.get(code) != digest]
+            if not changed:
+                logger.info(f"♻️ Tiles up to date in {self.path}")
+                return {'mode': 'unchanged', 'tiles': 0}
+
+            tiles = set()
+            for start in range(0, len(changed), 500):
+                batch = changed[start:start + 500]
+                tiles.update(conn.execute(
+                    f"SELECT DISTINCT zoom_level, tile_column, tile_row FROM tile_features "
+                    f"WHERE sal_code IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+
+            count = self._encode_tiles(conn, attributes, sorted(tiles))
+            conn.executemany("INSERT OR REPLACE INTO feature_attributes VALUES (?, ?)", digests.items())
+            # New score fields have to show up in the layer description
+            self._write_metadata(conn, suburbs, attributes, geometry_key)
+            conn.commit()
+        finally:
+            conn.close()
+
+        logger.info(f"🔁 Attributes changed for {len(changed)} suburbs, re-encoded {count} tiles")
+        return {'mode': 'attributes', 'tiles': count, 'changed_suburbs': len(changed)}
+
+    def _write_metadata(self, conn: sqlite3.Connection, suburbs: gpd.GeoDataFrame, attributes: Dict[str, Dict],
+                        geometry_key: str):
+        minx, miny, maxx, maxy = suburbs.to_crs('EPSG:4326').total_bounds
+        fields = {}
+        for values in attributes.values():
+            for key, value in values.items():
+                fields.setdefault(key, 'String' if isinstance(value, str) else 'Number')
+
+        metadata = {
+            'name': LAYER_NAME,
+            'format': 'pbf',
+            'type': 'overlay',
+            'version': '1',
+            'minzoom': str(self.min_zoom),
+            'maxzoom': str(self.max_zoom),
+            'bounds': f"{minx:.6f},{miny:.6f},{maxx:.6f},{maxy:.6f}",
+            'center': f"{(minx + maxx) / 2:.6f},{(miny + maxy) / 2:.6f},{self.min_zoom}",
+            'json': json.dumps({'vector_layers': [{
+                'id': LAYER_NAME, 'fields': fields, 'minzoom': self.min_zoom, 'maxzoom': self.max_zoom,
+            }]}),
+            'geometry_key': geometry_key,
+        }
+        conn.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", metadata.items())
@@ -21,6 +21,19 @@ export async function GET(request: NextRequest) {
       })
     }
 
+    if (file === 'wa_suburbs.topojson') {
+      // Shared-arc topology built by `python scripts/convert_shapefile.py --topojson`
+      const filePath = join(process.cwd(), 'src/data/geographic/wa_suburbs.topojson')
+      const data = readFileSync(filePath, 'utf8')
+
+      return new NextResponse(data, {
+        headers: {
+          'Content-Type': 'application/json',
+          'Cache-Control': 'public, max-age=86400' // Cache for 24 hours
+        }
+      })
+    }
+
     return NextResponse.json(
       { error: 'File not found' },
       { status: 404 }
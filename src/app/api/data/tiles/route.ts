@@ -0,0 +1,59 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { existsSync } from 'fs'
+import { join } from 'path'
+import Database from 'better-sqlite3'
+
+// Built by `python scripts/convert_shapefile.py --tiles`
+const MBTILES_PATH = join(process.cwd(), 'src/data/geographic/wa_suburbs.mbtiles')
+
+let db: Database.Database | null = null
+
+function getDatabase(): Database.Database | null {
+  if (!db && existsSync(MBTILES_PATH)) {
+    db = new Database(MBTILES_PATH, { readonly: true, fileMustExist: true })
+  }
+  return db
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url)
+    const z = Number(searchParams.get('z'))
+    const x = Number(searchParams.get('x'))
+    const y = Number(searchParams.get('y'))
+
+    if (![z, x, y].every(Number.isInteger) || z < 0 || x < 0 || y < 0 || x >= 2 ** z || y >= 2 ** z) {
+      return NextResponse.json({ error: 'Invalid tile coordinates' }, { status: 400 })
+    }
+
+    const database = getDatabase()
+    if (!database) {
+      return NextResponse.json({ error: 'Vector tiles not built' }, { status: 404 })
+    }
+
+    // MBTiles stores rows in TMS order (y flipped)
+    const tmsRow = 2 ** z - 1 - y
+    const row = database
+      .prepare('SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?')
+      .get(z, x, tmsRow) as { tile_data: Buffer } | undefined
+
+    if (!row) {
+      // No suburbs in this tile
+      return new NextResponse(null, { status: 204 })
+    }
+
+    return new NextResponse(new Uint8Array(row.tile_data), {
+      headers: {
+        'Content-Type': 'application/vnd.mapbox-vector-tile',
+        'Content-Encoding': 'gzip',
+        'Cache-Control': 'public, max-age=86400' // Cache for 24 hours
+      }
+    })
+  } catch (error) {
+    console.error('Vector tile API error:', error)
+    return NextResponse.json(
+      { error: 'Failed to load vector tile' },
+      { status: 500 }
+    )
+  }
+}